@@ -16,6 +16,7 @@ from ruamel.yaml import CommentedMap
 from urllib.parse import urlparse
 
 from helper_scripts.utilities.utilites import collect_visible_files
+from helper_scripts.utilities.tracing import traced
 
 
 # Function to remove protocol from URL
@@ -38,6 +39,7 @@ class GenerateCR:
         return data
 
     # write to yaml function
+    @traced("generate")
     def write_cr_template(self):
         # write the updated YAML file with preserved comments
         with open(self._generated_cr, 'w') as file:
@@ -47,7 +49,7 @@ class GenerateCR:
 
     def __init__(self, db_properties=None, ldap_properties=None, usergroup_properties=None, deployment_properties=None,
                  ingress_properties=None, customcomponent_properties=None, idp_properties=None, scim_properties=None,
-                 logger=None):
+                 db_pool_recommendations=None, logger=None):
         self._logger = logger
 
         self._db_properties = db_properties
@@ -58,6 +60,8 @@ class GenerateCR:
         self._ingress_properties = ingress_properties
         self._customcomponent_properties = customcomponent_properties
         self._scim_properties = scim_properties
+        # Connection pool sizes per datasource label from "validate --benchmark-db"
+        self._db_pool_recommendations = db_pool_recommendations if db_pool_recommendations else {}
 
         self._generate_folder = os.path.join(os.getcwd(), "generatedFiles")
         # Navigate up two levels to the parent directory
@@ -85,6 +89,7 @@ class GenerateCR:
         if os.path.exists(self._generated_cr):
             os.remove(self._generated_cr)
 
+    @traced("generate")
     def generate_cr(self):
         self._logger.info("generating CR")
         # call function to generate shared configuration section of CR
@@ -126,6 +131,7 @@ class GenerateCR:
         self.write_cr_template()
 
     # Create a function to populate the SCIM section
+    @traced("generate")
     def populate_scim_section(self):
         self._logger.info("generating SCIM section")
         try:
@@ -193,6 +199,7 @@ class GenerateCR:
             self._logger.exception(f"Error found in populate-scim function in generate_cr script --- {str(e)}")
 
     # function to populate the ldap sections
+    @traced("generate")
     def populate_ldap_section(self, ldap_dict, cr_key, key=None):
         self._logger.info("Generating Ldap section")
         try:
@@ -265,6 +272,7 @@ class GenerateCR:
             self._logger.exception(f"Error found in populate_ldap_section function in generate_cr script --- {str(e)}")
 
     # Create a function to generate the OIDC section
+    @traced("generate")
     def populate_idp_section(self):
         self._logger.info("generating OIDC section")
         try:
@@ -343,6 +351,7 @@ class GenerateCR:
             self._logger.exception(f"Error found in populate-idp function in generate_cr script --- {str(e)}")
 
     # function to populate the db section
+    @traced("generate")
     def populate_db_section(self):
         self._logger.info("generating Database Section")
         try:
@@ -417,6 +426,8 @@ class GenerateCR:
                             db_dict["spec"]["datasource_configuration"][cr_key].pop("database_servername", None)
                             db_dict["spec"]["datasource_configuration"][cr_key].pop("database_port", None)
 
+                    self.populate_connection_manager(db_dict["spec"]["datasource_configuration"][cr_key], db_key)
+
                 # populating the OS section
                 else:
                     while len(db_dict["spec"]["datasource_configuration"]["dc_os_datasources"]) < len(db_key):
@@ -480,6 +491,9 @@ class GenerateCR:
                                 db_dict["spec"]["datasource_configuration"]["dc_os_datasources"][os_number].pop("database_servername", None)
                                 db_dict["spec"]["datasource_configuration"]["dc_os_datasources"][os_number].pop("database_port", None)
 
+                        self.populate_connection_manager(
+                            db_dict["spec"]["datasource_configuration"]["dc_os_datasources"][os_number], prop_key)
+
             # based on the component deployed, certain sections of the CR can be removed.
             if self._deployment_properties["FNCM_Version"] != "5.5.8":
                 if not self._deployment_properties["CPE"]:
@@ -494,7 +508,18 @@ class GenerateCR:
         except Exception as e:
             self._logger.exception(f"Error found in populate_db_section function in generate_cr script --- {str(e)}")
 
+    # Adds the connection pool sizes recommended by the database benchmark to a datasource section
+    def populate_connection_manager(self, datasource_dict, db_key):
+        if db_key not in self._db_pool_recommendations:
+            return
+        recommendation = self._db_pool_recommendations[db_key]
+        connection_manager = CommentedMap()
+        connection_manager["min_pool"] = recommendation["min_pool"]
+        connection_manager["max_pool"] = recommendation["max_pool"]
+        datasource_dict["connection_manager"] = connection_manager
+
     # function to generate the Database , shared and ldap section
+    @traced("generate")
     def generate_base_section(self):
         self._logger.info("Generating Base section")
         try:
@@ -578,6 +603,7 @@ class GenerateCR:
                 f"Error found in generate_base_section function in generate_cr script --- {str(e)}")
 
     # function to generate the ingress section
+    @traced("generate")
     def populate_ingress_section(self):
         # populate ingress section
         # if ingress properties are created then we populate them
@@ -620,6 +646,7 @@ class GenerateCR:
                     self._merged_data["spec"]["shared_configuration"].pop(param)
 
     # function to generate the additional ldap section (multi ldap case)
+    @traced("generate")
     def populate_multi_ldap_section(self):
         try:
             self._logger.info("generating multi ldap section")
@@ -639,6 +666,7 @@ class GenerateCR:
                 f"Error found in generate_multi_ldap_section function in generate_cr script --- {str(e)}")
 
     # function to generate the init section
+    @traced("generate")
     def populate_init_section(self):
         try:
             self._logger.info("generating init section")
@@ -685,6 +713,7 @@ class GenerateCR:
             self._logger.exception(f"Error found in generate_init_section function in generate_cr script --- {str(e)}")
 
     # function to generate the verify section
+    @traced("generate")
     def populate_verify_section(self):
         self._logger.info("generating verify section")
         try:
@@ -832,6 +861,7 @@ class GenerateCR:
                 f"Error found in generate_tm_section function in generate_cr script --- {str(e)}")
 
     # function to generate custom component properties if required
+    @traced("generate")
     def populate_custom_property_section(self, feature_dict):
         self._logger.info("generating custom component section")
 
@@ -19,6 +19,7 @@ import os
 import yaml
 
 from helper_scripts.utilities.utilites import collect_visible_files
+from helper_scripts.utilities.tracing import traced
 
 
 def represent_str(dumper, data):
@@ -65,6 +66,7 @@ class GenerateSecrets:
         xor_result_string = "{xor}" + xor_encoded_bytes.decode()
         return xor_result_string
 
+    @traced("generate")
     def create_ldap_ssl_secrets(self):
         # if SSL is enabled on the Database or the LDAP server then we need to create ssl secrets
 
@@ -121,6 +123,7 @@ class GenerateSecrets:
                                         "SSl secret ibm-" + item + "-ssl-secret has been created at---- " + sslsecret_filepath)
 
     # function to create ssl secrets
+    @traced("generate")
     def create_ssl_db_secrets(self):
         # if SSL is enabled on the Database or the LDAP server then we need to create ssl secrets
         # if any ssl cert folders exists that means ssl was enabled for either ldap or DB
@@ -307,6 +310,7 @@ class GenerateSecrets:
                                     "SSl secret ibm-" + item + "-ssl-secret has been created at---- " + sslsecret_filepath)
 
     # function to create ban secret
+    @traced("generate")
     def create_ban_secret(self):
         self._logger.info("Creating Ban secret")
         bansecret_filepath = os.path.join(self._generate_secrets_folder, "ibm-ban-secret.yaml")
@@ -338,6 +342,7 @@ class GenerateSecrets:
             logging.info("Ban secret ibm-ban-secret.yaml has been created at---- " + bansecret_filepath)
 
     # Function to generate ldap_secret
+    @traced("generate")
     def create_ldap_secret(self):
         self._logger.info("Creating LDAP secret")
         ldapsecret_filepath = os.path.join(self._generate_secrets_folder, "ldap-bind-secret.yaml")
@@ -361,6 +366,7 @@ class GenerateSecrets:
             logging.info("Ldap secret ldap-bind-secret.yaml has been created at---- " + ldapsecret_filepath)
 
     # Function to generate scim_secret
+    @traced("generate")
     def create_scim_secret(self):
         for scim in self._scim_properties['_scim_ids']:
             self._logger.info(f"Creating SCIM secret for {scim}")
@@ -379,6 +385,7 @@ class GenerateSecrets:
                 logging.info(f"SCIM secret {secret_name} has been created -- {scimsecret_filepath}")
 
 
+    @traced("generate")
     def create_idp_secret(self):
 
         for idp in self._idp_properties['_idp_ids']:
@@ -400,6 +407,7 @@ class GenerateSecrets:
                 logging.info(f"IDP secret {secret_name} has been created -- {idpsecret_filepath}")
 
     # Function to generate fncm_secret
+    @traced("generate")
     def create_fncm_secret(self):
         self._logger.info("Creating FNCM secret")
         fncmsecret_filepath = os.path.join(self._generate_secrets_folder, "ibm-fncm-secret.yaml")
@@ -430,6 +438,7 @@ class GenerateSecrets:
 
 
     # Function to generate icc related secrets
+    @traced("generate")
     def create_icc_secrets(self):
         # function creates the icc-masterkey-txt and ibm-icc-secret
         try:
@@ -471,6 +480,7 @@ class GenerateSecrets:
                 f"Error found in create_icc_secrets function in generate_secrets script --- {str(e)}")
 
     # Function to generate trusted certificate secrets
+    @traced("generate")
     def create_trusted_secrets(self):
         try:
             if os.path.exists(self._trusted_certs_folder):
@@ -14,6 +14,8 @@ import inspect
 import os
 import string
 
+from helper_scripts.utilities.tracing import traced
+
 def parse_yaml_sql(parameter):
     if parameter:
         parameter = parameter.replace("'", "''")
@@ -71,6 +73,7 @@ class GenerateSql:
                 f"Exception from generate_sql.py script in {inspect.currentframe().f_code.co_name} function -  {str(e)}")
 
     # Write GCD sql script using loaded template.
+    @traced("generate")
     def create_gcd(self):
         try:
             path = os.path.join(self._dest_path, "createGCD.sql")
@@ -85,6 +88,7 @@ class GenerateSql:
                 f"Exception from generate_sql.py script in {inspect.currentframe().f_code.co_name} function -  {str(e)}")
 
     # Write ICN sql script using loaded template.
+    @traced("generate")
     def create_icn(self):
         try:
             path = os.path.join(self._dest_path, "createICN.sql")
@@ -115,6 +119,7 @@ class GenerateSql:
                 f"Exception from generate_sql.py script in {inspect.currentframe().f_code.co_name} function -  {str(e)}")
 
     # Write OS sql scripts using loaded template
+    @traced("generate")
     def create_os(self):
         try:
             for index, os_id in enumerate(self._dbprop["_os_ids"]):
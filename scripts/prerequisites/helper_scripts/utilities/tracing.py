@@ -0,0 +1,114 @@
+###############################################################################
+#
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp. 2023. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+###############################################################################
+
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Written next to prerequisites.log when "--trace" is passed
+TRACE_FILE = os.path.join(os.getcwd(), "prerequisites_trace.json")
+
+
+# Records timed spans of the phases and checks of a run.
+# Spans are only kept once tracing is enabled, otherwise span() costs a flag check.
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self._spans = []
+        self._threads = {}
+        self._lock = threading.Lock()
+        # perf_counter_ns has no fixed epoch, spans are stored relative to the wall clock at this point
+        self._epoch_ns = time.time_ns() - time.perf_counter_ns()
+
+    def enable(self):
+        self.enabled = True
+
+    @staticmethod
+    def now_ns() -> int:
+        return time.perf_counter_ns()
+
+    # Records a span whose start and end were taken with now_ns(), for work that does not fit a with block
+    def record(self, name, category, start_ns, end_ns, **args):
+        if not self.enabled:
+            return
+        thread = threading.current_thread()
+        with self._lock:
+            self._threads[thread.ident] = thread.name
+            self._spans.append((name, category, start_ns + self._epoch_ns, end_ns + self._epoch_ns,
+                                thread.ident, args))
+
+    @contextmanager
+    def span(self, name, category="prerequisites", **args):
+        if not self.enabled:
+            yield
+            return
+
+        start_ns = self.now_ns()
+        try:
+            yield
+        except BaseException as e:
+            args["error"] = f"{type(e).__name__}: {str(e)}"
+            raise
+        finally:
+            self.record(name, category, start_ns, self.now_ns(), **args)
+
+    # Writes the spans in the Chrome trace event format, timestamps are in microseconds
+    def write(self, file_path=TRACE_FILE):
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self._spans)
+            threads = dict(self._threads)
+
+        events = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                  for tid, name in threads.items()]
+        for name, category, start_ns, end_ns, tid, args in sorted(spans, key=lambda item: item[2]):
+            events.append({"name": name, "cat": category, "ph": "X", "pid": pid, "tid": tid,
+                           "ts": start_ns / 1000, "dur": (end_ns - start_ns) / 1000,
+                           "args": {key: value if isinstance(value, (int, float, bool)) else str(value)
+                                    for key, value in args.items()}})
+
+        with open(file_path, "w", encoding="utf-8") as trace_file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, trace_file)
+        return file_path
+
+
+tracer = Tracer()
+
+
+def span(name, category="prerequisites", **args):
+    return tracer.span(name, category, **args)
+
+
+# Decorator that records every call of the function as a span named after it.
+# The values of the parameters in arg_names are added to the span, e.g. the datasource label.
+def traced(category="prerequisites", name=None, arg_names=()):
+    def decorator(func):
+        span_name = name if name else func.__qualname__
+        signature = inspect.signature(func) if arg_names else None
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            span_args = {}
+            if signature:
+                bound = signature.bind_partial(*args, **kwargs).arguments
+                span_args = {arg_name: bound[arg_name] for arg_name in arg_names if arg_name in bound}
+            with tracer.span(span_name, category, **span_args):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
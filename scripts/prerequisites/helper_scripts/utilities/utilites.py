@@ -9,6 +9,7 @@
 #
 ###############################################################################
 
+import hashlib
 import os
 import pathlib
 import platform
@@ -29,8 +30,11 @@ from rich.table import Table
 from rich.text import Text
 from rich.tree import Tree
 
+from helper_scripts.utilities.tracing import traced
+
 
 # Create a method to zip a folder and return the path to the zip file
+@traced("generate")
 def zip_folder(zip_file_name: str, folder_path: str) -> str:
     """Zip a folder and return the path to the zip file."""
     zip_file = shutil.make_archive(zip_file_name, "zip", folder_path, )
@@ -938,7 +942,7 @@ def ldap_search_results(user_result_dict, group_result_dict):
             ldaps = ""
             for i in group_result_dict[group]["ldap_id"]:
                 ldaps += "- " + i + "\n"
-            group_duplicate_table.add_row(group, group_result_dict[group]["ldap_id"])
+            group_duplicate_table.add_row(group, ldaps)
 
         group_table_list.append(group_duplicate_table)
         duplicated = True
@@ -973,3 +977,26 @@ def ldap_search_results(user_result_dict, group_result_dict):
 
 def collect_visible_files(folder_path: str) -> [str]:
     return [file for file in os.listdir(folder_path) if not file.startswith('.')]
+
+
+# Function to calculate the SHA-256 digest of a file
+def file_sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Function to collect all visible files in a folder and its sub folders
+def collect_visible_files_recursive(folder_path: str) -> [str]:
+    files = []
+    if not os.path.exists(folder_path):
+        return files
+    for file in collect_visible_files(folder_path):
+        file_path = os.path.join(folder_path, file)
+        if os.path.isdir(file_path):
+            files.extend(collect_visible_files_recursive(file_path))
+        else:
+            files.append(file_path)
+    return files
@@ -0,0 +1,205 @@
+###############################################################################
+#
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp. 2023. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+###############################################################################
+
+import itertools
+import os
+import platform
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from urllib.parse import urlencode, parse_qsl
+
+
+# Result of a single request sent to the connection daemon
+class ConnectionResult:
+    def __init__(self, status, rtt_ms=0.0, message="", sql_state="", values=None):
+        self.status = status
+        self.rtt_ms = rtt_ms
+        self.message = message
+        self.sql_state = sql_state
+        # Every key/value pair returned by the daemon
+        self.values = values if values else {}
+
+    @property
+    def connected(self) -> bool:
+        return self.status == "ok"
+
+    @classmethod
+    def from_response(cls, values: dict):
+        return cls(status=values.get("status", "error"),
+                   rtt_ms=float(values.get("rtt_ms", 0) or 0),
+                   message=values.get("message", ""),
+                   sql_state=values.get("sql_state", ""),
+                   values=values)
+
+    def to_dict(self):
+        return {"status": self.status,
+                "rtt_ms": self.rtt_ms,
+                "message": self.message,
+                "sql_state": self.sql_state}
+
+
+# Long-lived helper JVM that checks JDBC connections.
+# The JVM is started once and takes one request per line on stdin,
+# answering with one line on stdout (see daemon/ConnectionDaemon.java for the protocol).
+# Requests may be sent from several threads, responses are matched by request id.
+class ConnectionDaemon:
+    _SOURCE_DIR = os.path.join(os.getcwd(), "helper_scripts", "validate", "daemon")
+
+    _MAIN_CLASS = "ConnectionDaemon"
+
+    _START_TIMEOUT = 120
+
+    def __init__(self, logger, class_path: list, build_dir, java_options=None):
+        self._logger = logger
+        self._class_path = class_path
+        self._build_dir = build_dir
+        self._java_options = java_options if java_options else []
+
+        self._process = None
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._reader = None
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None and self._process.poll() is None and self._ready.is_set()
+
+    # Compiles the daemon with javac when available, otherwise relies on the
+    # single-file source launcher of Java 11+. Returns the command to start the JVM.
+    def __launch_command(self):
+        source_file = os.path.join(self._SOURCE_DIR, self._MAIN_CLASS + ".java")
+        delimiter = ";" if platform.system() == 'Windows' else ":"
+
+        if shutil.which("javac"):
+            os.makedirs(self._build_dir, exist_ok=True)
+            try:
+                subprocess.run(["javac", "-nowarn", "-d", self._build_dir, source_file],
+                               check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                class_path = delimiter.join([self._build_dir] + self._class_path)
+                return ["java"] + self._java_options + ["-cp", class_path, self._MAIN_CLASS]
+            except subprocess.CalledProcessError as error:
+                self._logger.info(f"Unable to compile connection daemon: {error.stderr}")
+
+        class_path = delimiter.join(self._class_path)
+        return ["java"] + self._java_options + ["-cp", class_path, source_file]
+
+    # Starts the JVM, returns False if the daemon could not be started
+    def start(self) -> bool:
+        if self.running:
+            return True
+
+        command = self.__launch_command()
+        self._logger.info(f"Starting connection daemon: {' '.join(command[:1] + command[-1:])}")
+        try:
+            self._process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                             stderr=subprocess.PIPE, encoding="utf-8", bufsize=1)
+        except OSError as e:
+            self._logger.info(f"Unable to start connection daemon: {str(e)}")
+            self._process = None
+            return False
+
+        self._ready.clear()
+        self._reader = threading.Thread(target=self.__read_responses, args=(self._process,), daemon=True)
+        self._reader.start()
+        threading.Thread(target=self.__drain_stderr, args=(self._process,), daemon=True).start()
+
+        deadline = time.monotonic() + self._START_TIMEOUT
+        while not self._ready.wait(0.1):
+            if self._process.poll() is not None or time.monotonic() > deadline:
+                self._logger.info("Connection daemon did not start, falling back to one JVM per connection check")
+                self.stop()
+                return False
+        return True
+
+    def __read_responses(self, process):
+        for line in process.stdout:
+            values = dict(parse_qsl(line.strip(), keep_blank_values=True))
+            if values.get("status") == "ready":
+                self._ready.set()
+                continue
+            with self._lock:
+                future = self._pending.pop(values.get("id"), None)
+            if future:
+                future.set_result(ConnectionResult.from_response(values))
+
+        # The JVM went away, fail every request still waiting for an answer
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_result(ConnectionResult("error", message="Connection daemon exited unexpectedly"))
+
+    def __drain_stderr(self, process):
+        for line in process.stderr:
+            self._logger.debug(f"connection daemon: {line.rstrip()}")
+
+    # Sends a request and waits for its response
+    def request(self, op, timeout=None, **values) -> ConnectionResult:
+        if not self.running:
+            return ConnectionResult("error", message="Connection daemon is not running")
+
+        request_id = str(next(self._ids))
+        future = Future()
+        with self._lock:
+            self._pending[request_id] = future
+            line = urlencode(dict({"id": request_id, "op": op},
+                                  **{key: str(value) for key, value in values.items() if value is not None}))
+            try:
+                self._process.stdin.write(line + "\n")
+                self._process.stdin.flush()
+            except OSError as e:
+                self._pending.pop(request_id, None)
+                return ConnectionResult("error", message=f"Unable to reach connection daemon: {str(e)}")
+
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            with self._lock:
+                self._pending.pop(request_id, None)
+            return ConnectionResult("error", message=f"No response from connection daemon after {timeout} seconds")
+
+    # Opens and closes one JDBC connection.
+    # login_timeout bounds the connection attempt in the JVM, timeout how long to wait for the answer.
+    def check_connection(self, url, user, password, driver=None, properties=None, timeout=None,
+                         login_timeout=None) -> ConnectionResult:
+        values = {"url": url, "user": user, "password": password, "driver": driver, "login_timeout": login_timeout}
+        if properties:
+            for key, value in properties.items():
+                values[f"prop.{key}"] = value
+        return self.request("connect", timeout=timeout, **values)
+
+    # Runs the query on "concurrency" connections at once for duration_ms, see ConnectionDaemon.java
+    def benchmark(self, url, user, password, query, concurrency, duration_ms, driver=None, properties=None,
+                  timeout=None, login_timeout=None) -> ConnectionResult:
+        values = {"url": url, "user": user, "password": password, "driver": driver, "query": query,
+                  "concurrency": concurrency, "duration_ms": duration_ms, "login_timeout": login_timeout}
+        if properties:
+            for key, value in properties.items():
+                values[f"prop.{key}"] = value
+        return self.request("benchmark", timeout=timeout, **values)
+
+    def stop(self):
+        if self._process is None:
+            return
+        try:
+            if self._process.poll() is None:
+                self._process.stdin.write("op=quit\n")
+                self._process.stdin.flush()
+                self._process.wait(timeout=10)
+        except (OSError, subprocess.TimeoutExpired):
+            self._process.kill()
+        finally:
+            self._process = None
+            self._ready.clear()
@@ -0,0 +1,346 @@
+/*
+ * Licensed Materials - Property of IBM
+ *
+ * (C) Copyright IBM Corp. 2023. All Rights Reserved.
+ *
+ * US Government Users Restricted Rights - Use, duplication or
+ * disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+ */
+
+import java.io.BufferedReader;
+import java.io.FileDescriptor;
+import java.io.FileOutputStream;
+import java.io.InputStreamReader;
+import java.io.PrintStream;
+import java.io.UnsupportedEncodingException;
+import java.net.URLDecoder;
+import java.net.URLEncoder;
+import java.sql.Connection;
+import java.sql.DriverManager;
+import java.sql.PreparedStatement;
+import java.sql.ResultSet;
+import java.sql.SQLException;
+import java.util.Arrays;
+import java.util.LinkedHashMap;
+import java.util.Map;
+import java.util.Properties;
+import java.util.concurrent.CountDownLatch;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.Executors;
+import java.util.concurrent.ThreadFactory;
+import java.util.concurrent.TimeUnit;
+
+/**
+ * Long running JDBC connection checker used by "prerequisites.py validate".
+ *
+ * One request per line on stdin and one response per line on stdout, both
+ * encoded as URL query strings (key=value pairs joined with '&', values URL encoded).
+ *
+ * Request:  id=1&op=connect&url=...&user=...&password=...&driver=...&login_timeout=10&prop.<name>=<value>
+ * Response: id=1&status=ok&rtt_ms=12.345
+ *           id=1&status=error&message=...&sql_state=...
+ *
+ * login_timeout is the number of seconds a connection attempt may take, so an unreachable
+ * database host does not hold a worker until the caller gives up on the request.
+ *
+ * "op=benchmark" takes the same connection values plus concurrency, duration_ms and query.
+ * It opens "concurrency" connections at once, runs the query on each of them in a loop for
+ * duration_ms and answers with connection and query timings:
+ * Response: id=1&status=ok&connections=8&connect_ms=...&queries=...&duration_ms=...
+ *           &query_p50_ms=...&query_p95_ms=...&query_p99_ms=...
+ *
+ * "op=quit" (or closing stdin) stops the daemon. Requests are handled concurrently.
+ */
+public class ConnectionDaemon {
+
+    private static final String ENCODING = "UTF-8";
+    private static final String PROPERTY_PREFIX = "prop.";
+    private static final String ORACLE_CONNECT_TIMEOUT = "oracle.net.CONNECT_TIMEOUT";
+
+    private static PrintStream protocolOut;
+
+    public static void main(String[] args) throws Exception {
+        // Keep the protocol stream to ourselves, JDBC drivers sometimes print to stdout
+        protocolOut = new PrintStream(new FileOutputStream(FileDescriptor.out), true, ENCODING);
+        System.setOut(System.err);
+
+        ExecutorService workers = Executors.newCachedThreadPool(new ThreadFactory() {
+            public Thread newThread(Runnable runnable) {
+                Thread thread = new Thread(runnable);
+                thread.setDaemon(true);
+                return thread;
+            }
+        });
+
+        BufferedReader in = new BufferedReader(new InputStreamReader(System.in, ENCODING));
+        respond("status=ready");
+
+        String line;
+        while ((line = in.readLine()) != null) {
+            if (line.trim().isEmpty()) {
+                continue;
+            }
+            final Map<String, String> request = decode(line);
+            if ("quit".equals(request.get("op"))) {
+                break;
+            }
+            workers.submit(new Runnable() {
+                public void run() {
+                    respond(handle(request));
+                }
+            });
+        }
+
+        workers.shutdown();
+        workers.awaitTermination(60, TimeUnit.SECONDS);
+        System.exit(0);
+    }
+
+    private static String handle(Map<String, String> request) {
+        StringBuilder response = new StringBuilder();
+        append(response, "id", request.get("id"));
+        try {
+            String op = request.get("op");
+            if ("connect".equals(op)) {
+                double rtt = connect(request);
+                append(response, "status", "ok");
+                append(response, "rtt_ms", String.valueOf(rtt));
+            } else if ("benchmark".equals(op)) {
+                benchmark(request, response);
+            } else {
+                append(response, "status", "error");
+                append(response, "message", "Unknown operation: " + op);
+            }
+        } catch (Throwable e) {
+            append(response, "status", "error");
+            append(response, "message", describe(e));
+            if (e instanceof SQLException && ((SQLException) e).getSQLState() != null) {
+                append(response, "sql_state", ((SQLException) e).getSQLState());
+            }
+        }
+        return response.toString();
+    }
+
+    // Opens and closes a single connection, returns the time taken to connect in milliseconds
+    private static double connect(Map<String, String> request) throws Exception {
+        Connection connection = null;
+        long start = System.nanoTime();
+        try {
+            connection = open(request);
+            return (System.nanoTime() - start) / 1000000.0;
+        } finally {
+            if (connection != null) {
+                connection.close();
+            }
+        }
+    }
+
+    // Opens all connections at the same time, then runs the query on each connection until the time is up
+    private static void benchmark(final Map<String, String> request, StringBuilder response) throws Exception {
+        final int concurrency = Integer.parseInt(request.get("concurrency"));
+        final long durationNs = Long.parseLong(request.get("duration_ms")) * 1000000L;
+        final String query = request.get("query");
+
+        final Samples[] samples = new Samples[concurrency];
+        final Throwable[] failure = new Throwable[1];
+        final CountDownLatch connected = new CountDownLatch(concurrency);
+        final CountDownLatch start = new CountDownLatch(1);
+        final long[] deadline = new long[1];
+        Thread[] threads = new Thread[concurrency];
+
+        long connectStart = System.nanoTime();
+        for (int i = 0; i < concurrency; i++) {
+            final int index = i;
+            samples[index] = new Samples();
+            threads[index] = new Thread(new Runnable() {
+                public void run() {
+                    Connection connection = null;
+                    try {
+                        try {
+                            connection = open(request);
+                        } finally {
+                            connected.countDown();
+                        }
+                        start.await();
+                        PreparedStatement statement = connection.prepareStatement(query);
+                        try {
+                            while (System.nanoTime() < deadline[0]) {
+                                long queryStart = System.nanoTime();
+                                ResultSet result = statement.executeQuery();
+                                result.next();
+                                result.close();
+                                samples[index].add(System.nanoTime() - queryStart);
+                            }
+                        } finally {
+                            statement.close();
+                        }
+                    } catch (Throwable e) {
+                        synchronized (failure) {
+                            if (failure[0] == null) {
+                                failure[0] = e;
+                            }
+                        }
+                    } finally {
+                        if (connection != null) {
+                            try {
+                                connection.close();
+                            } catch (SQLException e) {
+                                // Nothing left to measure on this connection
+                            }
+                        }
+                    }
+                }
+            });
+            threads[index].setDaemon(true);
+            threads[index].start();
+        }
+
+        connected.await();
+        double connectMs = (System.nanoTime() - connectStart) / 1000000.0;
+        long queryStart = System.nanoTime();
+        deadline[0] = queryStart + durationNs;
+        start.countDown();
+        for (Thread thread : threads) {
+            thread.join();
+        }
+        double durationMs = (System.nanoTime() - queryStart) / 1000000.0;
+
+        if (failure[0] != null) {
+            if (failure[0] instanceof Exception) {
+                throw (Exception) failure[0];
+            }
+            throw new Exception(failure[0]);
+        }
+
+        Samples all = new Samples();
+        for (Samples threadSamples : samples) {
+            all.addAll(threadSamples);
+        }
+        long[] sorted = all.sorted();
+
+        append(response, "status", "ok");
+        append(response, "connections", String.valueOf(concurrency));
+        append(response, "connect_ms", String.valueOf(connectMs));
+        append(response, "queries", String.valueOf(sorted.length));
+        append(response, "duration_ms", String.valueOf(durationMs));
+        append(response, "query_p50_ms", String.valueOf(percentile(sorted, 50)));
+        append(response, "query_p95_ms", String.valueOf(percentile(sorted, 95)));
+        append(response, "query_p99_ms", String.valueOf(percentile(sorted, 99)));
+    }
+
+    // Nearest rank percentile of sorted nanosecond samples, in milliseconds
+    private static double percentile(long[] sorted, int pct) {
+        if (sorted.length == 0) {
+            return 0;
+        }
+        int rank = (int) Math.ceil(pct / 100.0 * sorted.length) - 1;
+        return sorted[Math.max(0, rank)] / 1000000.0;
+    }
+
+    // Growable list of nanosecond timings, one per benchmark thread
+    private static class Samples {
+        private long[] values = new long[1024];
+        private int size;
+
+        void add(long value) {
+            if (size == values.length) {
+                values = Arrays.copyOf(values, size * 2);
+            }
+            values[size++] = value;
+        }
+
+        void addAll(Samples other) {
+            for (int i = 0; i < other.size; i++) {
+                add(other.values[i]);
+            }
+        }
+
+        long[] sorted() {
+            long[] copy = Arrays.copyOf(values, size);
+            Arrays.sort(copy);
+            return copy;
+        }
+    }
+
+    static Connection open(Map<String, String> request) throws Exception {
+        String driver = request.get("driver");
+        if (driver != null && !driver.isEmpty()) {
+            Class.forName(driver);
+        }
+
+        Properties properties = new Properties();
+        if (request.get("user") != null) {
+            properties.setProperty("user", request.get("user"));
+        }
+        if (request.get("password") != null) {
+            properties.setProperty("password", request.get("password"));
+        }
+        for (Map.Entry<String, String> entry : request.entrySet()) {
+            if (entry.getKey().startsWith(PROPERTY_PREFIX)) {
+                properties.setProperty(entry.getKey().substring(PROPERTY_PREFIX.length()), entry.getValue());
+            }
+        }
+
+        String loginTimeout = request.get("login_timeout");
+        if (loginTimeout != null && !loginTimeout.isEmpty()) {
+            int seconds = Integer.parseInt(loginTimeout);
+            setLoginTimeout(seconds);
+            // The Oracle thin driver only bounds the TCP connect with its own property
+            if (driver != null && driver.startsWith("oracle.") && !properties.containsKey(ORACLE_CONNECT_TIMEOUT)) {
+                properties.setProperty(ORACLE_CONNECT_TIMEOUT, String.valueOf(seconds * 1000L));
+            }
+        }
+        return DriverManager.getConnection(request.get("url"), properties);
+    }
+
+    // The login timeout is global to DriverManager, every request sends the same value
+    private static synchronized void setLoginTimeout(int seconds) {
+        if (DriverManager.getLoginTimeout() != seconds) {
+            DriverManager.setLoginTimeout(seconds);
+        }
+    }
+
+    private static String describe(Throwable e) {
+        StringBuilder message = new StringBuilder(e.toString());
+        Throwable cause = e.getCause();
+        while (cause != null && cause != e) {
+            message.append("\nCaused by: ").append(cause.toString());
+            e = cause;
+            cause = cause.getCause();
+        }
+        return message.toString();
+    }
+
+    private static synchronized void respond(String response) {
+        protocolOut.println(response);
+        protocolOut.flush();
+    }
+
+    static void append(StringBuilder builder, String key, String value) {
+        if (value == null) {
+            return;
+        }
+        if (builder.length() > 0) {
+            builder.append('&');
+        }
+        try {
+            builder.append(key).append('=').append(URLEncoder.encode(value, ENCODING));
+        } catch (UnsupportedEncodingException e) {
+            throw new IllegalStateException(e);
+        }
+    }
+
+    private static Map<String, String> decode(String line) throws UnsupportedEncodingException {
+        Map<String, String> values = new LinkedHashMap<String, String>();
+        for (String pair : line.split("&")) {
+            int separator = pair.indexOf('=');
+            if (separator < 0) {
+                values.put(URLDecoder.decode(pair, ENCODING), "");
+            } else {
+                values.put(URLDecoder.decode(pair.substring(0, separator), ENCODING),
+                        URLDecoder.decode(pair.substring(separator + 1), ENCODING));
+            }
+        }
+        return values;
+    }
+}
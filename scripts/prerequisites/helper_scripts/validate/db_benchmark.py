@@ -0,0 +1,147 @@
+###############################################################################
+#
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp. 2023. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+###############################################################################
+
+import os
+
+import toml
+from rich.table import Table
+
+# Written by "validate --benchmark-db", read by "generate --apply-pool-recommendations"
+POOL_RECOMMENDATIONS_FILE = os.path.join(os.getcwd(), "propertyFile", "fncm_db_pool_recommendations.toml")
+
+# Cheapest round trip query for each database type
+BENCHMARK_QUERIES = {"db2": "SELECT 1 FROM SYSIBM.SYSDUMMY1",
+                     "oracle": "SELECT 1 FROM DUAL",
+                     "sqlserver": "SELECT 1",
+                     "postgresql": "SELECT 1"}
+
+# Throughput has stopped scaling once doubling the connections adds less than this fraction
+SCALING_THRESHOLD = 0.1
+
+
+# Returns the number of concurrent connections to test: 1, 2, 4, ... up to and including max_connections
+def concurrency_levels(max_connections) -> list:
+    levels = []
+    level = 1
+    while level < max_connections:
+        levels.append(level)
+        level *= 2
+    levels.append(max_connections)
+    return levels
+
+
+# Result of running the benchmark query on a fixed number of concurrent connections
+class BenchmarkLevel:
+    def __init__(self, concurrency, connect_ms, queries, duration_ms, query_p50_ms, query_p95_ms, query_p99_ms):
+        self.concurrency = concurrency
+        self.connect_ms = connect_ms
+        self.queries = queries
+        self.duration_ms = duration_ms
+        self.query_p50_ms = query_p50_ms
+        self.query_p95_ms = query_p95_ms
+        self.query_p99_ms = query_p99_ms
+
+    @classmethod
+    def from_result(cls, concurrency, values: dict):
+        return cls(concurrency=concurrency,
+                   connect_ms=float(values.get("connect_ms", 0)),
+                   queries=int(values.get("queries", 0)),
+                   duration_ms=float(values.get("duration_ms", 0)),
+                   query_p50_ms=float(values.get("query_p50_ms", 0)),
+                   query_p95_ms=float(values.get("query_p95_ms", 0)),
+                   query_p99_ms=float(values.get("query_p99_ms", 0)))
+
+    # Queries per second over all connections
+    @property
+    def throughput(self) -> float:
+        return self.queries * 1000 / self.duration_ms if self.duration_ms else 0.0
+
+    # Connections opened per second while opening all connections at once
+    @property
+    def connections_per_second(self) -> float:
+        return self.concurrency * 1000 / self.connect_ms if self.connect_ms else 0.0
+
+    def to_dict(self):
+        return {"concurrency": self.concurrency,
+                "connections_per_second": self.connections_per_second,
+                "queries": self.queries,
+                "queries_per_second": self.throughput,
+                "query_p50_ms": self.query_p50_ms,
+                "query_p95_ms": self.query_p95_ms,
+                "query_p99_ms": self.query_p99_ms}
+
+
+# Connection pool sizes derived from a benchmark
+class PoolRecommendation:
+    def __init__(self, min_pool, max_pool, saturated):
+        self.min_pool = min_pool
+        self.max_pool = max_pool
+        # False when throughput was still scaling at the highest concurrency tested
+        self.saturated = saturated
+
+    def to_dict(self):
+        return {"min_pool": self.min_pool,
+                "max_pool": self.max_pool}
+
+
+# The maximum pool size is the concurrency after which throughput stops scaling,
+# the minimum pool size is the lowest concurrency that reaches half of the peak throughput.
+def recommend_pool(levels: list) -> PoolRecommendation:
+    if not levels:
+        return None
+
+    saturation = levels[-1]
+    saturated = False
+    for previous, current in zip(levels, levels[1:]):
+        if current.throughput < previous.throughput * (1 + SCALING_THRESHOLD):
+            saturation = previous
+            saturated = True
+            break
+
+    peak = max(level.throughput for level in levels)
+    min_pool = next(level.concurrency for level in levels if level.throughput >= peak / 2)
+    return PoolRecommendation(min_pool=min(min_pool, saturation.concurrency),
+                              max_pool=saturation.concurrency,
+                              saturated=saturated)
+
+
+def benchmark_table(db_label, levels: list, recommendation: PoolRecommendation) -> Table:
+    table = Table(title=f"{db_label} Datasource Benchmark")
+
+    table.add_column("Connections", justify="right", style="cyan", no_wrap=True)
+    table.add_column("Connections/s", justify="right")
+    table.add_column("Queries/s", justify="right", style="magenta")
+    table.add_column("p50 (ms)", justify="right")
+    table.add_column("p95 (ms)", justify="right")
+    table.add_column("p99 (ms)", justify="right")
+
+    for level in levels:
+        style = "bold green" if recommendation and level.concurrency == recommendation.max_pool else None
+        table.add_row(str(level.concurrency), "{:.1f}".format(level.connections_per_second),
+                      "{:.1f}".format(level.throughput), "{:.2f}".format(level.query_p50_ms),
+                      "{:.2f}".format(level.query_p95_ms), "{:.2f}".format(level.query_p99_ms), style=style)
+
+    return table
+
+
+def save_pool_recommendations(recommendations: dict, file_path=POOL_RECOMMENDATIONS_FILE):
+    with open(file_path, "w") as recommendation_file:
+        toml.dump({label: recommendation.to_dict() for label, recommendation in recommendations.items()},
+                  recommendation_file)
+    return file_path
+
+
+# Returns {datasource label: {"min_pool": .., "max_pool": ..}}, empty if no benchmark has been run
+def load_pool_recommendations(file_path=POOL_RECOMMENDATIONS_FILE) -> dict:
+    if not os.path.exists(file_path):
+        return {}
+    with open(file_path) as recommendation_file:
+        return toml.load(recommendation_file)
@@ -0,0 +1,136 @@
+###############################################################################
+#
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp. 2023. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+###############################################################################
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from socket import getaddrinfo, gaierror, timeout as socket_timeout, SOCK_STREAM
+
+from rich.table import Table
+
+# Lookups slower than this many milliseconds are reported as a DNS problem
+DEFAULT_SLOW_DNS_MS = 100
+
+# Number of lookups running at the same time
+_MAX_RESOLVERS = 32
+
+_NS_PER_MS = 1000000
+
+
+# Outcome of the lookup of one hostname
+class Resolution:
+    def __init__(self, host):
+        self.host = host
+        # (family, socket type, protocol, address) per address, the port is filled in when connecting
+        self.addresses = []
+        self.duration_ms = None
+        self.error = None
+        self.exception = None
+        self.slow = False
+
+    @property
+    def ip_addresses(self) -> list:
+        ips = []
+        for _, _, _, address in self.addresses:
+            if address[0] not in ips:
+                ips.append(address[0])
+        return ips
+
+    def to_dict(self):
+        return {"host": self.host,
+                "addresses": self.ip_addresses,
+                "duration_ms": self.duration_ms,
+                "slow": self.slow,
+                "error": self.error}
+
+
+# Resolves every hostname once, in parallel, and hands the addresses to the probes that connect later.
+# Hostnames that could not be resolved fail again right away instead of waiting for another lookup.
+class DnsCache:
+    def __init__(self, logger, slow_ms=DEFAULT_SLOW_DNS_MS):
+        self._logger = logger
+        self._slow_ms = slow_ms
+        self._resolutions = {}
+        self._lock = threading.Lock()
+
+    def __lookup(self, resolution):
+        start_time = time.perf_counter_ns()
+        try:
+            resolution.addresses = [(family, sock_type, proto, address)
+                                    for family, sock_type, proto, _, address
+                                    in getaddrinfo(resolution.host, None, type=SOCK_STREAM)]
+        except gaierror as e:
+            resolution.error = str(e)
+            resolution.exception = e
+        resolution.duration_ms = (time.perf_counter_ns() - start_time) / _NS_PER_MS
+        resolution.slow = resolution.duration_ms > self._slow_ms
+
+    # Resolves the hostnames in parallel, each lookup has to finish within the timeout.
+    # Returns {hostname: Resolution}.
+    def resolve_all(self, hosts, timeout=10) -> dict:
+        resolutions = {host: Resolution(host) for host in dict.fromkeys(hosts)}
+        if not resolutions:
+            return {}
+
+        executor = ThreadPoolExecutor(max_workers=min(_MAX_RESOLVERS, len(resolutions)), thread_name_prefix="dns")
+        futures = [executor.submit(self.__lookup, resolution) for resolution in resolutions.values()]
+        wait(futures, timeout=timeout)
+        # A lookup that hangs is left to finish in the background
+        executor.shutdown(wait=False)
+
+        for resolution in resolutions.values():
+            if resolution.duration_ms is None:
+                resolution.duration_ms = timeout * 1000
+                resolution.slow = True
+                resolution.error = f"DNS lookup timed out after {timeout} seconds"
+                resolution.exception = socket_timeout(resolution.error)
+            if resolution.error:
+                self._logger.info(f"Unable to resolve {resolution.host}: {resolution.error}")
+
+        with self._lock:
+            self._resolutions.update(resolutions)
+        return resolutions
+
+    def get(self, host):
+        with self._lock:
+            return self._resolutions.get(host)
+
+    # Addresses of the host in the getaddrinfo format, None when it was not resolved by resolve_all.
+    # Raises the error of the lookup when the host could not be resolved.
+    def addresses(self, host, port):
+        resolution = self.get(host)
+        if resolution is None:
+            return None
+        if resolution.exception is not None:
+            raise resolution.exception
+        return [(family, sock_type, proto, "", (address[0], int(port)) + tuple(address[2:]))
+                for family, sock_type, proto, address in resolution.addresses]
+
+
+def dns_table(resolutions: dict, slow_ms=DEFAULT_SLOW_DNS_MS) -> Table:
+    table = Table(title="DNS Resolution")
+
+    table.add_column("Hostname", justify="left", style="cyan", no_wrap=True)
+    table.add_column("Addresses", justify="left")
+    table.add_column("Lookup (ms)", justify="right", style="magenta")
+    table.add_column("Result", justify="left")
+
+    for host, resolution in sorted(resolutions.items(), key=lambda item: (not item[1].error, item[0])):
+        if resolution.error:
+            status = f"[bold red]{resolution.error}"
+        elif resolution.slow:
+            status = f"[bold yellow]Slow DNS (> {slow_ms}ms)"
+        elif len(resolution.ip_addresses) > 1:
+            status = f"[bold yellow]{len(resolution.ip_addresses)} addresses"
+        else:
+            status = "[bold green]Resolved"
+        table.add_row(host, ", ".join(resolution.ip_addresses), "{:.2f}".format(resolution.duration_ms), status)
+    return table
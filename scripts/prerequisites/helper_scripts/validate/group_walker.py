@@ -0,0 +1,244 @@
+###############################################################################
+#
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp. 2023. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+###############################################################################
+
+import re
+import time
+
+from ldap3 import BASE, NO_ATTRIBUTES
+from ldap3.utils.conv import escape_filter_chars
+from rich.table import Table
+
+from helper_scripts.validate.ldap_search import dump_filter, read_matching, search_all, DEFAULT_MAX_OUTSTANDING
+
+# Groups nested deeper than this many levels below a configured group are reported
+DEFAULT_MAX_GROUP_DEPTH = 5
+
+# The walk stops at this depth, deeper groups are not expanded
+_DEPTH_LIMIT = 32
+
+# Active Directory matching rule that follows nested membership on the server
+LDAP_MATCHING_RULE_IN_CHAIN = "1.2.840.113556.1.4.1941"
+
+AD_LDAP_TYPE = "Microsoft Active Directory"
+
+# "member;range=1500-2999" or "member;range=3000-*" in an Active Directory answer
+_RANGE_OPTION = re.compile(r";range=(\d+)-(\d+|\*)$", re.IGNORECASE)
+
+
+# Returns the attributes holding the members of a group, taken from LDAP_GROUP_MEMBERSHIP_ID_MAP
+# ("groupofnames:member"). uniqueMember is added when the group filter also matches groupOfUniqueNames.
+def membership_attributes(group_member_id_map, group_filter) -> list:
+    attributes = []
+    for mapping in re.split(r"[;,]", group_member_id_map or ""):
+        attribute = mapping.split(":")[-1].strip()
+        if attribute and attribute.lower() not in [known.lower() for known in attributes]:
+            attributes.append(attribute)
+    if not attributes:
+        attributes.append("member")
+    if "groupofuniquenames" in group_filter.lower() and "uniquemember" not in [known.lower() for known in attributes]:
+        attributes.append("uniqueMember")
+    return attributes
+
+
+# uniqueMember values may end with an optional "#'0101'B" unique identifier
+def _member_dn(value) -> str:
+    value = value.decode("utf-8", "replace") if isinstance(value, bytes) else str(value)
+    return value.split("#'")[0] if "#'" in value else value
+
+
+def _read_raw(conn, dn, attributes) -> dict:
+    handle = conn.search(search_base=dn, search_filter="(objectClass=*)", search_scope=BASE, attributes=attributes)
+    response = conn.response if conn.strategy.sync else conn.get_response(handle)[0]
+    for entry in response or []:
+        if entry.get("type") == "searchResEntry":
+            return entry.get("raw_attributes", {})
+    return {}
+
+
+# Yields the member DNs of a group one page at a time.
+# Active Directory hands out large groups in ranges of 1500 values, which are fetched one after the other;
+# other servers return all values of the attribute at once.
+def member_pages(conn, group_dn, attribute, ranged=False):
+    if not ranged:
+        for key, values in _read_raw(conn, group_dn, [attribute]).items():
+            if key.split(";")[0].lower() == attribute.lower():
+                yield [_member_dn(value) for value in values]
+        return
+
+    start = 0
+    while True:
+        raw = _read_raw(conn, group_dn, [f"{attribute};range={start}-*"])
+        page, end = [], "*"
+        for key, values in raw.items():
+            if key.split(";")[0].lower() != attribute.lower():
+                continue
+            page = [_member_dn(value) for value in values]
+            match = _RANGE_OPTION.search(key)
+            end = match.group(2) if match else "*"
+        yield page
+        if end == "*" or not page:
+            return
+        start = int(end) + 1
+
+
+# Returns the names of the users found with user_filter that are nested members of the group,
+# resolved by Active Directory with LDAP_MATCHING_RULE_IN_CHAIN
+def in_chain_members(conn, base_dn, user_filter, group_dn, names, max_outstanding=DEFAULT_MAX_OUTSTANDING) -> set:
+    chain = f"(memberOf:{LDAP_MATCHING_RULE_IN_CHAIN}:={escape_filter_chars(group_dn)})"
+    results = search_all(conn, base_dn,
+                         [(name, f"(&{user_filter.replace('%v', escape_filter_chars(name))}{chain})") for name in names],
+                         [NO_ATTRIBUTES], max_outstanding)
+    return {name for name, entries in results.items() if entries}
+
+
+# Shape of the nested membership of one group
+class GroupWalk:
+    def __init__(self, group, dn):
+        self.group = group
+        self.dn = dn
+        # Deepest level a nested group was found at, 0 = no nested groups
+        self.depth = 0
+        self.nested_groups = 0
+        # Members that are not groups, counted once per group they are a member of
+        self.members = 0
+        # Most direct members of a single group of the tree
+        self.max_fan_out = 0
+        # Members pointing back to a group that was already expanded
+        self.revisits = 0
+        # The walk stopped at the depth limit
+        self.truncated = False
+        # Target name -> level of the group it was found in
+        self.found = {}
+        self.duration_s = 0.0
+        self.error = None
+
+    def to_dict(self):
+        return {"dn": self.dn,
+                "depth": self.depth,
+                "nested_groups": self.nested_groups,
+                "members": self.members,
+                "max_fan_out": self.max_fan_out,
+                "revisits": self.revisits,
+                "truncated": self.truncated,
+                "duration_s": self.duration_s,
+                "error": self.error}
+
+
+# Expands the nested membership of groups level by level.
+# Members are streamed page by page and only the DNs of the groups already expanded are kept,
+# so memory grows with the number of nested groups, not with the number of members.
+class GroupWalker:
+    def __init__(self, conn, group_filter, attributes, ranged=False, max_outstanding=DEFAULT_MAX_OUTSTANDING,
+                 depth_limit=_DEPTH_LIMIT):
+        self._conn = conn
+        # Base searches with this filter tell the groups apart from the other members
+        self._group_filter = dump_filter(group_filter)
+        self._attributes = attributes
+        self._ranged = ranged
+        self._max_outstanding = max_outstanding
+        self._depth_limit = depth_limit
+
+    # targets is {lowercase DN: name} of the users whose membership is verified
+    def walk(self, group, group_dn, targets=None) -> GroupWalk:
+        start = time.monotonic()
+        walk = GroupWalk(group, group_dn)
+        targets = targets or {}
+        visited = {group_dn.lower()}
+        level = [group_dn]
+        depth = 0
+
+        while level:
+            next_level = []
+            for dn in level:
+                fan_out = 0
+                for attribute in self._attributes:
+                    for page in member_pages(self._conn, dn, attribute, self._ranged):
+                        fan_out += len(page)
+                        candidates = []
+                        for member in page:
+                            key = member.lower()
+                            if key in targets:
+                                walk.found.setdefault(targets[key], depth)
+                                walk.members += 1
+                            elif key in visited:
+                                walk.revisits += 1
+                            else:
+                                candidates.append(member)
+
+                        groups = read_matching(self._conn, candidates, self._group_filter, self._max_outstanding)
+                        for member in candidates:
+                            if member.lower() in groups:
+                                visited.add(member.lower())
+                                next_level.append(member)
+                            else:
+                                walk.members += 1
+                walk.max_fan_out = max(walk.max_fan_out, fan_out)
+
+            if next_level:
+                if depth + 1 > self._depth_limit:
+                    walk.truncated = True
+                    break
+                depth += 1
+                walk.depth = depth
+            level = next_level
+
+        walk.nested_groups = len(visited) - 1
+        walk.duration_s = time.monotonic() - start
+        return walk
+
+
+def group_walk_table(walks: dict, max_depth=DEFAULT_MAX_GROUP_DEPTH) -> Table:
+    table = Table(title="LDAP Group Nesting")
+
+    table.add_column("Group", justify="left", style="cyan", no_wrap=True)
+    table.add_column("LDAP", justify="left")
+    table.add_column("Depth", justify="right")
+    table.add_column("Nested groups", justify="right")
+    table.add_column("Members", justify="right")
+    table.add_column("Max fan-out", justify="right")
+    table.add_column("Time (ms)", justify="right", style="magenta")
+    table.add_column("Result", justify="left")
+
+    for (ldap_id, group), walk in sorted(walks.items()):
+        if walk.error:
+            status = f"[bold red]{walk.error}"
+        elif walk.truncated:
+            status = f"[bold red]Nested deeper than {_DEPTH_LIMIT} levels"
+        elif walk.depth > max_depth:
+            status = f"[bold red]Nested deeper than {max_depth} levels"
+        elif walk.revisits:
+            status = f"[bold yellow]{walk.revisits} circular or repeated memberships"
+        else:
+            status = "[bold green]OK"
+        table.add_row(group, ldap_id, str(walk.depth), str(walk.nested_groups), str(walk.members),
+                      str(walk.max_fan_out), "{:.2f}".format(walk.duration_s * 1000), status)
+    return table
+
+
+# memberships is {role: {user: {group: depth}}}, an empty dict means the user is in no group of the role.
+# The depth is None when only Active Directory could tell the user is a member.
+def membership_table(memberships: dict) -> Table:
+    table = Table(title="Admin Group Membership")
+
+    table.add_column("Role", justify="left", style="cyan", no_wrap=True)
+    table.add_column("User", justify="left")
+    table.add_column("Effective member of", justify="left")
+
+    for role, users in sorted(memberships.items()):
+        for user, groups in sorted(users.items()):
+            if groups:
+                member_of = ", ".join(group if depth is None else
+                                      f"{group} (direct)" if depth == 0 else f"{group} (nested, depth {depth})"
+                                      for group, depth in sorted(groups.items()))
+                table.add_row(role, user, f"[bold green]{member_of}")
+            else:
+                table.add_row(role, user, "[bold red]Not a member of any admin group of the role")
+    return table
@@ -0,0 +1,146 @@
+###############################################################################
+#
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp. 2023. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+###############################################################################
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from rich.table import Table
+
+from helper_scripts.validate.latency import LatencyStats
+
+# Default number of requests in flight and seconds the load runs for
+DEFAULT_IDP_BENCHMARK_CONCURRENCY = 8
+DEFAULT_IDP_BENCHMARK_DURATION = 10
+
+
+# One session per IDP or SCIM server, its connection pool holds a keep-alive connection per concurrent request
+# so token grants and SCIM queries do not pay for a TCP and TLS handshake each
+def create_session(pool_size=DEFAULT_IDP_BENCHMARK_CONCURRENCY) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    # Same as before: the IDP certificate is not verified
+    session.verify = False
+    return session
+
+
+# Client credentials grant, returns the access token. Raises requests.RequestException when the grant fails.
+def fetch_token(session, token_endpoint, client_id, client_secret, timeout) -> str:
+    response = session.post(token_endpoint,
+                            data={"grant_type": "client_credentials",
+                                  "client_id": client_id,
+                                  "client_secret": client_secret},
+                            headers={"Content-Type": "application/x-www-form-urlencoded"},
+                            timeout=timeout)
+    response.raise_for_status()
+    try:
+        token = response.json().get("access_token")
+    except ValueError:
+        token = None
+    if not token:
+        raise requests.RequestException(f"No access_token in the answer of {token_endpoint}")
+    return token
+
+
+# SCIM list query asking for a single resource, raises requests.RequestException when it fails
+def scim_query(session, url, token, timeout):
+    response = session.get(url, params={"count": 1},
+                           headers={"Authorization": f"Bearer {token}", "Accept": "application/scim+json"},
+                           timeout=timeout)
+    response.raise_for_status()
+    return response
+
+
+# Latencies and errors of one kind of request during the load
+class OperationStats:
+    def __init__(self, name):
+        self.name = name
+        self.samples_ns = []
+        self.errors = 0
+        self.last_error = None
+        self.duration_s = 0.0
+
+    @property
+    def latency(self) -> LatencyStats:
+        return LatencyStats(self.samples_ns)
+
+    # Successful requests per second
+    @property
+    def throughput(self) -> float:
+        return len(self.samples_ns) / self.duration_s if self.duration_s else 0.0
+
+    def to_dict(self):
+        latency = self.latency
+        return {"requests": len(self.samples_ns),
+                "errors": self.errors,
+                "requests_per_second": self.throughput,
+                "p50_ms": latency.p50,
+                "p95_ms": latency.p95,
+                "p99_ms": latency.p99,
+                "last_error": self.last_error}
+
+
+# Runs the operations round robin from concurrency threads for duration seconds.
+# operations is {name: callable}, returns {name: OperationStats}.
+def run_load(operations: dict, concurrency=DEFAULT_IDP_BENCHMARK_CONCURRENCY,
+             duration=DEFAULT_IDP_BENCHMARK_DURATION) -> dict:
+    stats = {name: OperationStats(name) for name in operations}
+    lock = threading.Lock()
+    names = list(operations)
+    start = time.monotonic()
+    deadline = start + duration
+
+    def worker(offset):
+        index = offset
+        while time.monotonic() < deadline:
+            name = names[index % len(names)]
+            index += 1
+            start_time = time.perf_counter_ns()
+            try:
+                operations[name]()
+                elapsed = time.perf_counter_ns() - start_time
+                with lock:
+                    stats[name].samples_ns.append(elapsed)
+            except requests.RequestException as e:
+                with lock:
+                    stats[name].errors += 1
+                    stats[name].last_error = str(e)
+
+    if names:
+        with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="idp-load") as executor:
+            for offset in range(max(1, concurrency)):
+                executor.submit(worker, offset)
+    elapsed_s = time.monotonic() - start
+    for operation in stats.values():
+        operation.duration_s = elapsed_s
+    return stats
+
+
+def load_table(title, stats: dict) -> Table:
+    table = Table(title=title)
+
+    table.add_column("Request", justify="left", style="cyan", no_wrap=True)
+    table.add_column("Requests/s", justify="right", style="magenta")
+    table.add_column("p50 (ms)", justify="right")
+    table.add_column("p95 (ms)", justify="right")
+    table.add_column("p99 (ms)", justify="right")
+    table.add_column("Errors", justify="right")
+
+    for name, operation in stats.items():
+        latency = operation.latency
+        table.add_row(name, "{:.1f}".format(operation.throughput), "{:.2f}".format(latency.p50),
+                      "{:.2f}".format(latency.p95), "{:.2f}".format(latency.p99), str(operation.errors),
+                      style="bold red" if operation.errors and not operation.samples_ns else None)
+    return table
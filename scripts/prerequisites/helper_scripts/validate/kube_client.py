@@ -0,0 +1,597 @@
+###############################################################################
+#
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp. 2023. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+###############################################################################
+
+import base64
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import yaml
+from requests.adapters import HTTPAdapter
+
+from helper_scripts.utilities.tracing import span
+
+# Field manager recorded on the objects applied by this tool
+FIELD_MANAGER = "fncm-prerequisites"
+
+# Seconds to wait for a single API call, watches are not limited
+REQUEST_TIMEOUT = 30
+
+# Hash of the generated content an object was last applied from
+CONTENT_HASH_ANNOTATION = "prerequisites.fncm.ibm.com/content-hash"
+
+# Connections kept open to the API server
+_POOL_SIZE = 10
+
+_SERVICE_ACCOUNT_DIR = "/var/run/secrets/kubernetes.io/serviceaccount"
+
+
+class KubeError(Exception):
+    pass
+
+
+# Splits "group/version" into its parts, the core group is ""
+def _split_api_version(api_version):
+    if "/" in api_version:
+        return tuple(api_version.split("/", 1))
+    return "", api_version
+
+
+# "secret/name" or "kind.group/name", the way kubectl refers to an object
+def _reference(document):
+    group, _ = _split_api_version(document.get("apiVersion", ""))
+    kind = document.get("kind", "").lower() + (f".{group}" if group else "")
+    return f"{kind}/{document.get('metadata', {}).get('name')}"
+
+
+# Outcome of applying one object of a bulk apply
+class ApplyResult:
+    def __init__(self, reference, applied, message, action=None):
+        self.reference = reference
+        self.applied = applied
+        self.message = message
+        # "created", "updated", "skipped" or "failed" when the live objects were compared first
+        self.action = action
+
+    def to_dict(self):
+        return {"object": self.reference,
+                "applied": self.applied,
+                "action": self.action,
+                "message": self.message}
+
+
+# SHA-256 of the document as it would be applied, leaving out the fields the server owns and the hash itself
+def content_hash(document) -> str:
+    content = json.loads(json.dumps(document, default=str))
+    content.pop("status", None)
+    metadata = content.get("metadata", {})
+    for field in ["resourceVersion", "uid", "generation", "creationTimestamp", "managedFields"]:
+        metadata.pop(field, None)
+    annotations = metadata.get("annotations") or {}
+    annotations.pop(CONTENT_HASH_ANNOTATION, None)
+    if not annotations:
+        metadata.pop("annotations", None)
+    return hashlib.sha256(json.dumps(content, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+# Stamps each document with its content hash and applies only those whose live hash differs.
+# The live hashes are read with one list call per kind and namespace. Returns an ApplyResult per document.
+def apply_changed(kube, documents) -> list:
+    live_hashes = {}
+    for document in documents:
+        metadata = document.setdefault("metadata", {})
+        metadata.setdefault("annotations", {})[CONTENT_HASH_ANNOTATION] = content_hash(document)
+        scope = (document.get("apiVersion"), document.get("kind"), metadata.get("namespace"))
+        if scope not in live_hashes:
+            try:
+                live_hashes[scope] = kube.list_annotations(*scope, annotation=CONTENT_HASH_ANNOTATION)
+            except KubeError:
+                # Unknown kinds fail again in the apply and are reported there
+                live_hashes[scope] = {}
+
+    results = {}
+    changed = []
+    for index, document in enumerate(documents):
+        metadata = document["metadata"]
+        live = live_hashes[(document.get("apiVersion"), document.get("kind"), metadata.get("namespace"))]
+        if live.get(metadata.get("name")) == metadata["annotations"][CONTENT_HASH_ANNOTATION]:
+            results[index] = ApplyResult(_reference(document), True, f"{_reference(document)} unchanged", "skipped")
+        else:
+            changed.append(index)
+
+    for index, result in zip(changed, kube.apply_all([documents[index] for index in changed])):
+        metadata = documents[index]["metadata"]
+        existed = metadata.get("name") in live_hashes[(documents[index].get("apiVersion"),
+                                                       documents[index].get("kind"), metadata.get("namespace"))]
+        result.action = ("updated" if existed else "created") if result.applied else "failed"
+        results[index] = result
+    return [results[index] for index in range(len(documents))]
+
+
+# Connection details of the current context, read once from the kubeconfig or the pod service account
+class KubeConfig:
+    def __init__(self, server, namespace="default", token=None, username=None, password=None,
+                 ca_file=None, ca_data=None, cert_file=None, cert_data=None, key_file=None, key_data=None,
+                 insecure=False):
+        self.server = server.rstrip("/")
+        self.namespace = namespace
+        self.token = token
+        self.username = username
+        self.password = password
+        self.ca_file = ca_file
+        self.ca_data = ca_data
+        self.cert_file = cert_file
+        self.cert_data = cert_data
+        self.key_file = key_file
+        self.key_data = key_data
+        self.insecure = insecure
+
+
+def _kubeconfig_paths():
+    if os.environ.get("KUBECONFIG"):
+        return [path for path in os.environ["KUBECONFIG"].split(os.pathsep) if path]
+    return [os.path.join(os.path.expanduser("~"), ".kube", "config")]
+
+
+# Merges the kubeconfig files the same way kubectl does, the first file to set a value wins
+def _merged_kubeconfig():
+    merged = {"current-context": None, "clusters": {}, "contexts": {}, "users": {}}
+    for path in _kubeconfig_paths():
+        if not os.path.isfile(path):
+            continue
+        with open(path, encoding="UTF-8") as config_file:
+            config = yaml.safe_load(config_file) or {}
+        base_dir = os.path.dirname(os.path.abspath(path))
+        merged["current-context"] = merged["current-context"] or config.get("current-context")
+        for section, key in [("clusters", "cluster"), ("contexts", "context"), ("users", "user")]:
+            for entry in config.get(section) or []:
+                values = dict(entry.get(key) or {})
+                # Relative file references are relative to the kubeconfig they are in
+                for field in ["certificate-authority", "client-certificate", "client-key", "tokenFile"]:
+                    if values.get(field) and not os.path.isabs(values[field]):
+                        values[field] = os.path.join(base_dir, values[field])
+                merged[section].setdefault(entry.get("name"), values)
+    return merged
+
+
+# Returns the KubeConfig of the current context, None when there is no usable configuration.
+# Authentication through exec or auth-provider plugins is left to kubectl.
+def load_kubeconfig(logger):
+    try:
+        merged = _merged_kubeconfig()
+    except (OSError, yaml.YAMLError) as e:
+        logger.info(f"Unable to read kubeconfig: {str(e)}")
+        return None
+
+    context = merged["contexts"].get(merged["current-context"])
+    if context is None:
+        return _in_cluster_config(logger)
+
+    cluster = merged["clusters"].get(context.get("cluster"))
+    user = merged["users"].get(context.get("user"), {})
+    if not cluster or not cluster.get("server"):
+        logger.info(f"Kubeconfig context {merged['current-context']} has no cluster server")
+        return None
+    if user.get("exec") or user.get("auth-provider"):
+        logger.info(f"Kubeconfig user {context.get('user')} uses an authentication plugin, using kubectl")
+        return None
+
+    token = user.get("token")
+    if not token and user.get("tokenFile"):
+        with open(user["tokenFile"], encoding="UTF-8") as token_file:
+            token = token_file.read().strip()
+
+    return KubeConfig(server=cluster["server"],
+                      namespace=context.get("namespace") or "default",
+                      token=token,
+                      username=user.get("username"),
+                      password=user.get("password"),
+                      ca_file=cluster.get("certificate-authority"),
+                      ca_data=cluster.get("certificate-authority-data"),
+                      cert_file=user.get("client-certificate"),
+                      cert_data=user.get("client-certificate-data"),
+                      key_file=user.get("client-key"),
+                      key_data=user.get("client-key-data"),
+                      insecure=bool(cluster.get("insecure-skip-tls-verify")))
+
+
+# Configuration of the service account when running inside a pod, e.g. the operator pod
+def _in_cluster_config(logger):
+    host = os.environ.get("KUBERNETES_SERVICE_HOST")
+    port = os.environ.get("KUBERNETES_SERVICE_PORT", "443")
+    token_path = os.path.join(_SERVICE_ACCOUNT_DIR, "token")
+    if not host or not os.path.isfile(token_path):
+        return None
+
+    with open(token_path, encoding="UTF-8") as token_file:
+        token = token_file.read().strip()
+    namespace = "default"
+    namespace_path = os.path.join(_SERVICE_ACCOUNT_DIR, "namespace")
+    if os.path.isfile(namespace_path):
+        with open(namespace_path, encoding="UTF-8") as namespace_file:
+            namespace = namespace_file.read().strip()
+
+    if ":" in host:
+        host = f"[{host}]"
+    logger.info("Using the in-cluster service account to connect to the API server")
+    return KubeConfig(server=f"https://{host}:{port}", namespace=namespace, token=token,
+                      ca_file=os.path.join(_SERVICE_ACCOUNT_DIR, "ca.crt"))
+
+
+# Events of a watch as (type, object) pairs, close() ends the iteration from another thread
+class KubeWatch:
+    def __init__(self, events, close):
+        self._events = events
+        self._close = close
+        self._closed = False
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def __iter__(self):
+        try:
+            for event in self._events:
+                yield event
+        except Exception as e:
+            # The stream is torn down by close() or by the server
+            if not self._closed:
+                raise KubeError(f"Watch failed: {str(e)}")
+        finally:
+            self._closed = True
+
+    def close(self):
+        self._closed = True
+        self._close()
+
+
+# Talks to the API server directly, keeping the TLS connections open between calls
+class KubeClient:
+    def __init__(self, logger, config: KubeConfig):
+        self._logger = logger
+        self._config = config
+        self._tmp_dir = tempfile.mkdtemp(prefix="fncm-kube-")
+        self._resources = {}
+        self._resources_lock = threading.Lock()
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=_POOL_SIZE)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._session.headers["Accept"] = "application/json"
+
+        if config.insecure:
+            self._session.verify = False
+        elif config.ca_data:
+            self._session.verify = self.__data_file("ca.crt", config.ca_data)
+        elif config.ca_file:
+            self._session.verify = config.ca_file
+
+        cert_file = self.__data_file("client.crt", config.cert_data) if config.cert_data else config.cert_file
+        key_file = self.__data_file("client.key", config.key_data) if config.key_data else config.key_file
+        if cert_file and key_file:
+            self._session.cert = (cert_file, key_file)
+
+        if config.token:
+            self._session.headers["Authorization"] = f"Bearer {config.token}"
+        elif config.username and config.password:
+            self._session.auth = (config.username, config.password)
+
+    @property
+    def namespace(self) -> str:
+        return self._config.namespace
+
+    # requests needs certificates and keys as files
+    def __data_file(self, name, data):
+        path = os.path.join(self._tmp_dir, name)
+        with open(path, "wb") as data_file:
+            data_file.write(base64.b64decode(data))
+        os.chmod(path, 0o600)
+        return path
+
+    def __request(self, method, path, expected=(200,), **kwargs):
+        kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+        try:
+            with span(f"{method} {path}", "kube"):
+                response = self._session.request(method, self._config.server + path, **kwargs)
+        except requests.RequestException as e:
+            raise KubeError(f"{method} {path} failed: {str(e)}")
+        if response.status_code not in expected:
+            try:
+                message = response.json().get("message", response.text)
+            except ValueError:
+                message = response.text
+            raise KubeError(f"{method} {path} returned {response.status_code}: {message}")
+        return response
+
+    # Finds the plural name of the kind and whether it is namespaced from the API discovery document
+    def __resource(self, api_version, kind):
+        with self._resources_lock:
+            if api_version not in self._resources:
+                group, _ = _split_api_version(api_version)
+                path = f"/apis/{api_version}" if group else f"/api/{api_version}"
+                discovery = self.__request("GET", path).json()
+                self._resources[api_version] = {resource["kind"]: resource
+                                                for resource in discovery.get("resources", [])
+                                                if "/" not in resource["name"]}
+            resource = self._resources[api_version].get(kind)
+        if resource is None:
+            raise KubeError(f"The server does not serve {kind} in {api_version}")
+        return resource
+
+    def __path(self, api_version, kind, namespace=None, name=None):
+        resource = self.__resource(api_version, kind)
+        group, _ = _split_api_version(api_version)
+        path = f"/apis/{api_version}" if group else f"/api/{api_version}"
+        if resource.get("namespaced"):
+            path += f"/namespaces/{namespace or self.namespace}"
+        path += f"/{resource['name']}"
+        if name:
+            path += f"/{name}"
+        return path
+
+    # Same check as "kubectl get pods", the current context must be able to read the namespace
+    def is_logged_in(self) -> bool:
+        try:
+            self.__request("GET", f"/api/v1/namespaces/{self.namespace}/pods", params={"limit": 1})
+            return True
+        except KubeError as e:
+            self._logger.info(f"Unable to reach the Kubernetes API server: {str(e)}")
+            return False
+
+    # Returns one object, or a List when no name is passed
+    def get(self, api_version, kind, name=None, namespace=None, label_selector=None) -> dict:
+        params = {"labelSelector": label_selector} if label_selector and not name else None
+        return self.__request("GET", self.__path(api_version, kind, namespace, name), params=params).json()
+
+    def list_names(self, api_version, kind, namespace=None, label_selector=None) -> list:
+        items = self.get(api_version, kind, namespace=namespace, label_selector=label_selector).get("items", [])
+        return [item["metadata"]["name"] for item in items]
+
+    # Returns {name: value of the annotation, "" if not set} for every object of the kind.
+    # Only the metadata is transferred, not the secret data or the CR spec.
+    def list_annotations(self, api_version, kind, namespace=None, annotation=None) -> dict:
+        items = self.__request("GET", self.__path(api_version, kind, namespace),
+                               headers={"Accept": "application/json;as=PartialObjectMetadataList;g=meta.k8s.io;v=v1,"
+                                                  "application/json"}).json().get("items", [])
+        return {item["metadata"]["name"]: (item["metadata"].get("annotations") or {}).get(annotation, "")
+                for item in items}
+
+    # Server side apply of every document in the manifest, returns kubectl style output
+    def apply_manifest(self, manifest) -> str:
+        output = []
+        for document in yaml.safe_load_all(manifest):
+            if document:
+                output.append(self.apply(document))
+        return "\n".join(output)
+
+    def apply(self, document: dict) -> str:
+        metadata = document.setdefault("metadata", {})
+        # A stale resourceVersion would turn the apply into a failing precondition
+        metadata.pop("resourceVersion", None)
+        path = self.__path(document["apiVersion"], document["kind"], metadata.get("namespace"), metadata["name"])
+        response = self.__request("PATCH", path, expected=(200, 201),
+                                  params={"fieldManager": FIELD_MANAGER, "force": "true"},
+                                  headers={"Content-Type": "application/apply-patch+yaml"},
+                                  data=json.dumps(document))
+        return f"{_reference(document)} {'created' if response.status_code == 201 else 'configured'}"
+
+    # Applies the documents concurrently over the pooled connections, returns an ApplyResult per document.
+    # Objects that failed are applied again one at a time once the rest of the batch is in.
+    def apply_all(self, documents) -> list:
+        def try_apply(document):
+            try:
+                return ApplyResult(_reference(document), True, self.apply(document))
+            except (KubeError, KeyError) as e:
+                return ApplyResult(_reference(document), False, str(e))
+
+        with ThreadPoolExecutor(max_workers=_POOL_SIZE) as executor:
+            results = list(executor.map(try_apply, documents))
+        return [result if result.applied else try_apply(document) for document, result in zip(documents, results)]
+
+    # Deletes without waiting for finalizers, objects that do not exist are ignored
+    def delete(self, api_version, kind, names, namespace=None) -> str:
+        group, _ = _split_api_version(api_version)
+        output = []
+        for name in names:
+            response = self.__request("DELETE", self.__path(api_version, kind, namespace, name), expected=(200, 202, 404),
+                                      json={"propagationPolicy": "Background"})
+            if response.status_code != 404:
+                output.append(f"{kind.lower()}{f'.{group}' if group else ''} \"{name}\" deleted")
+        return "\n".join(output)
+
+    # Lists the current objects as ADDED events, then streams the changes after that list
+    def watch(self, api_version, kind, namespace=None, label_selector=None) -> KubeWatch:
+        path = self.__path(api_version, kind, namespace)
+        params = {"labelSelector": label_selector} if label_selector else {}
+        initial = self.__request("GET", path, params=params).json()
+        response = self.__request("GET", path, stream=True, timeout=(REQUEST_TIMEOUT, None),
+                                  params=dict(params, watch="true",
+                                              resourceVersion=initial.get("metadata", {}).get("resourceVersion", "")))
+
+        def events():
+            with response:
+                for item in initial.get("items", []):
+                    yield "ADDED", item
+                for line in response.iter_lines():
+                    if line:
+                        event = json.loads(line)
+                        yield event.get("type"), event.get("object", {})
+
+        return KubeWatch(events(), response.close)
+
+    def close(self):
+        self._session.close()
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
+
+
+# Same operations as KubeClient, carried out by the kubectl command line
+class KubectlBackend:
+    def __init__(self, logger):
+        self._logger = logger
+
+    @property
+    def namespace(self):
+        return None
+
+    @staticmethod
+    def __resource(api_version, kind):
+        group, version = _split_api_version(api_version)
+        return f"{kind.lower()}.{version}.{group}" if group else kind.lower()
+
+    def __kubectl(self, args, manifest=None) -> str:
+        process = self.__run(args, manifest)
+        if process.returncode != 0:
+            raise KubeError(f"kubectl {' '.join(args)} failed: {str(process.stderr).strip()}")
+        return process.stdout
+
+    @staticmethod
+    def __run(args, manifest=None):
+        try:
+            with span(f"kubectl {' '.join(args[:2])}", "kube", args=" ".join(args)):
+                return subprocess.run(["kubectl"] + args, input=manifest,
+                                      stdin=None if manifest is not None else subprocess.DEVNULL,
+                                      stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+        except OSError as e:
+            raise KubeError(f"Unable to run kubectl: {str(e)}")
+
+    @staticmethod
+    def __scope(namespace, label_selector=None):
+        args = ["-n", namespace] if namespace else []
+        return args + (["-l", label_selector] if label_selector else [])
+
+    # Asks the API server for a single access review instead of listing the pods
+    def is_logged_in(self) -> bool:
+        try:
+            self.__kubectl(["auth", "can-i", "list", "pods"])
+            return True
+        except KubeError as e:
+            self._logger.info(str(e))
+            return False
+
+    def get(self, api_version, kind, name=None, namespace=None, label_selector=None) -> dict:
+        args = ["get", self.__resource(api_version, kind)] + ([name] if name else [])
+        output = self.__kubectl(args + self.__scope(namespace, None if name else label_selector) + ["-o", "json"])
+        try:
+            return json.loads(output)
+        except ValueError as e:
+            raise KubeError(f"Unexpected output of kubectl {' '.join(args)}: {str(e)}")
+
+    def list_names(self, api_version, kind, namespace=None, label_selector=None) -> list:
+        items = self.get(api_version, kind, namespace=namespace, label_selector=label_selector).get("items", [])
+        return [item["metadata"]["name"] for item in items]
+
+    def list_annotations(self, api_version, kind, namespace=None, annotation=None) -> dict:
+        items = self.get(api_version, kind, namespace=namespace).get("items", [])
+        return {item["metadata"]["name"]: (item["metadata"].get("annotations") or {}).get(annotation, "")
+                for item in items}
+
+    def apply_manifest(self, manifest) -> str:
+        try:
+            return self.__kubectl(["apply", "-f", "-"], manifest)
+        except KubeError as e:
+            if "metadata.resourceVersion" not in str(e):
+                raise
+            return self.__kubectl(["replace", "-f", "-"], manifest)
+
+    def apply(self, document: dict) -> str:
+        return self.apply_manifest(yaml.safe_dump(document))
+
+    # Server side applies all documents with one kubectl process, kubectl carries on past objects that fail.
+    # Only the objects missing from its output are applied again one by one.
+    def apply_all(self, documents) -> list:
+        for document in documents:
+            document.get("metadata", {}).pop("resourceVersion", None)
+        process = self.__run(["apply", "--server-side", "--force-conflicts", f"--field-manager={FIELD_MANAGER}",
+                              "-f", "-"], yaml.safe_dump_all(documents))
+
+        applied = {}
+        for line in process.stdout.splitlines():
+            if " " in line.strip():
+                reference, _ = line.strip().split(" ", 1)
+                applied[reference] = line.strip()
+
+        results = []
+        for document in documents:
+            reference = _reference(document)
+            if reference in applied:
+                results.append(ApplyResult(reference, True, applied[reference]))
+                continue
+            try:
+                results.append(ApplyResult(reference, True, self.apply(document).strip()))
+            except KubeError as e:
+                results.append(ApplyResult(reference, False, str(e)))
+        return results
+
+    def delete(self, api_version, kind, names, namespace=None) -> str:
+        return self.__kubectl(["delete", self.__resource(api_version, kind)] + list(names) + self.__scope(namespace)
+                              + ["--ignore-not-found", "--wait=false"])
+
+    # kubectl prints one pretty printed JSON document per event, they are not separated by blank lines
+    def watch(self, api_version, kind, namespace=None, label_selector=None) -> KubeWatch:
+        command = ["kubectl", "get", self.__resource(api_version, kind), "-w", "--output-watch-events", "-o", "json"]
+        try:
+            process = subprocess.Popen(command + self.__scope(namespace, label_selector), stdout=subprocess.PIPE,
+                                       stderr=subprocess.DEVNULL, stdin=subprocess.DEVNULL, universal_newlines=True)
+        except OSError as e:
+            raise KubeError(f"Unable to run kubectl: {str(e)}")
+
+        def events():
+            decoder = json.JSONDecoder()
+            buffer = ""
+            for line in iter(process.stdout.readline, ""):
+                buffer += line
+                while True:
+                    buffer = buffer.lstrip()
+                    try:
+                        document, end = decoder.raw_decode(buffer)
+                    except ValueError:
+                        break
+                    buffer = buffer[end:]
+                    yield document.get("type"), document.get("object", {})
+
+        def close():
+            if process.poll() is None:
+                process.terminate()
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+        return KubeWatch(events(), close)
+
+    def close(self):
+        pass
+
+
+# Returns the in-process client when the kubeconfig can be used directly, otherwise kubectl if it is installed.
+# kubectl is also used when it can reach the cluster and the in-process client cannot, e.g. behind a proxy.
+def create_kube_client(logger, kubectl_present):
+    config = load_kubeconfig(logger)
+    if config is not None:
+        client = KubeClient(logger, config)
+        if client.is_logged_in() or not kubectl_present:
+            return client
+        kubectl = KubectlBackend(logger)
+        if kubectl.is_logged_in():
+            client.close()
+            logger.info("Falling back to kubectl to talk to the cluster")
+            return kubectl
+        return client
+    if kubectl_present:
+        return KubectlBackend(logger)
+    return None
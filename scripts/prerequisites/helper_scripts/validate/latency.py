@@ -0,0 +1,79 @@
+###############################################################################
+#
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp. 2023. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+###############################################################################
+
+import math
+
+_NS_PER_MS = 1000000
+
+
+# Returns the pct percentile of the sorted samples, interpolating between the closest ranks
+def percentile(sorted_samples: list, pct: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    rank = (len(sorted_samples) - 1) * pct / 100
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    if lower == upper:
+        return float(sorted_samples[lower])
+    return sorted_samples[lower] + (sorted_samples[upper] - sorted_samples[lower]) * (rank - lower)
+
+
+# Summary of latency samples taken in nanoseconds, reported in milliseconds
+class LatencyStats:
+    def __init__(self, samples_ns: list):
+        self.samples_ns = list(samples_ns)
+
+    @classmethod
+    def from_ms(cls, samples_ms: list):
+        return cls([int(sample * _NS_PER_MS) for sample in samples_ms])
+
+    def __len__(self):
+        return len(self.samples_ns)
+
+    def __percentile_ms(self, pct) -> float:
+        return percentile(sorted(self.samples_ns), pct) / _NS_PER_MS
+
+    @property
+    def min(self) -> float:
+        return min(self.samples_ns) / _NS_PER_MS if self.samples_ns else 0.0
+
+    @property
+    def p50(self) -> float:
+        return self.__percentile_ms(50)
+
+    @property
+    def p95(self) -> float:
+        return self.__percentile_ms(95)
+
+    @property
+    def p99(self) -> float:
+        return self.__percentile_ms(99)
+
+    # Mean difference between consecutive samples, as used for interarrival jitter in RFC 3550
+    @property
+    def jitter(self) -> float:
+        if len(self.samples_ns) < 2:
+            return 0.0
+        differences = [abs(current - previous) for previous, current in zip(self.samples_ns, self.samples_ns[1:])]
+        return sum(differences) / len(differences) / _NS_PER_MS
+
+    def summary(self) -> str:
+        return "min {:.2f}ms, p50 {:.2f}ms, p95 {:.2f}ms, p99 {:.2f}ms, jitter {:.2f}ms ({} samples)".format(
+            self.min, self.p50, self.p95, self.p99, self.jitter, len(self))
+
+    def to_dict(self):
+        return {"samples": len(self),
+                "min_ms": self.min,
+                "p50_ms": self.p50,
+                "p95_ms": self.p95,
+                "p99_ms": self.p99,
+                "jitter_ms": self.jitter,
+                "samples_ms": [sample / _NS_PER_MS for sample in self.samples_ns]}
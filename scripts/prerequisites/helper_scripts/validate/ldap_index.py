@@ -0,0 +1,237 @@
+###############################################################################
+#
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp. 2023. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+###############################################################################
+
+import os
+import sqlite3
+import threading
+import time
+
+from ldap3 import BASE
+
+from helper_scripts.validate.ldap_search import naming_attributes, dump_filter, search_all
+
+# Default seconds after which the index is dumped again instead of refreshed
+DEFAULT_INDEX_MAX_AGE = 86400
+
+# Attributes that tell which entries changed since the last refresh, in order of preference.
+# uSNChanged is only used by Active Directory, modifyTimestamp by most other servers.
+CHANGE_ATTRIBUTES = ["uSNChanged", "modifyTimestamp"]
+
+# Root DSE attributes naming the domain controller a connection reached, Active Directory sets both
+_SERVER_IDENTITY_ATTRIBUTES = ["dsServiceName", "serverName"]
+
+# Names looked up with a single SELECT
+_LOOKUP_BATCH = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    ldap_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    dumped_at REAL NOT NULL,
+    refreshed_at REAL NOT NULL,
+    change_attribute TEXT,
+    high_water TEXT,
+    server_identity TEXT,
+    PRIMARY KEY (ldap_id, kind)
+);
+CREATE TABLE IF NOT EXISTS names (
+    ldap_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    dn TEXT NOT NULL,
+    attribute TEXT NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS names_by_value ON names (ldap_id, kind, value);
+CREATE INDEX IF NOT EXISTS names_by_dn ON names (ldap_id, kind, dn);
+"""
+
+
+def _raw_values(entry, attribute) -> list:
+    for key, values in entry.get("raw_attributes", {}).items():
+        if key.lower() == attribute.lower():
+            return [value.decode("utf-8", "replace") if isinstance(value, bytes) else str(value)
+                    for value in values]
+    return []
+
+
+# Returns the name of the domain controller behind the connection, None if the server does not tell.
+# uSNChanged is counted by each domain controller on its own, so a high water mark only holds on the
+# controller it was read from, while LDAP_SERVER is often a load-balanced name for several of them.
+def server_identity(conn):
+    handle = conn.search(search_base="", search_filter="(objectClass=*)", search_scope=BASE,
+                         attributes=_SERVER_IDENTITY_ATTRIBUTES)
+    response = conn.response if conn.strategy.sync else conn.get_response(handle)[0]
+    for entry in response or []:
+        if entry.get("type") != "searchResEntry":
+            continue
+        for attribute in _SERVER_IDENTITY_ATTRIBUTES:
+            values = _raw_values(entry, attribute)
+            if values:
+                return values[0].lower()
+    return None
+
+
+def _newer(change_attribute, value, high_water) -> bool:
+    if high_water is None:
+        return True
+    if change_attribute == "uSNChanged":
+        return int(value) > int(high_water)
+    return value > high_water
+
+
+# Outcome of bringing one subtree of the index up to date
+class IndexRefresh:
+    def __init__(self, mode, entries=0, change_attribute=None, duration_s=0.0, reason=None):
+        # "dump", "incremental" or "current"
+        self.mode = mode
+        self.entries = entries
+        self.change_attribute = change_attribute
+        self.duration_s = duration_s
+        # Why the subtree was dumped instead of refreshed
+        self.reason = reason
+
+    def to_dict(self):
+        return {"mode": self.mode,
+                "entries": self.entries,
+                "change_attribute": self.change_attribute,
+                "duration_s": self.duration_s,
+                "reason": self.reason}
+
+
+# Local SQLite copy of the naming attributes of every user and group of a directory.
+# Each (ldap_id, kind) subtree is dumped once with a paged search, then only refreshed with the entries
+# changed since, until it is older than max_age. Deleted entries are only dropped by the next full dump.
+# Subtrees tracked with uSNChanged are dumped again when the connection reaches another domain controller.
+class LdapIndex:
+    _INDEX_FILE = os.path.join(os.getcwd(), "helper_scripts", "validate", "cache", "ldap_index.sqlite")
+
+    def __init__(self, logger, max_age=DEFAULT_INDEX_MAX_AGE, index_file=None):
+        self._logger = logger
+        self._max_age = max_age
+        self._index_file = index_file if index_file else self._INDEX_FILE
+        os.makedirs(os.path.dirname(self._index_file), exist_ok=True)
+        # Searches of different LDAPs run in different threads, every statement holds the lock
+        self._db = sqlite3.connect(self._index_file, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        if "server_identity" not in [column[1] for column in self._db.execute("PRAGMA table_info(snapshots)")]:
+            # Snapshots written before the column existed are dumped again on their next refresh
+            self._db.execute("ALTER TABLE snapshots ADD COLUMN server_identity TEXT")
+        self._lock = threading.Lock()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __snapshot(self, ldap_id, kind):
+        with self._lock:
+            return self._db.execute("SELECT fingerprint, dumped_at, change_attribute, high_water, server_identity "
+                                    "FROM snapshots WHERE ldap_id = ? AND kind = ?", (ldap_id, kind)).fetchone()
+
+    # Replaces the names of every entry and returns the change attribute and its highest value seen
+    def __store(self, ldap_id, kind, entries, attributes, replace_all, change_attribute=None, high_water=None):
+        rows = []
+        dns = []
+        for entry in entries:
+            dn = str(entry.get("dn", "")).lower()
+            dns.append((ldap_id, kind, dn))
+            for attribute in attributes:
+                rows.extend((ldap_id, kind, dn, attribute.lower(), value.lower())
+                            for value in _raw_values(entry, attribute))
+            if change_attribute is None:
+                change_attribute = next((attribute for attribute in CHANGE_ATTRIBUTES
+                                         if _raw_values(entry, attribute)), None)
+            for value in _raw_values(entry, change_attribute) if change_attribute else []:
+                if _newer(change_attribute, value, high_water):
+                    high_water = value
+
+        with self._lock, self._db:
+            if replace_all:
+                self._db.execute("DELETE FROM names WHERE ldap_id = ? AND kind = ?", (ldap_id, kind))
+            else:
+                self._db.executemany("DELETE FROM names WHERE ldap_id = ? AND kind = ? AND dn = ?", dns)
+            self._db.executemany("INSERT INTO names (ldap_id, kind, dn, attribute, value) VALUES (?, ?, ?, ?, ?)",
+                                 rows)
+        return change_attribute, high_water
+
+    # Brings the (ldap_id, kind) subtree up to date: a full paged dump when there is none yet, it is older
+    # than max_age, the base DN, filter or server changed or the connection reached another domain controller,
+    # otherwise only the entries changed since.
+    def refresh(self, conn, ldap_id, kind, base_dn, name_filter, fingerprint) -> IndexRefresh:
+        start = time.monotonic()
+        attributes = naming_attributes(name_filter)
+        search_filter = dump_filter(name_filter)
+        snapshot = self.__snapshot(ldap_id, kind)
+        now = time.time()
+
+        if not snapshot:
+            reason = "no index yet"
+        elif snapshot[0] != fingerprint:
+            reason = "server, base DN or filter changed"
+        elif now - snapshot[1] > self._max_age:
+            reason = "index expired"
+        else:
+            _, _, change_attribute, high_water, identity = snapshot
+            if not change_attribute or high_water is None:
+                # Without a change attribute the snapshot is used as is until it expires
+                return IndexRefresh("current", duration_s=time.monotonic() - start)
+
+            reason = None
+            if change_attribute == "uSNChanged":
+                current_identity = server_identity(conn)
+                if current_identity is None or current_identity != identity:
+                    reason = f"connected to domain controller {current_identity or 'unknown'} " \
+                             f"instead of {identity or 'unknown'}"
+                    self._logger.info(f"The uSNChanged values of {ldap_id} {kind} in the LDAP index were read from "
+                                      f"another domain controller, dumping again: {reason}")
+
+            if reason is None:
+                if change_attribute == "uSNChanged":
+                    changed_filter = f"(&{search_filter}(uSNChanged>={int(high_water) + 1}))"
+                else:
+                    changed_filter = f"(&{search_filter}(modifyTimestamp>={high_water}))"
+                entries = search_all(conn, base_dn, [(kind, changed_filter)], attributes + [change_attribute])[kind]
+                _, high_water = self.__store(ldap_id, kind, entries, attributes, False, change_attribute, high_water)
+                with self._lock, self._db:
+                    self._db.execute("UPDATE snapshots SET refreshed_at = ?, high_water = ? "
+                                     "WHERE ldap_id = ? AND kind = ?", (now, high_water, ldap_id, kind))
+                return IndexRefresh("incremental", len(entries), change_attribute, time.monotonic() - start)
+
+        entries = search_all(conn, base_dn, [(kind, search_filter)], attributes + CHANGE_ATTRIBUTES)[kind]
+        change_attribute, high_water = self.__store(ldap_id, kind, entries, attributes, True)
+        identity = server_identity(conn) if change_attribute == "uSNChanged" else None
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO snapshots (ldap_id, kind, fingerprint, dumped_at, refreshed_at, "
+                             "change_attribute, high_water, server_identity) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                             (ldap_id, kind, fingerprint, now, now, change_attribute, high_water, identity))
+        self._logger.info(f"Dumped {len(entries)} {kind} of {ldap_id} into the LDAP index ({reason}), "
+                          f"changes are tracked with {change_attribute or 'no attribute'}")
+        return IndexRefresh("dump", len(entries), change_attribute, time.monotonic() - start, reason)
+
+    # Returns the names that match a naming attribute of an entry of the (ldap_id, kind) subtree
+    def lookup(self, ldap_id, kind, name_filter, names) -> set:
+        attributes = [attribute.lower() for attribute in naming_attributes(name_filter)]
+        requested = {}
+        for name in names:
+            requested.setdefault(name.lower(), []).append(name)
+        values = list(requested)
+
+        found = set()
+        with self._lock:
+            for start in range(0, len(values), _LOOKUP_BATCH):
+                batch = values[start:start + _LOOKUP_BATCH]
+                rows = self._db.execute(
+                    f"SELECT DISTINCT value FROM names WHERE ldap_id = ? AND kind = ? "
+                    f"AND attribute IN ({','.join('?' * len(attributes))}) AND value IN ({','.join('?' * len(batch))})",
+                    [ldap_id, kind] + attributes + batch).fetchall()
+                for (value,) in rows:
+                    found.update(requested[value])
+        return found
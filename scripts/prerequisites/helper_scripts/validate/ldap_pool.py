@@ -0,0 +1,59 @@
+###############################################################################
+#
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp. 2023. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+###############################################################################
+
+import threading
+
+
+# One bound LDAP connection per ldap_id, shared by the bind check and the user and group searches.
+# ldap3 connections keep the last search result on the connection object, so a connection must only be
+# used while holding the lock of its ldap_id. The lock is reentrant so a holder can still look up the connection.
+class LdapConnectionPool:
+    def __init__(self, logger):
+        self._logger = logger
+        self._connections = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def lock(self, ldap_id) -> threading.RLock:
+        with self._lock:
+            if ldap_id not in self._locks:
+                self._locks[ldap_id] = threading.RLock()
+            return self._locks[ldap_id]
+
+    # Returns the bound connection for the ldap_id, None if there is no usable one
+    def get(self, ldap_id):
+        with self._lock:
+            conn = self._connections.get(ldap_id)
+        if conn is not None and conn.bound and not conn.closed:
+            return conn
+        return None
+
+    def put(self, ldap_id, conn):
+        with self._lock:
+            previous = self._connections.get(ldap_id)
+            self._connections[ldap_id] = conn
+        if previous is not None and previous is not conn:
+            self.__unbind(ldap_id, previous)
+
+    # Unbinds every connection, called once validation has finished
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, {}
+        for ldap_id, conn in connections.items():
+            # The monitor drops a connection that failed by putting None
+            if conn is not None:
+                self.__unbind(ldap_id, conn)
+
+    def __unbind(self, ldap_id, conn):
+        try:
+            conn.unbind()
+        except Exception as e:
+            self._logger.info(f"Unable to unbind LDAP connection for {ldap_id}: {str(e)}")
@@ -0,0 +1,191 @@
+###############################################################################
+#
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp. 2023. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+###############################################################################
+
+import re
+from collections import deque
+
+from ldap3 import BASE, NO_ATTRIBUTES
+from ldap3.utils.conv import escape_filter_chars
+
+from helper_scripts.utilities.tracing import tracer
+
+# Default number of names combined into one OR filter
+DEFAULT_BATCH_SIZE = 50
+
+# Default number of searches sent to one server before waiting for an answer
+DEFAULT_MAX_OUTSTANDING = 8
+
+# Entries returned per page of the simple paged results control
+_PAGE_SIZE = 500
+_PAGED_RESULTS_OID = "1.2.840.113556.1.4.319"
+
+# Matches the "(attribute=%v)" assertions of a user or group filter
+_NAMING_ASSERTION = re.compile(r"\(\s*([A-Za-z][\w-]*)\s*=\s*%v\s*\)")
+
+
+# Returns the attributes the filter compares with the name, e.g. ["samAccountName"] for
+# "(&(samAccountName=%v)(objectClass=user))". Empty if the name is not compared for equality.
+def naming_attributes(name_filter) -> list:
+    attributes = []
+    for attribute in _NAMING_ASSERTION.findall(name_filter):
+        if attribute.lower() not in [known.lower() for known in attributes]:
+            attributes.append(attribute)
+    return attributes
+
+
+# Returns a filter matching every entry a search with name_filter could find,
+# e.g. "(&(samAccountName=*)(objectClass=user))" for "(&(samAccountName=%v)(objectClass=user))"
+def dump_filter(name_filter) -> str:
+    return _NAMING_ASSERTION.sub(lambda match: f"({match.group(1)}=*)", name_filter)
+
+
+def build_or_filter(name_filter, names) -> str:
+    return "(|" + "".join(name_filter.replace("%v", escape_filter_chars(name)) for name in names) + ")"
+
+
+def _values(entry, attribute) -> list:
+    for key, value in entry.get("attributes", {}).items():
+        if key.lower() == attribute.lower():
+            values = value if isinstance(value, list) else [value]
+            return [str(item).lower() for item in values]
+    return []
+
+
+# Sends one page of a search. Synchronous connections answer right away, asynchronous ones
+# return a message id so several searches can be outstanding on the same connection.
+def _send(conn, base_dn, search_filter, attributes, cookie=None):
+    handle = conn.search(search_base=base_dn, search_filter=search_filter, attributes=attributes,
+                         paged_size=_PAGE_SIZE, paged_cookie=cookie)
+    if conn.strategy.sync:
+        return conn.response, conn.result
+    return handle
+
+
+def _receive(conn, handle):
+    if conn.strategy.sync:
+        return handle
+    return conn.get_response(handle)
+
+
+def _next_cookie(result):
+    controls = result.get("controls") if result else None
+    if not controls or _PAGED_RESULTS_OID not in controls:
+        return None
+    return controls[_PAGED_RESULTS_OID]["value"].get("cookie") or None
+
+
+# Runs every (key, filter) search with the paged results control and returns {key: entries}.
+# On an asynchronous connection up to max_outstanding searches are sent before waiting for the first answer.
+def search_all(conn, base_dn, searches, attributes, max_outstanding=DEFAULT_MAX_OUTSTANDING) -> dict:
+    entries = {key: [] for key, _ in searches}
+    pending = deque((key, search_filter, None) for key, search_filter in searches)
+    outstanding = deque()
+
+    while pending or outstanding:
+        while pending and len(outstanding) < max(1, max_outstanding):
+            key, search_filter, cookie = pending.popleft()
+            outstanding.append((key, search_filter, tracer.now_ns(),
+                                _send(conn, base_dn, search_filter, attributes, cookie)))
+
+        key, search_filter, sent_ns, handle = outstanding.popleft()
+        response, result = _receive(conn, handle)
+        entries[key].extend(entry for entry in response or [] if entry.get("type") == "searchResEntry")
+        # Pipelined searches overlap, each span runs from sending the search to reading its answer
+        tracer.record("ldap_search", "ldap", sent_ns, tracer.now_ns(), key=key, entries=len(response or []))
+
+        cookie = _next_cookie(result)
+        if cookie:
+            # Fetch the next page before starting new searches
+            pending.appendleft((key, search_filter, cookie))
+    return entries
+
+
+# Searches for several names at once with OR filters of batch_size names.
+# Returns the names that were found and the names that could not be mapped back from the results
+# (for example when the server normalises the value), which need to be searched one by one.
+def resolve_names(conn, base_dn, name_filter, names, batch_size=DEFAULT_BATCH_SIZE,
+                  max_outstanding=DEFAULT_MAX_OUTSTANDING):
+    attributes = naming_attributes(name_filter)
+    if not attributes:
+        return set(), list(names)
+
+    names = list(names)
+    batch_size = max(1, batch_size)
+    batches = [names[start:start + batch_size] for start in range(0, len(names), batch_size)]
+    results = search_all(conn, base_dn, [(index, build_or_filter(name_filter, batch))
+                                         for index, batch in enumerate(batches)],
+                         attributes, max_outstanding)
+
+    found = set()
+    unresolved = []
+    for index, batch in enumerate(batches):
+        requested = {name.lower(): name for name in batch}
+        unmapped_entries = False
+        for entry in results[index]:
+            matched = [requested[value] for attribute in attributes
+                       for value in _values(entry, attribute) if value in requested]
+            if matched:
+                found.update(matched)
+            else:
+                unmapped_entries = True
+
+        if unmapped_entries:
+            unresolved.extend(name for name in batch if name not in found)
+    return found, unresolved
+
+
+# Searches each name on its own, returns the names that were found.
+# Names are escaped, so "*" or parentheses in a name cannot widen or break the filter.
+def search_names(conn, base_dn, name_filter, names, max_outstanding=DEFAULT_MAX_OUTSTANDING) -> set:
+    results = search_all(conn, base_dn, [(name, name_filter.replace("%v", escape_filter_chars(name)))
+                                         for name in names],
+                         [NO_ATTRIBUTES], max_outstanding)
+    return {name for name, entries in results.items() if entries}
+
+
+# Returns the DN of the entry found for each name, names without an entry are left out
+def find_dns(conn, base_dn, name_filter, names, max_outstanding=DEFAULT_MAX_OUTSTANDING) -> dict:
+    results = search_all(conn, base_dn, [(name, name_filter.replace("%v", escape_filter_chars(name)))
+                                         for name in names],
+                         [NO_ATTRIBUTES], max_outstanding)
+    return {name: str(entries[0]["dn"]) for name, entries in results.items() if entries}
+
+
+# Reads each DN on its own with a base search, up to max_outstanding at a time.
+# Returns the lowercase DNs whose entry matches the filter, missing entries are not an error.
+def read_matching(conn, dns, search_filter, max_outstanding=DEFAULT_MAX_OUTSTANDING) -> set:
+    pending = deque(dns)
+    outstanding = deque()
+    matched = set()
+
+    while pending or outstanding:
+        while pending and len(outstanding) < max(1, max_outstanding):
+            dn = pending.popleft()
+            handle = conn.search(search_base=dn, search_filter=search_filter, search_scope=BASE,
+                                 attributes=[NO_ATTRIBUTES])
+            outstanding.append((dn, conn.response if conn.strategy.sync else handle))
+
+        dn, handle = outstanding.popleft()
+        response = handle if conn.strategy.sync else conn.get_response(handle)[0]
+        if any(entry.get("type") == "searchResEntry" for entry in response or []):
+            matched.add(dn.lower())
+    return matched
+
+
+# Reads a single entry without attributes, returns whether it exists
+def read_entry(conn, dn) -> bool:
+    handle = conn.search(search_base=dn, search_filter="(objectClass=*)", search_scope=BASE,
+                         attributes=[NO_ATTRIBUTES])
+    if conn.strategy.sync:
+        response = conn.response
+    else:
+        response, _ = conn.get_response(handle)
+    return any(entry.get("type") == "searchResEntry" for entry in response or [])
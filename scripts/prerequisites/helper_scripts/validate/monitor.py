@@ -0,0 +1,250 @@
+###############################################################################
+#
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp. 2023. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+###############################################################################
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Default seconds between two monitoring cycles and the share of it that is randomised
+DEFAULT_INTERVAL = 60
+DEFAULT_JITTER = 0.1
+
+DEFAULT_METRICS_HOST = "127.0.0.1"
+DEFAULT_METRICS_PORT = 9464
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+_NS_PER_S = 1000000000
+_MS_PER_S = 1000
+
+_METRICS = {
+    "fncm_prerequisites_latency_seconds": ("histogram", "Latency of the prerequisite checks"),
+    "fncm_prerequisites_checks_total": ("counter", "Prerequisite checks run, by result"),
+    "fncm_prerequisites_up": ("gauge", "Whether the last check against the target passed"),
+    "fncm_prerequisites_certificate_expiry_timestamp_seconds": ("gauge",
+                                                                "Expiry of the certificate presented by the target"),
+    "fncm_prerequisites_cycles_total": ("counter", "Monitoring cycles completed"),
+    "fncm_prerequisites_cycle_duration_seconds": ("gauge", "Duration of the last monitoring cycle"),
+    "fncm_prerequisites_last_cycle_timestamp_seconds": ("gauge", "End of the last monitoring cycle"),
+}
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace("\"", "\\\"")
+
+
+def _label_text(labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f"{key}=\"{_escape(value)}\"" for key, value in labels) + "}"
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    def __init__(self, buckets=None):
+        self.buckets = list(buckets if buckets else LATENCY_BUCKETS)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+# Holds the monitor results and renders them in the Prometheus text exposition format
+class MetricsRegistry:
+    def __init__(self):
+        self._values = {name: {} for name in _METRICS}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def __key(labels) -> tuple:
+        return tuple(sorted(labels.items()))
+
+    def observe(self, name, value, **labels):
+        with self._lock:
+            histogram = self._values[name].setdefault(self.__key(labels), Histogram())
+            histogram.observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        with self._lock:
+            key = self.__key(labels)
+            self._values[name][key] = self._values[name].get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._values[name][self.__key(labels)] = value
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, (metric_type, description) in _METRICS.items():
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in sorted(self._values[name].items()):
+                    if metric_type != "histogram":
+                        lines.append(f"{name}{_label_text(labels)} {_number(value)}")
+                        continue
+                    for bound, count in zip(value.buckets + [float("inf")], value.counts + [value.count]):
+                        lines.append(f"{name}_bucket{_label_text(labels + (('le', _number(bound)),))} {count}")
+                    lines.append(f"{name}_sum{_label_text(labels)} {_number(value.sum)}")
+                    lines.append(f"{name}_count{_label_text(labels)} {value.count}")
+        return "\n".join(lines) + "\n"
+
+
+# Serves the registry on /metrics from a background thread
+class MetricsServer:
+    def __init__(self, registry, host=DEFAULT_METRICS_HOST, port=DEFAULT_METRICS_PORT):
+        registry_ref = registry
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry_ref.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            # Requests are not written to the console
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+# Re-runs the reachability, TLS handshake, JDBC connection and LDAP bind/search checks of Validate
+# on a schedule. Database checks go through the connection daemon and LDAP checks reuse the pooled
+# bound connections, so no JVM or kubectl process is started per cycle.
+class PrerequisitesMonitor:
+    def __init__(self, logger, vobject, registry, interval=DEFAULT_INTERVAL, jitter=DEFAULT_JITTER, workers=4):
+        self._logger = logger
+        self._vobject = vobject
+        self._registry = registry
+        self._interval = max(1, interval)
+        self._jitter = min(max(0.0, jitter), 1.0)
+        self._workers = max(1, workers)
+        self._stopped = threading.Event()
+        self._endpoints = vobject.monitor_endpoints()
+        self._db_labels = vobject.get_db_labels()
+        self._ldap_ids = list(vobject.ldap_prop["_ldap_ids"]) if hasattr(vobject, "_ldap_prop") else []
+        # Set once the connection daemon could not be started, database checks are then skipped
+        self._db_unavailable = False
+
+    def __record(self, check, target, passed, latency_s=None):
+        self._registry.inc("fncm_prerequisites_checks_total", check=check, target=target,
+                           result="success" if passed else "failure")
+        self._registry.set("fncm_prerequisites_up", 1 if passed else 0, check=check, target=target)
+        if passed and latency_s is not None:
+            self._registry.observe("fncm_prerequisites_latency_seconds", latency_s, check=check, target=target)
+
+    def __check_endpoint(self, endpoint):
+        label, server, port, ssl_enabled, cert_path, pg, ldap = endpoint
+        target = f"{server}:{port}"
+        timings = self._vobject.probe_server(server, port, ssl_enabled, cert_path, pg, ldap)
+        connected = timings["connected"]
+        if not connected:
+            self._logger.info(f"Monitor: reachability of {target} ({label}) failed: {timings.get('error')}")
+        # Every phase the probe got through passed, the phase it stopped in failed and later ones are not counted
+        for check, phase, expected in [("dns", "dns_ns", True),
+                                       ("tcp_connect", "connect_ns", True),
+                                       ("protocol_negotiation", "negotiate_ns", pg and ssl_enabled),
+                                       ("tls_handshake", "handshake_ns", ssl_enabled),
+                                       ("first_byte", "first_byte_ns", ldap)]:
+            if not expected:
+                continue
+            passed = phase in timings
+            self.__record(check, target, passed, timings.get(phase, 0) / _NS_PER_S)
+            if not passed:
+                break
+        if "cert_not_after" in timings:
+            self._registry.set("fncm_prerequisites_certificate_expiry_timestamp_seconds",
+                               timings["cert_not_after"], target=target)
+
+    def __check_db(self, db_label):
+        if self._db_unavailable:
+            return
+        result = self._vobject.probe_db(db_label)
+        if result is None:
+            self._db_unavailable = True
+            self._logger.info("Monitor: connection daemon is not available, database connections are not checked")
+            return
+        if not result.connected:
+            self._logger.info(f"Monitor: JDBC connection to {db_label} failed: {result.message}")
+        self.__record("jdbc_connect", db_label, result.connected, result.rtt_ms / _MS_PER_S)
+
+    def __check_ldap(self, ldap_id):
+        timings = self._vobject.probe_ldap(ldap_id)
+        if "error" in timings:
+            self._logger.info(f"Monitor: LDAP check of {ldap_id} failed: {timings['error']}")
+        self.__record("ldap_bind", ldap_id, "bind_ns" in timings, timings.get("bind_ns", 0) / _NS_PER_S)
+        if "bind_ns" in timings:
+            self.__record("ldap_search", ldap_id, "search_ns" in timings, timings.get("search_ns", 0) / _NS_PER_S)
+
+    # Runs every check once, checks against different targets run concurrently
+    def run_cycle(self):
+        start = time.monotonic()
+        checks = ([(self.__check_endpoint, endpoint) for endpoint in self._endpoints]
+                  + [(self.__check_db, db_label) for db_label in self._db_labels]
+                  + [(self.__check_ldap, ldap_id) for ldap_id in self._ldap_ids])
+        with ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="monitor") as executor:
+            futures = [executor.submit(check, target) for check, target in checks]
+        for future in futures:
+            if future.exception() is not None:
+                self._logger.exception(f"Exception from monitor check -  {str(future.exception())}",
+                                       exc_info=future.exception())
+
+        self._registry.inc("fncm_prerequisites_cycles_total")
+        self._registry.set("fncm_prerequisites_cycle_duration_seconds", time.monotonic() - start)
+        self._registry.set("fncm_prerequisites_last_cycle_timestamp_seconds", time.time())
+
+    # Seconds until the next cycle, spread by the jitter so several monitors do not probe in lockstep
+    def next_delay(self) -> float:
+        return self._interval * (1 + random.uniform(-self._jitter, self._jitter))
+
+    # Runs cycles until stop() is called
+    def run(self):
+        while not self._stopped.is_set():
+            self.run_cycle()
+            self._stopped.wait(self.next_delay())
+
+    def stop(self):
+        self._stopped.set()
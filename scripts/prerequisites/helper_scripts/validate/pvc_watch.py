@@ -0,0 +1,100 @@
+###############################################################################
+#
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp. 2023. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+###############################################################################
+
+import threading
+import time
+
+from helper_scripts.validate.kube_client import KubeError
+
+# Seconds between PVC listings when the watch stream is not available
+_POLL_INTERVAL = 10
+
+
+# Follows the phase of the sample PVCs through a single watch on the API server.
+# When the watch cannot be started or ends early, the phases are polled instead.
+class PvcWatch:
+    def __init__(self, logger, kube, selector="cp4ba=test-only"):
+        self._logger = logger
+        self._kube = kube
+        self._selector = selector
+        self._watch = None
+        self._phases = {}
+        self._condition = threading.Condition()
+
+    @property
+    def running(self) -> bool:
+        return self._watch is not None and not self._watch.closed
+
+    def start(self) -> bool:
+        try:
+            self._watch = self._kube.watch("v1", "PersistentVolumeClaim", label_selector=self._selector)
+        except KubeError as e:
+            self._logger.info(f"Unable to watch PVCs, falling back to polling: {str(e)}")
+            self._watch = None
+            return False
+
+        threading.Thread(target=self.__read_events, args=(self._watch,), daemon=True).start()
+        return True
+
+    def __read_events(self, watch):
+        try:
+            for event_type, item in watch:
+                self.__update([item], deleted=event_type == "DELETED")
+        except (KubeError, ValueError) as e:
+            self._logger.info(f"PVC watch ended: {str(e)}")
+        finally:
+            with self._condition:
+                self._condition.notify_all()
+
+    def __update(self, items, deleted=False):
+        with self._condition:
+            for item in items:
+                name = item.get("metadata", {}).get("name")
+                if name and deleted:
+                    self._phases.pop(name, None)
+                elif name:
+                    self._phases[name] = item.get("status", {}).get("phase", "")
+            self._condition.notify_all()
+
+    def __poll(self):
+        try:
+            self.__update(self._kube.get("v1", "PersistentVolumeClaim", label_selector=self._selector)
+                          .get("items", []))
+        except (KubeError, ValueError) as e:
+            self._logger.info(f"Unable to get PVC status: {str(e)}")
+
+    # Waits until every PVC is bound or the deadline (time.monotonic) has passed.
+    # on_bound is called once for each PVC as soon as it is bound. Returns {name: bound}.
+    def wait_for_bound(self, names, deadline, on_bound=None) -> dict:
+        bound = {name: False for name in names}
+        while True:
+            with self._condition:
+                newly_bound = [name for name in names if not bound[name] and self._phases.get(name) == "Bound"]
+            for name in newly_bound:
+                bound[name] = True
+                if on_bound:
+                    on_bound(name)
+
+            remaining = deadline - time.monotonic()
+            if all(bound.values()) or remaining <= 0:
+                return bound
+
+            if self.running:
+                with self._condition:
+                    self._condition.wait(timeout=min(remaining, _POLL_INTERVAL))
+            else:
+                time.sleep(min(remaining, _POLL_INTERVAL))
+                self.__poll()
+
+    def stop(self):
+        if self._watch is not None:
+            self._watch.close()
+        self._watch = None
@@ -0,0 +1,230 @@
+###############################################################################
+#
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp. 2023. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+###############################################################################
+
+import asyncio
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from socket import SOCK_STREAM, timeout as socket_timeout
+from urllib.parse import urlparse
+
+from rich.table import Table
+
+# Default number of endpoints probed at the same time
+DEFAULT_SWEEP_CONCURRENCY = 64
+
+# Default seconds the whole sweep may take, endpoints not probed by then are left to the later checks
+DEFAULT_SWEEP_BUDGET = 30
+
+_ORACLE_HOST = re.compile(r"HOST\s*=\s*([^)\s]+)", re.IGNORECASE)
+_ORACLE_PORT = re.compile(r"PORT\s*=\s*(\d+)", re.IGNORECASE)
+# jdbc:oracle:thin:@host:port/service and jdbc:oracle:thin:@//host:port/service
+_ORACLE_EZCONNECT = re.compile(r"@(?://)?([^:/()\s]+):(\d+)")
+
+_NS_PER_MS = 1000000
+
+
+def _hostname(value) -> str:
+    value = str(value).strip()
+    hostname = urlparse(value).hostname
+    return hostname if hostname else value
+
+
+# A host and port taken from the property files, with the labels of the properties that use it
+class Endpoint:
+    def __init__(self, host, port):
+        self.host = host
+        self.port = int(port)
+        self.used_by = []
+
+    @property
+    def key(self) -> str:
+        return f"{self.host}:{self.port}"
+
+
+class SweepResult:
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        # None = not probed within the sweep budget
+        self.reachable = None
+        self.dns_ms = None
+        self.connect_ms = None
+        self.error = None
+
+    def to_dict(self):
+        return {"endpoint": self.endpoint.key,
+                "used_by": list(self.endpoint.used_by),
+                "reachable": self.reachable,
+                "dns_ms": self.dns_ms,
+                "connect_ms": self.connect_ms,
+                "error": self.error}
+
+
+def _oracle_addresses(jdbc_url) -> list:
+    hosts = _ORACLE_HOST.findall(jdbc_url)
+    ports = _ORACLE_PORT.findall(jdbc_url)
+    if hosts and len(hosts) == len(ports):
+        return list(zip(hosts, ports))
+    return _ORACLE_EZCONNECT.findall(jdbc_url)
+
+
+# Every server of a datasource as (role, host, port): the primary and the HADR standby servers for db2hadr,
+# every ADDRESS of the JDBC URL for Oracle RAC. The server the driver connects to first is always listed first.
+def datasource_addresses(db_type, datasource) -> list:
+    db_type = str(db_type).lower()
+    addresses = []
+    if db_type == "oracle" and datasource.get("ORACLE_JDBC_URL"):
+        oracle_addresses = _oracle_addresses(datasource["ORACLE_JDBC_URL"])
+        for index, (host, port) in enumerate(oracle_addresses):
+            role = "primary" if len(oracle_addresses) == 1 else f"node {index + 1}"
+            addresses.append((role, _hostname(host), str(port).strip()))
+    elif "DATABASE_SERVERNAME" in datasource:
+        addresses.append(("primary", _hostname(datasource["DATABASE_SERVERNAME"]),
+                          str(datasource.get("DATABASE_PORT", "")).strip()))
+    if db_type == "db2hadr" and datasource.get("HADR_STANDBY_SERVERNAME"):
+        # Several standby servers are separated by commas
+        standby_hosts = [host for host in str(datasource["HADR_STANDBY_SERVERNAME"]).split(",") if host.strip()]
+        standby_ports = str(datasource.get("HADR_STANDBY_PORT", "")).split(",")
+        for index, host in enumerate(standby_hosts):
+            port = standby_ports[index] if index < len(standby_ports) else standby_ports[-1]
+            role = "standby" if len(standby_hosts) == 1 else f"standby {index + 1}"
+            addresses.append((role, _hostname(host), port.strip()))
+    return addresses
+
+
+def _url_address(url):
+    parsed = urlparse(url)
+    if not parsed.hostname:
+        return None
+    return parsed.hostname, parsed.port if parsed.port else (80 if parsed.scheme == "http" else 443)
+
+
+# Every server and port of the database, LDAP and IDP property files, each listed once
+def collect_endpoints(db_prop=None, ldap_prop=None, idp_prop=None) -> list:
+    endpoints = {}
+
+    def add(host, port, label):
+        if not host or not str(port).strip().isdigit():
+            return
+        endpoint = Endpoint(_hostname(host), str(port).strip())
+        endpoint = endpoints.setdefault(endpoint.key, endpoint)
+        if label not in endpoint.used_by:
+            endpoint.used_by.append(label)
+
+    db_prop = db_prop or {}
+    for db_label, datasource in db_prop.items():
+        if not isinstance(datasource, dict):
+            continue
+        for role, host, port in datasource_addresses(db_prop.get("DATABASE_TYPE", ""), datasource):
+            add(host, port, db_label if role == "primary" else f"{db_label} {role}")
+
+    ldap_prop = ldap_prop or {}
+    for ldap_id in ldap_prop.get("_ldap_ids", []):
+        add(ldap_prop[ldap_id]["LDAP_SERVER"], ldap_prop[ldap_id]["LDAP_PORT"], ldap_id)
+
+    idp_prop = idp_prop or {}
+    for idp_id in idp_prop.get("_idp_ids", []):
+        for key in ["DISCOVERY_ENDPOINT", "TOKEN_ENDPOINT"]:
+            address = _url_address(idp_prop[idp_id].get(key, "")) if idp_prop[idp_id].get(key) else None
+            if address:
+                add(address[0], address[1], f"{idp_id} {key.split('_')[0].lower()}")
+
+    return list(endpoints.values())
+
+
+async def _probe(endpoint, semaphore, timeout, result, dns=None):
+    async with semaphore:
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + timeout
+        try:
+            # Hostnames already looked up by the DNS resolver stage are not resolved again
+            addresses = dns.addresses(endpoint.host, endpoint.port) if dns is not None else None
+            if addresses is not None:
+                result.dns_ms = dns.get(endpoint.host).duration_ms
+            else:
+                start_time = time.perf_counter_ns()
+                addresses = await asyncio.wait_for(loop.getaddrinfo(endpoint.host, endpoint.port, type=SOCK_STREAM),
+                                                   timeout)
+                result.dns_ms = (time.perf_counter_ns() - start_time) / _NS_PER_MS
+
+            family, _, _, _, address = addresses[0]
+            start_time = time.perf_counter_ns()
+            _, writer = await asyncio.wait_for(asyncio.open_connection(address[0], endpoint.port, family=family),
+                                               max(0.0, deadline - time.monotonic()))
+            result.connect_ms = (time.perf_counter_ns() - start_time) / _NS_PER_MS
+            result.reachable = True
+            writer.close()
+            try:
+                await asyncio.wait_for(writer.wait_closed(), 1)
+            except (OSError, asyncio.TimeoutError):
+                pass
+        except (asyncio.TimeoutError, socket_timeout):
+            result.reachable = False
+            result.error = f"Timed out after {timeout} seconds"
+        except OSError as e:
+            result.reachable = False
+            result.error = str(e)
+
+
+async def _sweep(endpoints, concurrency, timeout, budget, dns) -> dict:
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    results = {endpoint.key: SweepResult(endpoint) for endpoint in endpoints}
+    tasks = [asyncio.ensure_future(_probe(endpoint, semaphore, timeout, results[endpoint.key], dns))
+             for endpoint in endpoints]
+    if tasks:
+        _, pending = await asyncio.wait(tasks, timeout=budget)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    for result in results.values():
+        if result.reachable is None:
+            result.error = f"Not probed within the sweep budget of {budget} seconds"
+    return results
+
+
+# Probes every endpoint concurrently, at most concurrency at a time, each within timeout seconds and all within
+# budget seconds. Addresses found by a DnsCache are used when one is passed. Returns {"host:port": SweepResult}.
+def sweep(endpoints, concurrency=DEFAULT_SWEEP_CONCURRENCY, timeout=10, budget=DEFAULT_SWEEP_BUDGET,
+          dns=None) -> dict:
+    loop = asyncio.new_event_loop()
+    # Name lookups run on this executor, a lookup that hangs must not hold up the end of the sweep
+    executor = ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(endpoints) or 1)),
+                                  thread_name_prefix="sweep")
+    loop.set_default_executor(executor)
+    try:
+        return loop.run_until_complete(_sweep(endpoints, concurrency, timeout, budget, dns))
+    finally:
+        loop.close()
+        executor.shutdown(wait=False)
+
+
+def sweep_table(results: dict) -> Table:
+    table = Table(title="Reachability Sweep")
+
+    table.add_column("Endpoint", justify="left", style="cyan", no_wrap=True)
+    table.add_column("Used By", justify="left")
+    table.add_column("DNS (ms)", justify="right", style="magenta")
+    table.add_column("Connect (ms)", justify="right", style="magenta")
+    table.add_column("Result", justify="left")
+
+    def milliseconds(value):
+        return "{:.2f}".format(value) if value is not None else "-"
+
+    for key, result in sorted(results.items(), key=lambda item: (item[1].reachable is not False, item[0])):
+        if result.reachable:
+            status = "[bold green]Reachable"
+        elif result.reachable is False:
+            status = f"[bold red]{result.error}"
+        else:
+            status = f"[bold yellow]{result.error}"
+        table.add_row(key, ", ".join(result.endpoint.used_by), milliseconds(result.dns_ms),
+                      milliseconds(result.connect_ms), status)
+    return table
@@ -0,0 +1,240 @@
+###############################################################################
+#
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp. 2023. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+###############################################################################
+
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+from rich.table import Table
+
+from helper_scripts.validate.kube_client import KubeError
+
+# Default seconds to wait for the operator to finish reconciling the CR
+DEFAULT_WAIT_TIMEOUT = 3600
+
+# Seconds between reconnects of a watch that ended, doubled up to the maximum
+_MIN_BACKOFF = 1
+_MAX_BACKOFF = 30
+
+# Condition types that mark the CR as reconciled
+_READY_CONDITIONS = ["Ready", "Successful"]
+
+
+def _created_at(item):
+    timestamp = item.get("metadata", {}).get("creationTimestamp")
+    if not timestamp:
+        return None
+    return datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc).timestamp()
+
+
+def _deployment_ready(deployment) -> bool:
+    spec_replicas = deployment.get("spec", {}).get("replicas", 1)
+    status = deployment.get("status", {})
+    generation = deployment.get("metadata", {}).get("generation", 0)
+    return (status.get("observedGeneration", 0) >= generation
+            and status.get("updatedReplicas", 0) >= spec_replicas
+            and status.get("readyReplicas", 0) >= spec_replicas
+            and status.get("availableReplicas", 0) >= spec_replicas)
+
+
+# Seconds from the start of the wait until each milestone was reached, None if it was not reached
+class ReconcileTimings:
+    def __init__(self, cr_name):
+        self.cr_name = cr_name
+        self.first_pod = None
+        self.components = {}
+        self.cr_ready = None
+        self.total = None
+        self.completed = False
+
+    def to_dict(self):
+        return {"cr_name": self.cr_name,
+                "completed": self.completed,
+                "first_pod_s": self.first_pod,
+                "components_s": dict(self.components),
+                "cr_ready_s": self.cr_ready,
+                "total_s": self.total}
+
+
+def reconcile_timing_table(timings: ReconcileTimings) -> Table:
+    table = Table(title=f"{timings.cr_name} Reconcile Timings")
+
+    table.add_column("Milestone", justify="left", style="cyan", no_wrap=True)
+    table.add_column("Time (s)", justify="right", style="magenta")
+
+    def seconds(value):
+        return "{:.1f}".format(value) if value is not None else "-"
+
+    table.add_row("First pod created", seconds(timings.first_pod))
+    for component, ready in sorted(timings.components.items(), key=lambda item: (item[1] is None, item[1] or 0)):
+        table.add_row(f"{component} ready", seconds(ready))
+    table.add_row("CR ready", seconds(timings.cr_ready))
+    table.add_row("Total", seconds(timings.total), style="bold green" if timings.completed else "bold red")
+    return table
+
+
+# Follows the CR, the deployments it owns and their pods until the operator has reconciled the CR.
+# The three watches feed one event queue and are reopened with backoff when they end.
+class ReconcileWatcher:
+    def __init__(self, logger, kube, cr_document):
+        self._logger = logger
+        self._kube = kube
+        self._cr_api_version = cr_document["apiVersion"]
+        self._cr_kind = cr_document["kind"]
+        self._cr_name = cr_document["metadata"]["name"]
+        self._namespace = cr_document["metadata"].get("namespace") or kube.namespace
+        self._events = queue.Queue()
+        self._stopped = threading.Event()
+        self._watches = []
+        self._watches_lock = threading.Lock()
+
+        self._cr = None
+        self._deployments = {}
+        self._pods = {}
+
+    def __follow(self, api_version, kind):
+        backoff = _MIN_BACKOFF
+        while not self._stopped.is_set():
+            try:
+                watch = self._kube.watch(api_version, kind, namespace=self._namespace)
+                with self._watches_lock:
+                    self._watches.append(watch)
+                for event_type, item in watch:
+                    backoff = _MIN_BACKOFF
+                    self._events.put((kind, event_type, item))
+            except KubeError as e:
+                self._logger.info(f"Watch on {kind} ended: {str(e)}")
+            if self._stopped.wait(backoff):
+                break
+            backoff = min(backoff * 2, _MAX_BACKOFF)
+
+    def __owned_deployments(self) -> dict:
+        if self._cr is None:
+            return {}
+        uid = self._cr.get("metadata", {}).get("uid")
+        return {name: deployment for name, deployment in self._deployments.items()
+                if any(owner.get("uid") == uid for owner in deployment["metadata"].get("ownerReferences", []))}
+
+    # Pods belong to a deployment through the ReplicaSet "<deployment>-<pod-template-hash>"
+    def __pod_deployment(self, pod, deployments):
+        template_hash = pod.get("metadata", {}).get("labels", {}).get("pod-template-hash")
+        for owner in pod.get("metadata", {}).get("ownerReferences", []):
+            if owner.get("kind") == "ReplicaSet" and template_hash:
+                name = owner.get("name", "")[:-(len(template_hash) + 1)]
+                if name in deployments:
+                    return name
+        return None
+
+    # A ready condition left over from the previous spec does not count when the operator reports observedGeneration
+    def __cr_ready(self) -> bool:
+        if self._cr is None:
+            return False
+        status = self._cr.get("status") or {}
+        generation = self._cr.get("metadata", {}).get("generation", 0)
+        if status.get("observedGeneration", generation) < generation:
+            return False
+        conditions = status.get("conditions") or []
+        return any(condition.get("type") in _READY_CONDITIONS and str(condition.get("status")) == "True"
+                   for condition in conditions)
+
+    def __update(self, kind, event_type, item):
+        name = item.get("metadata", {}).get("name")
+        if kind == self._cr_kind:
+            if name == self._cr_name:
+                self._cr = None if event_type == "DELETED" else item
+        elif kind == "Deployment":
+            if event_type == "DELETED":
+                self._deployments.pop(name, None)
+            else:
+                self._deployments[name] = item
+        elif kind == "Pod":
+            if event_type == "DELETED":
+                self._pods.pop(name, None)
+            else:
+                self._pods[name] = item
+
+    # Waits until the CR reports a ready condition and every deployment it owns is rolled out.
+    # Shows one progress row per deployment and returns the ReconcileTimings.
+    def wait(self, progress, timeout=DEFAULT_WAIT_TIMEOUT) -> ReconcileTimings:
+        timings = ReconcileTimings(self._cr_name)
+        start = time.monotonic()
+        start_wall = time.time()
+        deadline = start + timeout
+        cr_task = progress.add_task(f"[cyan]{self._cr_kind} {self._cr_name}", total=1)
+        component_tasks = {}
+
+        threads = [threading.Thread(target=self.__follow, args=args, daemon=True)
+                   for args in [(self._cr_api_version, self._cr_kind), ("apps/v1", "Deployment"), ("v1", "Pod")]]
+        for thread in threads:
+            thread.start()
+
+        try:
+            while time.monotonic() < deadline:
+                try:
+                    self.__update(*self._events.get(timeout=min(1, max(0, deadline - time.monotonic()))))
+                    # Handle everything that arrived together before evaluating
+                    while True:
+                        self.__update(*self._events.get_nowait())
+                except queue.Empty:
+                    pass
+
+                elapsed = time.monotonic() - start
+                deployments = self.__owned_deployments()
+                if timings.first_pod is None:
+                    for pod in self._pods.values():
+                        created = _created_at(pod)
+                        if self.__pod_deployment(pod, deployments) and created and created >= int(start_wall):
+                            timings.first_pod = elapsed
+                            progress.log(f"First pod created after {elapsed:.1f} seconds")
+                            break
+
+                for name, deployment in deployments.items():
+                    replicas = deployment.get("spec", {}).get("replicas", 1)
+                    if name not in component_tasks:
+                        component_tasks[name] = progress.add_task(f"[green]{name}", total=replicas)
+                    progress.update(component_tasks[name], total=replicas,
+                                    completed=min(replicas, deployment.get("status", {}).get("readyReplicas", 0)))
+                    if _deployment_ready(deployment):
+                        if timings.components.get(name) is None:
+                            timings.components[name] = elapsed
+                            progress.log(f"{name} ready after {elapsed:.1f} seconds")
+                    else:
+                        # Rolling out again, only the last time it became ready counts
+                        timings.components[name] = None
+
+                cr_ready = self.__cr_ready()
+                if cr_ready and timings.cr_ready is None:
+                    timings.cr_ready = elapsed
+                    progress.log(f"{self._cr_kind} {self._cr_name} reported ready after {elapsed:.1f} seconds")
+                elif not cr_ready:
+                    timings.cr_ready = None
+                progress.update(cr_task, completed=1 if cr_ready else 0)
+
+                if cr_ready and deployments and all(_deployment_ready(deployment)
+                                                    for deployment in deployments.values()):
+                    timings.total = elapsed
+                    timings.completed = True
+                    break
+        finally:
+            self.stop()
+
+        if not timings.completed:
+            timings.total = time.monotonic() - start
+            self._logger.info(f"{self._cr_kind} {self._cr_name} was not reconciled within {timeout} seconds")
+        return timings
+
+    def stop(self):
+        self._stopped.set()
+        with self._watches_lock:
+            watches, self._watches = self._watches, []
+        for watch in watches:
+            watch.close()
@@ -0,0 +1,96 @@
+###############################################################################
+#
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp. 2023. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+###############################################################################
+
+import json
+import os
+import time
+import xml.etree.ElementTree as ElementTree
+
+REPORT_FORMATS = ["json", "junit"]
+
+# Default report file per format, next to prerequisites.log
+REPORT_FILES = {"json": os.path.join(os.getcwd(), "prerequisites_report.json"),
+                "junit": os.path.join(os.getcwd(), "prerequisites_report.xml")}
+
+
+# Outcome of a single validation check, filled in while the check runs
+class CheckResult:
+    def __init__(self, check_type, target):
+        self.check_type = check_type
+        self.target = target
+        self.passed = None
+        self.error = None
+        self.cached = False
+        self.tls_protocol = None
+        self.tls_cipher = None
+        self.latency = {}
+        self.details = {}
+        self.duration_s = None
+        self._start = time.perf_counter()
+
+    def finish(self, passed, error=None):
+        self.passed = bool(passed)
+        if error:
+            self.error = error
+        self.duration_s = time.perf_counter() - self._start
+        return self.passed
+
+    def to_dict(self):
+        return {"type": self.check_type,
+                "target": self.target,
+                "passed": self.passed,
+                "error": self.error,
+                "cached": self.cached,
+                "tls_protocol": self.tls_protocol,
+                "tls_cipher": self.tls_cipher,
+                "latency": self.latency,
+                "details": self.details,
+                "duration_s": self.duration_s}
+
+
+def write_json_report(results: list, file_path, extra=None):
+    report = {"passed": all(result.passed for result in results),
+              "checks": [result.to_dict() for result in results]}
+    report.update(extra or {})
+    with open(file_path, "w", encoding="utf-8") as report_file:
+        json.dump(report, report_file, indent=2, default=str)
+    return file_path
+
+
+# One testsuite per check type, one testcase per target
+def write_junit_report(results: list, file_path):
+    testsuites = ElementTree.Element("testsuites", name="prerequisites")
+    for check_type in sorted({result.check_type for result in results}):
+        suite_results = [result for result in results if result.check_type == check_type]
+        testsuite = ElementTree.SubElement(testsuites, "testsuite", name=check_type,
+                                           tests=str(len(suite_results)),
+                                           failures=str(len([result for result in suite_results if not result.passed])),
+                                           time="{:.3f}".format(sum(result.duration_s or 0 for result in suite_results)))
+        for result in suite_results:
+            testcase = ElementTree.SubElement(testsuite, "testcase", classname=check_type, name=str(result.target),
+                                              time="{:.3f}".format(result.duration_s or 0))
+            if not result.passed:
+                failure = ElementTree.SubElement(testcase, "failure", message=result.error or "Check failed")
+                failure.text = result.error or "Check failed"
+            output = {key: value for key, value in result.to_dict().items()
+                      if key in ["cached", "tls_protocol", "tls_cipher", "latency", "details"] and value}
+            if output:
+                ElementTree.SubElement(testcase, "system-out").text = json.dumps(output, default=str)
+
+    ElementTree.ElementTree(testsuites).write(file_path, encoding="utf-8", xml_declaration=True)
+    return file_path
+
+
+def write_report(report_format, results: list, file_path=None, extra=None):
+    file_path = file_path if file_path else REPORT_FILES[report_format]
+    if report_format == "junit":
+        return write_junit_report(results, file_path)
+    return write_json_report(results, file_path, extra)
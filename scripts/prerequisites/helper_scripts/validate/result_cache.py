@@ -0,0 +1,96 @@
+###############################################################################
+#
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp. 2023. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+###############################################################################
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from helper_scripts.utilities.utilites import file_sha256
+
+
+# On-disk cache of passed validation checks.
+# Entries are keyed by a fingerprint of every property value and certificate the check depends on,
+# so editing a section of a property file only invalidates the checks built from that section.
+# Only digests are written to disk, never the property values themselves.
+class ResultCache:
+    _CACHE_FILE = os.path.join(os.getcwd(), "helper_scripts", "validate", "cache", "validation_results.json")
+
+    def __init__(self, logger, ttl=0, cache_file=None):
+        self._logger = logger
+        # Seconds a cached result stays valid, 0 disables the cache
+        self._ttl = ttl
+        self._cache_file = cache_file if cache_file else self._CACHE_FILE
+        self._entries = {}
+        self._lock = threading.Lock()
+
+        if self.enabled:
+            self.__load()
+
+    @property
+    def enabled(self) -> bool:
+        return self._ttl > 0
+
+    # Builds a cache key from any JSON serializable values and the content of the given files
+    @staticmethod
+    def fingerprint(*values, files=()) -> str:
+        digest = hashlib.sha256(json.dumps(values, sort_keys=True, default=str).encode("utf-8"))
+        for file_path in sorted(files):
+            digest.update(os.path.basename(file_path).encode("utf-8"))
+            digest.update(file_sha256(file_path).encode("utf-8"))
+        return digest.hexdigest()
+
+    def __load(self):
+        try:
+            if os.path.exists(self._cache_file):
+                with open(self._cache_file, encoding="utf-8") as cache_file:
+                    self._entries = json.load(cache_file)
+        except (OSError, ValueError) as e:
+            self._logger.info(f"Ignoring unreadable validation cache {self._cache_file}: {str(e)}")
+            self._entries = {}
+
+    # Returns the cached result and its age in seconds, or (None, 0) if there is no valid entry
+    def get(self, key):
+        if not self.enabled:
+            return None, 0
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None, 0
+        age = time.time() - entry["timestamp"]
+        if age > self._ttl:
+            return None, 0
+        return entry["result"], age
+
+    def put(self, key, result: dict):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = {"timestamp": time.time(), "result": result}
+
+    # Writes all entries that have not expired yet
+    def save(self):
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            self._entries = {key: entry for key, entry in self._entries.items()
+                             if now - entry["timestamp"] <= self._ttl}
+            entries = dict(self._entries)
+        try:
+            os.makedirs(os.path.dirname(self._cache_file), exist_ok=True)
+            tmp_file = self._cache_file + ".tmp"
+            with open(tmp_file, "w", encoding="utf-8") as cache_file:
+                json.dump(entries, cache_file)
+            os.replace(tmp_file, self._cache_file)
+        except OSError as e:
+            self._logger.info(f"Unable to write validation cache {self._cache_file}: {str(e)}")
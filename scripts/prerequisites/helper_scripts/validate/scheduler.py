@@ -0,0 +1,135 @@
+###############################################################################
+#
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp. 2023. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+###############################################################################
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from helper_scripts.utilities.tracing import span
+
+# Default number of checks that are allowed to run at the same time
+DEFAULT_WORKERS = 4
+
+
+# Wraps the rich Progress object handed to a single check.
+# Log output is held back until the check has finished so that
+# the output of concurrent checks does not interleave on the console.
+# Everything else (advance, add_task, ...) goes straight to the real Progress.
+class BufferedProgress:
+    def __init__(self, progress):
+        self._progress = progress
+        self._records = []
+
+    def log(self, *objects, **kwargs):
+        self._records.append((objects, kwargs))
+
+    def flush(self, lock):
+        with lock:
+            for objects, kwargs in self._records:
+                self._progress.log(*objects, **kwargs)
+        self._records = []
+
+    def __getattr__(self, name):
+        return getattr(self._progress, name)
+
+
+# Stands in for the rich Progress object when the console output is turned off with "--quiet".
+# Nothing is rendered, tasks only exist as ids so the checks can run unchanged.
+class NullProgress:
+    def __init__(self):
+        self._task_id = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def log(self, *objects, **kwargs):
+        pass
+
+    def add_task(self, description, **kwargs):
+        self._task_id += 1
+        return self._task_id
+
+    def advance(self, task_id, advance=1):
+        pass
+
+    def update(self, task_id, **kwargs):
+        pass
+
+
+# Runs validation checks concurrently on a thread pool.
+# A check is only started once all the checks it requires have finished,
+# and it is skipped when any of them did not pass.
+# Checks must be added after the checks they require.
+class CheckScheduler:
+    def __init__(self, progress, max_workers=DEFAULT_WORKERS, logger=None):
+        self._progress = progress
+        self._max_workers = max(1, int(max_workers))
+        self._logger = logger if logger else logging.getLogger("prerequisites")
+        self._checks = {}
+        self._log_lock = threading.Lock()
+
+        # name -> value returned by the check, None if the check was skipped
+        self.results = {}
+
+    def add(self, name, func, *args, requires=None, **kwargs):
+        if name in self._checks:
+            raise ValueError(f"Check \"{name}\" has already been scheduled")
+
+        requires = list(requires) if requires else []
+        for required in requires:
+            if required not in self._checks:
+                raise ValueError(f"Check \"{name}\" requires unknown check \"{required}\"")
+
+        self._checks[name] = (func, args, kwargs, requires)
+        return name
+
+    def _run_check(self, name):
+        func, args, kwargs, _ = self._checks[name]
+        buffered_progress = BufferedProgress(self._progress)
+        try:
+            with span(name, "check"):
+                return func(*args, progress=buffered_progress, **kwargs)
+        except Exception as e:
+            self._logger.exception(f"Exception from check \"{name}\" -  {str(e)}")
+            return False
+        finally:
+            buffered_progress.flush(self._log_lock)
+
+    def run(self) -> dict:
+        pending = list(self._checks.keys())
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            while pending or running:
+                for name in pending.copy():
+                    requires = self._checks[name][3]
+                    if any(required not in self.results for required in requires):
+                        continue
+
+                    pending.remove(name)
+                    if not all(self.results[required] for required in requires):
+                        self._logger.info(f"Skipping check \"{name}\" as a required check did not pass")
+                        self.results[name] = None
+                        continue
+
+                    running[executor.submit(self._run_check, name)] = name
+
+                if not running:
+                    continue
+
+                done, _ = wait(running.keys(), return_when=FIRST_COMPLETED)
+                for future in done:
+                    self.results[running.pop(future)] = future.result()
+
+        return self.results
@@ -0,0 +1,164 @@
+###############################################################################
+#
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp. 2023. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+###############################################################################
+
+import ipaddress
+import socket
+import ssl
+import struct
+import threading
+import time
+
+import ldap3
+
+# Postgres SSLRequest, answered with a single "S" when the server accepts SSL
+# https://www.postgresql.org/docs/current/protocol-flow.html#PROTOCOL-FLOW-SSL
+PG_SSL_REQUEST = struct.pack('!II', 8, 1234 << 16 | 5679)
+
+# TLS 1.3 servers send their session tickets after the handshake, this is how long we wait for them
+_TICKET_WAIT = 0.25
+
+
+def _server_hostname(host):
+    try:
+        ipaddress.ip_address(host)
+        return None
+    except ValueError:
+        return host
+
+
+# Outcome of a full handshake followed by a handshake that offers the session of the first one
+class TlsResumption:
+    def __init__(self, protocol=None, full_ns=None, resumed_ns=None, supported=False, error=None):
+        self.protocol = protocol
+        self.full_ns = full_ns
+        self.resumed_ns = resumed_ns
+        self.supported = supported
+        self.error = error
+
+    @property
+    def full_ms(self):
+        return self.full_ns / 1000000 if self.full_ns is not None else None
+
+    @property
+    def resumed_ms(self):
+        return self.resumed_ns / 1000000 if self.resumed_ns is not None else None
+
+    def to_dict(self):
+        return {"protocol": self.protocol,
+                "supported": self.supported,
+                "full_handshake_ms": self.full_ms,
+                "resumed_handshake_ms": self.resumed_ms,
+                "error": self.error}
+
+
+# One ssl.SSLContext per (host, CA file) with session tickets enabled, shared by the resumption probe and the
+# LDAP connections, and the last TLS session per endpoint so a reconnect can resume it.
+class TlsSessionCache:
+    def __init__(self, logger):
+        self._logger = logger
+        self._contexts = {}
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def context(self, host, ca_file=None) -> ssl.SSLContext:
+        key = (host, ca_file or "")
+        with self._lock:
+            if key not in self._contexts:
+                self._contexts[key] = self.__create_context(ca_file)
+            return self._contexts[key]
+
+    def __create_context(self, ca_file):
+        # Same checks as before: the certificate is not verified, only TLS 1.2 and later are accepted
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+        context.minimum_version = ssl.TLSVersion.TLSv1_2
+        context.options &= ~ssl.OP_NO_TICKET
+        if ca_file:
+            try:
+                context.load_verify_locations(cafile=ca_file)
+            except (ssl.SSLError, OSError) as e:
+                self._logger.info(f"Unable to load {ca_file} into the SSL context: {str(e)}")
+        return context
+
+    # Sessions can only be resumed with the context that created them, so they are kept per context as well
+    def session(self, host, port, ca_file=None):
+        with self._lock:
+            return self._sessions.get((host, int(port), ca_file or ""))
+
+    def store(self, host, port, ssl_socket, ca_file=None):
+        session = getattr(ssl_socket, "session", None)
+        if session is not None:
+            with self._lock:
+                self._sessions[(host, int(port), ca_file or "")] = session
+
+    # ldap3 TLS settings that wrap the LDAP socket with the shared context and resume the stored session
+    def ldap_tls(self, host, port, ca_file=None):
+        return SharedContextTls(self, host, port, ca_file)
+
+    def __handshake(self, host, port, ca_file, timeout, pg, session=None):
+        sock = socket.create_connection((host, port), timeout=timeout)
+        conn = sock
+        try:
+            if pg:
+                sock.sendall(PG_SSL_REQUEST)
+                answer = sock.recv(1)
+                if answer != b"S":
+                    raise ConnectionError(f"Server does not accept SSL connections (answered {answer!r})")
+
+            tls_sock = self.context(host, ca_file).wrap_socket(sock, server_hostname=_server_hostname(host),
+                                                               session=session, do_handshake_on_connect=False)
+            conn = tls_sock
+            start_time = time.perf_counter_ns()
+            tls_sock.do_handshake()
+            handshake_ns = time.perf_counter_ns() - start_time
+            if tls_sock.version() == "TLSv1.3":
+                tls_sock.settimeout(min(timeout, _TICKET_WAIT))
+                try:
+                    tls_sock.recv(1)
+                except (socket.timeout, ssl.SSLError, OSError):
+                    pass
+            self.store(host, port, tls_sock, ca_file)
+            return handshake_ns, tls_sock.session_reused, tls_sock.session, tls_sock.version()
+        finally:
+            conn.close()
+
+    # Does a full handshake and then a second one offering its session, with the shared context for the host.
+    # Each connection has to finish within the timeout.
+    def measure_resumption(self, host, port, ca_file=None, timeout=10, pg=False) -> TlsResumption:
+        resumption = TlsResumption()
+        try:
+            resumption.full_ns, _, session, resumption.protocol = self.__handshake(host, port, ca_file, timeout, pg)
+            resumed_ns, reused, _, _ = self.__handshake(host, port, ca_file, timeout, pg, session=session)
+            resumption.supported = reused
+            if reused:
+                resumption.resumed_ns = resumed_ns
+        except (OSError, ssl.SSLError, ValueError) as e:
+            resumption.error = str(e)
+            self._logger.info(f"TLS resumption check of {host}:{port} failed: {str(e)}")
+        return resumption
+
+
+class SharedContextTls(ldap3.Tls):
+    def __init__(self, cache, host, port, ca_file=None):
+        super().__init__(validate=ssl.CERT_NONE, ca_certs_file=ca_file)
+        self._cache = cache
+        self._host = host
+        self._port = port
+        self._ca_file = ca_file
+
+    def wrap_socket(self, connection, do_handshake=False):
+        context = self._cache.context(self._host, self._ca_file)
+        connection.socket = context.wrap_socket(connection.socket, server_side=False,
+                                                do_handshake_on_connect=do_handshake,
+                                                server_hostname=_server_hostname(self._host),
+                                                session=self._cache.session(self._host, self._port,
+                                                                            self._ca_file))
@@ -0,0 +1,104 @@
+###############################################################################
+#
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp. 2023. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+###############################################################################
+
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+
+
+# Finds the command line tools the validation needs.
+# Lookups are remembered for the process, version probes are also kept on disk keyed by the
+# binary path, size and modification time so later runs do not have to start the tool again.
+class ToolDiscovery:
+    _CACHE_FILE = os.path.join(os.getcwd(), "helper_scripts", "validate", "cache", "tools.json")
+
+    def __init__(self, logger, cache_file=None):
+        self._logger = logger
+        self._cache_file = cache_file if cache_file else self._CACHE_FILE
+        self._paths = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.__load()
+
+    def __load(self):
+        try:
+            if os.path.exists(self._cache_file):
+                with open(self._cache_file, encoding="utf-8") as cache_file:
+                    self._versions = json.load(cache_file)
+        except (OSError, ValueError) as e:
+            self._logger.info(f"Ignoring unreadable tool cache {self._cache_file}: {str(e)}")
+            self._versions = {}
+
+    def __save(self):
+        with self._lock:
+            versions = dict(self._versions)
+        try:
+            os.makedirs(os.path.dirname(self._cache_file), exist_ok=True)
+            tmp_file = self._cache_file + ".tmp"
+            with open(tmp_file, "w", encoding="utf-8") as cache_file:
+                json.dump(versions, cache_file)
+            os.replace(tmp_file, self._cache_file)
+        except OSError as e:
+            self._logger.info(f"Unable to write tool cache {self._cache_file}: {str(e)}")
+
+    # Returns the full path of the command, None if it is not on the PATH
+    def which(self, cmd):
+        with self._lock:
+            if cmd in self._paths:
+                return self._paths[cmd]
+        path = shutil.which(cmd)
+        if path is None:
+            self._logger.info(f"{cmd} is not found on this machine, please install the necessary dependencies.")
+        with self._lock:
+            self._paths[cmd] = path
+        return path
+
+    @staticmethod
+    def __binary_key(path):
+        real_path = os.path.realpath(path)
+        stat = os.stat(real_path)
+        return f"{real_path}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    # Returns the version printed by "java -version", "Unknown" if it cannot be parsed
+    # and None if java is missing or fails to start
+    def java_version(self):
+        path = self.which("java")
+        if path is None:
+            return None
+        try:
+            key = self.__binary_key(path)
+        except OSError:
+            key = None
+
+        with self._lock:
+            if key in self._versions:
+                return self._versions[key]
+
+        try:
+            java_version_output = subprocess.check_output([path, '-version'], stderr=subprocess.STDOUT, text=True)
+        except (subprocess.CalledProcessError, OSError) as e:
+            self._logger.info(f"Unable to run java -version: {str(e)}")
+            return None
+        version_match = re.search(r'"(\d+\.\d+\.\d+)', java_version_output)
+        java_version = version_match.group(1) if version_match else "Unknown"
+
+        if key is not None:
+            with self._lock:
+                # Drop the entry of an earlier build of the same binary
+                real_path = key.rsplit(":", 2)[0]
+                self._versions = {cached: version for cached, version in self._versions.items()
+                                  if cached.rsplit(":", 2)[0] != real_path}
+                self._versions[key] = java_version
+            self.__save()
+        return java_version
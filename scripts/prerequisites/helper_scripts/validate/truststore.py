@@ -0,0 +1,200 @@
+###############################################################################
+#
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp. 2023. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+###############################################################################
+
+import hashlib
+import hmac
+import os
+import threading
+import time
+
+from cryptography import x509
+from cryptography.hazmat.primitives import serialization
+
+from helper_scripts.utilities.utilites import file_sha256
+
+# Object identifiers used in a PKCS12 truststore
+_OID_DATA = "1.2.840.113549.1.7.1"
+_OID_CERT_BAG = "1.2.840.113549.1.12.10.1.3"
+_OID_X509_CERTIFICATE = "1.2.840.113549.1.9.22.1"
+_OID_FRIENDLY_NAME = "1.2.840.113549.1.9.20"
+_OID_SHA1 = "1.3.14.3.2.26"
+# Java only loads certificates carrying this attribute as trusted certificate entries,
+# this is the attribute keytool adds on import
+_OID_JAVA_TRUSTED_KEY_USAGE = "2.16.840.1.113894.746875.1.1"
+_OID_ANY_EXTENDED_KEY_USAGE = "2.5.29.37.0"
+
+_MAC_ITERATIONS = 10000
+
+
+def _der(tag, content: bytes) -> bytes:
+    length = len(content)
+    if length < 0x80:
+        return bytes([tag, length]) + content
+    length_bytes = length.to_bytes((length.bit_length() + 7) // 8, "big")
+    return bytes([tag, 0x80 | len(length_bytes)]) + length_bytes + content
+
+
+def _sequence(*items) -> bytes:
+    return _der(0x30, b"".join(items))
+
+
+def _set(*items) -> bytes:
+    # DER requires the members of a SET OF to be sorted by their encoding
+    return _der(0x31, b"".join(sorted(items)))
+
+
+def _explicit(content: bytes) -> bytes:
+    return _der(0xA0, content)
+
+
+def _octet_string(content: bytes) -> bytes:
+    return _der(0x04, content)
+
+
+def _integer(value: int) -> bytes:
+    return _der(0x02, value.to_bytes(value.bit_length() // 8 + 1, "big"))
+
+
+def _bmp_string(value: str) -> bytes:
+    return _der(0x1E, value.encode("utf-16-be"))
+
+
+def _oid(dotted: str) -> bytes:
+    arcs = [int(arc) for arc in dotted.split(".")]
+    encoded = bytearray([arcs[0] * 40 + arcs[1]])
+    for arc in arcs[2:]:
+        chunk = [arc & 0x7F]
+        arc >>= 7
+        while arc:
+            chunk.append(0x80 | (arc & 0x7F))
+            arc >>= 7
+        encoded.extend(reversed(chunk))
+    return _der(0x06, bytes(encoded))
+
+
+# Key derivation from RFC 7292 appendix B.2, used for the integrity MAC
+def _pkcs12_kdf(password: str, salt: bytes, key_id: int, iterations: int, length: int) -> bytes:
+    hash_size, block_size = 20, 64
+    password_bytes = (password + "\0").encode("utf-16-be") if password else b""
+
+    def fill(data):
+        if not data:
+            return b""
+        size = block_size * ((len(data) + block_size - 1) // block_size)
+        return (data * (size // len(data) + 1))[:size]
+
+    diversifier = bytes([key_id]) * block_size
+    block = bytearray(fill(salt) + fill(password_bytes))
+    key = b""
+    while len(key) < length:
+        digest = diversifier + bytes(block)
+        for _ in range(iterations):
+            digest = hashlib.sha1(digest).digest()
+        key += digest
+
+        adjust = int.from_bytes(fill(digest), "big") + 1
+        for offset in range(0, len(block), block_size):
+            value = (int.from_bytes(block[offset:offset + block_size], "big") + adjust) % (1 << (block_size * 8))
+            block[offset:offset + block_size] = value.to_bytes(block_size, "big")
+    return key[:length]
+
+
+def _load_certificates(cert_path) -> list:
+    with open(cert_path, "rb") as cert_file:
+        data = cert_file.read()
+    if b"-----BEGIN" in data:
+        return x509.load_pem_x509_certificates(data)
+    return [x509.load_der_x509_certificate(data)]
+
+
+# Builds a PKCS12 truststore holding every certificate found in cert_path as a trusted certificate entry.
+# Equivalent to "keytool -import -storetype PKCS12" without starting a JVM.
+def build_pkcs12_truststore(cert_path, output_path, alias, truststore_pwd="changeit"):
+    certificates = _load_certificates(cert_path)
+
+    safe_bags = []
+    for index, certificate in enumerate(certificates):
+        entry_alias = alias.lower() if index == 0 else f"{alias.lower()}-{index}"
+        cert_bag = _sequence(_oid(_OID_X509_CERTIFICATE),
+                             _explicit(_octet_string(certificate.public_bytes(serialization.Encoding.DER))))
+        attributes = _set(_sequence(_oid(_OID_FRIENDLY_NAME), _set(_bmp_string(entry_alias))),
+                          _sequence(_oid(_OID_JAVA_TRUSTED_KEY_USAGE), _set(_oid(_OID_ANY_EXTENDED_KEY_USAGE))))
+        safe_bags.append(_sequence(_oid(_OID_CERT_BAG), _explicit(cert_bag), attributes))
+
+    safe_contents = _sequence(*safe_bags)
+    authenticated_safe = _sequence(_sequence(_oid(_OID_DATA), _explicit(_octet_string(safe_contents))))
+
+    salt = os.urandom(20)
+    mac_key = _pkcs12_kdf(truststore_pwd, salt, 3, _MAC_ITERATIONS, 20)
+    mac = hmac.new(mac_key, authenticated_safe, hashlib.sha1).digest()
+    mac_data = _sequence(_sequence(_sequence(_oid(_OID_SHA1), b"\x05\x00"), _octet_string(mac)),
+                         _octet_string(salt),
+                         _integer(_MAC_ITERATIONS))
+
+    pfx = _sequence(_integer(3),
+                    _sequence(_oid(_OID_DATA), _explicit(_octet_string(authenticated_safe))),
+                    mac_data)
+
+    # Write to a temporary file first so a concurrent reader never sees a partial store
+    tmp_path = f"{output_path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as store_file:
+        store_file.write(pfx)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+# Truststores stored by the SHA-256 of the input certificate, store type and password.
+# Datasources signed by the same CA share one truststore, which is reused across runs.
+class TruststoreCache:
+    _CACHE_DIR = os.path.join(os.getcwd(), "helper_scripts", "validate", "cache", "truststores")
+
+    # Truststores not used for this many seconds are removed by evict_stale
+    _MAX_AGE = 7 * 24 * 60 * 60
+
+    def __init__(self, logger, cache_dir=None):
+        self._logger = logger
+        self._cache_dir = cache_dir if cache_dir else self._CACHE_DIR
+        self._lock = threading.Lock()
+
+    def __key(self, cert_path, storetype, truststore_pwd) -> str:
+        return hashlib.sha256(f"{file_sha256(cert_path)}:{storetype}:{truststore_pwd}".encode("utf-8")).hexdigest()
+
+    # Returns the path to a truststore containing the certificates in cert_path
+    def get(self, cert_path, alias, storetype="PKCS12", truststore_pwd="changeit"):
+        if storetype.upper() != "PKCS12":
+            raise ValueError(f"Unsupported truststore type: {storetype}")
+
+        store_path = os.path.join(self._cache_dir, f"{self.__key(cert_path, storetype, truststore_pwd)}.p12")
+        with self._lock:
+            if os.path.exists(store_path):
+                self._logger.info(f"Reusing truststore {store_path} for {cert_path}")
+                # Refresh the modification time so the entry is not evicted while in use
+                os.utime(store_path)
+                return store_path
+
+            # The truststores hold the certificates and their password, only the owner may read them
+            os.makedirs(self._cache_dir, mode=0o700, exist_ok=True)
+            self._logger.info(f"Creating truststore {store_path} for {cert_path}")
+            return build_pkcs12_truststore(cert_path, store_path, alias, truststore_pwd)
+
+    # Removes truststores that have not been used recently
+    def evict_stale(self):
+        if not os.path.isdir(self._cache_dir):
+            return
+        now = time.time()
+        with self._lock:
+            for file_name in os.listdir(self._cache_dir):
+                file_path = os.path.join(self._cache_dir, file_name)
+                try:
+                    if now - os.path.getmtime(file_path) > self._MAX_AGE:
+                        os.remove(file_path)
+                except OSError as e:
+                    self._logger.info(f"Unable to remove cached truststore {file_path}: {str(e)}")
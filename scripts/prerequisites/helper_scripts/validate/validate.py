@@ -9,19 +9,24 @@
 #
 ###############################################################################
 
+import calendar
+import functools
 import inspect
+import ipaddress
 import re
-import ssl
+import select
 import string
 import subprocess
+import threading
 import time
-import struct
-from socket import socket, gaierror
+import uuid
+from socket import socket, gaierror, getaddrinfo, timeout as socket_timeout, SOCK_STREAM
 
 import ldap3
 import requests
 requests.packages.urllib3.disable_warnings()
 import typer
+import yaml
 from OpenSSL import SSL
 from ldap3 import Server, Connection, ALL
 from ldap3.core.exceptions import LDAPBindError
@@ -29,6 +34,49 @@ from rich import print
 from urllib.parse import urlparse
 
 from helper_scripts.utilities.utilites import *
+from helper_scripts.utilities.tracing import traced
+from helper_scripts.validate.connection_daemon import ConnectionDaemon
+from helper_scripts.validate.result_cache import ResultCache
+from helper_scripts.validate.truststore import TruststoreCache
+from helper_scripts.validate.latency import LatencyStats
+from helper_scripts.validate import db_benchmark
+from helper_scripts.validate.ldap_pool import LdapConnectionPool
+from helper_scripts.validate.pvc_watch import PvcWatch
+from helper_scripts.validate.tool_discovery import ToolDiscovery
+from helper_scripts.validate.report import CheckResult
+from helper_scripts.validate.reconcile_watch import ReconcileWatcher, DEFAULT_WAIT_TIMEOUT
+from helper_scripts.validate.kube_client import KubeError, create_kube_client, apply_changed
+from helper_scripts.validate.ldap_search import resolve_names, search_names, read_entry, naming_attributes, \
+    find_dns, DEFAULT_BATCH_SIZE, DEFAULT_MAX_OUTSTANDING
+from helper_scripts.validate.scheduler import NullProgress
+from helper_scripts.validate.tls_sessions import TlsSessionCache, PG_SSL_REQUEST
+from helper_scripts.validate.reachability_sweep import collect_endpoints, datasource_addresses, sweep, sweep_table, \
+    DEFAULT_SWEEP_CONCURRENCY, DEFAULT_SWEEP_BUDGET
+from helper_scripts.validate.dns_resolver import DnsCache, dns_table, DEFAULT_SLOW_DNS_MS
+from helper_scripts.validate import idp_benchmark
+from helper_scripts.validate.ldap_index import LdapIndex
+from helper_scripts.validate.group_walker import GroupWalker, GroupWalk, membership_attributes, in_chain_members, \
+    group_walk_table, membership_table, AD_LDAP_TYPE, DEFAULT_MAX_GROUP_DEPTH
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+# First (ADDRESS=(PROTOCOL=..)(HOST=..)(PORT=..)) of an Oracle JDBC URL and its load balancing setting
+_ORACLE_ADDRESS = re.compile(r"\(\s*ADDRESS\s*=(?:\s*\([^()]*\))+\s*\)", re.IGNORECASE)
+_ORACLE_LOAD_BALANCE = re.compile(r"(LOAD_BALANCE\s*=\s*)(?:on|yes|true)", re.IGNORECASE)
+
+# Default seconds allowed for each network operation of a reachability probe
+DEFAULT_CONNECT_TIMEOUT = 10
+
+# Names of the connection phases timed by connect_to_server, in the order they happen
+CONNECTION_PHASES = {"dns_ns": "DNS lookup",
+                     "connect_ns": "TCP connect",
+                     "negotiate_ns": "Protocol negotiation",
+                     "handshake_ns": "TLS handshake",
+                     "first_byte_ns": "First byte"}
+
+# LDAP search for the root DSE without attributes followed by an unbind, any server answers it
+_LDAP_ROOT_DSE_REQUEST = bytes.fromhex("3025020101632004000a01000a0100020100020100010100870b6f626a656374636c61737330"
+                                       "00")
+_LDAP_UNBIND_REQUEST = bytes.fromhex("30050201024200")
 
 # Function to remove protocol from URL
 def remove_protocol(url):
@@ -52,6 +100,23 @@ class Validate:
 
     _TMP_DIR = os.path.join(os.getcwd(), "helper_scripts", "validate", "tmp")
 
+    _JDBC_DRIVERS = {"db2": "com.ibm.db2.jcc.DB2Driver",
+                     "oracle": "oracle.jdbc.driver.OracleDriver",
+                     "sqlserver": "com.microsoft.sqlserver.jdbc.SQLServerDriver",
+                     "postgresql": "org.postgresql.Driver"}
+
+    # Database types that connect with the driver and connection JAR of another type
+    _JDBC_TYPES = {"db2hadr": "db2"}
+
+    # Seconds to wait for the connection daemon to answer a connection check
+    _DB_CONNECTION_TIMEOUT = 300
+
+    # Seconds to wait for each answer of the LDAP server once connected
+    _LDAP_RECEIVE_TIMEOUT = 300
+
+    # Seconds to wait for the answer of an IDP or SCIM server once connected
+    _IDP_READ_TIMEOUT = 30
+
     _CIPHERS = bytes(
         "ECDHE-ECDSA-AES256-GCM-SHA384:ECDHE-ECDSA-AES128-GCM-SHA256:ECDHE-RSA-AES256-GCM-SHA384:ECDHE-RSA-AES128-GCM-SHA256:TLS_RSA_WITH_AES_256_CBC_SHA",
         'utf-8')
@@ -63,7 +128,21 @@ class Validate:
                  deploy_prop=None,
                  idp_prop=None,
                  component_prop=None,
-                 user_group_prop=None):
+                 user_group_prop=None,
+                 scim_prop=None,
+                 cache_ttl=0,
+                 latency_samples=1,
+                 connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 slow_dns_ms=DEFAULT_SLOW_DNS_MS,
+                 ldap_batch_size=DEFAULT_BATCH_SIZE,
+                 ldap_max_outstanding=DEFAULT_MAX_OUTSTANDING,
+                 ldap_index_max_age=None,
+                 max_group_depth=DEFAULT_MAX_GROUP_DEPTH,
+                 idp_concurrency=idp_benchmark.DEFAULT_IDP_BENCHMARK_CONCURRENCY,
+                 quiet=False):
+
+        # Quiet runs log to a NullProgress, the tables and panels are not built at all
+        self._quiet = quiet
 
         self.component_prop_present = False
         if db_prop:
@@ -85,6 +164,9 @@ class Validate:
         if user_group_prop:
             self._user_group_prop = user_group_prop
 
+        if scim_prop:
+            self._scim_prop = scim_prop
+
         if self._deploy_prop["FNCM_Version"] == "5.5.8":
             self._JDBC_DIR = os.path.join(self._JDBC_DIR, "java8")
 
@@ -94,20 +176,98 @@ class Validate:
         else:
             self._JDBC_DIR = os.path.join(self._JDBC_DIR, "java17")
 
-        self._DB_JDBC_PATH = self.__get_file_from_folder(os.path.join(self._JDBC_DIR, self._db_prop["DATABASE_TYPE"]),
-                                                         [".jar"])
-        self._DB_CONNECTION_JAR_PATH = self.__get_file_from_folder(
-            os.path.join(self._JAR_DIR, self._db_prop["DATABASE_TYPE"]), [".jar"])
+        # The monitor can run without a database property file
+        if hasattr(self, "_db_prop"):
+            self._jdbc_type = self._JDBC_TYPES.get(self._db_prop["DATABASE_TYPE"].lower(),
+                                                   self._db_prop["DATABASE_TYPE"])
+            self._DB_JDBC_PATH = self.__get_file_from_folder(os.path.join(self._JDBC_DIR, self._jdbc_type), [".jar"])
+            self._DB_CONNECTION_JAR_PATH = self.__get_file_from_folder(os.path.join(self._JAR_DIR, self._jdbc_type),
+                                                                       [".jar"])
 
         self._LDAP_JAR_PATH = self.__get_file_from_folder(os.path.join(self._JAR_DIR, "ldap"), [".jar"])
 
         self._logger = logger
 
+        # Tool lookups and java version probes, cached for the process and on disk
+        self._tools = ToolDiscovery(logger)
         self.missing_tools = self.check_env_util()
 
         self.is_validated = {}
         self.roundtriptime = 0
 
+        # Number of connections timed per server and datasource, thresholds are checked against the p95
+        self._latency_samples = max(1, latency_samples)
+        # Seconds allowed for each network operation of a reachability probe or LDAP connect
+        self._connect_timeout = max(1, connect_timeout)
+        # Latency statistics per "server:port" (TCP connect and TLS handshake) and per datasource label (JDBC connect)
+        self.latency_results = {}
+        self._latency_lock = threading.Lock()
+        # Benchmark results per datasource label, filled by benchmark_all_db
+        self.benchmark_results = {}
+        # Load results per IDP and SCIM id, filled by benchmark_idp
+        self.idp_benchmark_results = {}
+
+        # One pooled requests.Session and the last access token per IDP and SCIM id
+        self._idp_concurrency = max(1, idp_concurrency)
+        self._idp_sessions = {}
+        self._idp_tokens = {}
+        self._idp_lock = threading.Lock()
+
+        # CheckResult per (check type, target), used for the --report output
+        self.check_results = {}
+        # TLS protocol, cipher and error of the last reachability check per "server:port"
+        self._endpoint_results = {}
+        self._check_results_lock = threading.Lock()
+
+        # Truststores for SSL datasources, shared by datasources that use the same CA
+        self._truststore_cache = TruststoreCache(logger)
+
+        # Passed checks from previous runs, only used when a cache TTL is set
+        self._result_cache = ResultCache(logger, ttl=cache_ttl)
+
+        # Reachability probes shared by all checks against the same endpoint
+        # (server, port, ssl settings, certificate fingerprint) -> (label of first check, Future)
+        self._probe_results = {}
+        self._probe_lock = threading.Lock()
+
+        # Number of user or group names looked up with a single LDAP search
+        self._ldap_batch_size = max(1, ldap_batch_size)
+        # Number of searches sent to one LDAP server before waiting for an answer
+        self._ldap_max_outstanding = max(1, ldap_max_outstanding)
+        # Names found per ldap_id, merged into _users_dict and _groups_dict by report_ldap_users_groups
+        self._ldap_search_results = {}
+        self._ldap_search_lock = threading.Lock()
+
+        # Local index of the users and groups of every LDAP, None = names are searched on the server.
+        # Entries older than ldap_index_max_age seconds are dumped again.
+        self._ldap_index = LdapIndex(logger, max_age=ldap_index_max_age) if ldap_index_max_age else None
+        self._ldap_index_refreshes = {}
+
+        # Nested membership of the groups found per ldap_id, filled in by walk_ldap_groups.
+        # Groups nested deeper than max_group_depth levels fail the group nesting check.
+        self._max_group_depth = max_group_depth
+        self._group_walks = {}
+
+        # Bound LDAP connections shared by the bind check and the user and group searches
+        self._ldap_pool = LdapConnectionPool(logger)
+
+        # SSL contexts shared by every check against the same host: ssl module contexts (with TLS sessions)
+        # for the LDAP connections and the resumption check, pyOpenSSL contexts for the reachability probes
+        self._tls_sessions = TlsSessionCache(logger)
+        self._openssl_contexts = {}
+        self._openssl_contexts_lock = threading.Lock()
+
+        # SweepResult per "server:port" of the reachability sweep, servers found down are not probed again
+        self._sweep_results = {}
+
+        # Addresses of every hostname of the property files, looked up once before the other checks
+        self._slow_dns_ms = slow_dns_ms
+        self._dns = DnsCache(logger, slow_ms=slow_dns_ms)
+
+        # Started on the first datasource check, None = not started; False = could not be started
+        self._connection_daemon = None
+        self._connection_daemon_lock = threading.Lock()
+
         self._users_dict = self.get_users()
         self._groups_dict = self.get_groups()
         if "FIPS_SUPPORT" in self._deploy_prop.keys():
@@ -164,96 +324,100 @@ class Validate:
     def user_group_prop(self, user_group_prop):
         self._user_group_prop = user_group_prop
 
+    @traced("validate")
     def check_env_util(self) -> list:
         missing_tools = []
 
-        self._keytool_present = self.__is_cmd_present("keytool")
+        self._keytool_present = self._tools.which("keytool") is not None
         if not self._keytool_present:
             missing_tools.append("keytool")
-        self._java_present = self.__is_cmd_present("java")
+        self._java_present = self._tools.which("java") is not None
         if not self._java_present:
             missing_tools.append("java")
-        self._powershell_present = self.__is_cmd_present("powershell.exe")
+        self._powershell_present = self._tools.which("powershell.exe") is not None
         if not self._powershell_present and platform.system() == 'Windows':
             missing_tools.append("powershell")
-            
-        if self._java_present:
-            self._java_correct_version = self.__check_java_version()
-            if not self._java_correct_version:
-                missing_tools.append("java_version")
-
-        self._kubectl_present = self.__is_cmd_present("kubectl")
-        if not self._kubectl_present:
-            missing_tools.append("kubectl")
-
-        if self._kubectl_present:
-            self._kubectl_logged_in = self.__is_kubectl_logged_in()
-            if not self._kubectl_logged_in:
+        self._kubectl_present = self._tools.which("kubectl") is not None
+
+        # The java version and the cluster login are probed at the same time
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            java_version = executor.submit(self._tools.java_version) if self._java_present else None
+            kube_login = executor.submit(self.__connect_kube)
+
+            if self._java_present:
+                self._java_correct_version = self.__check_java_version(java_version.result())
+                if not self._java_correct_version:
+                    missing_tools.append("java_version")
+
+            # The in-process client only needs a kubeconfig, kubectl is the fallback
+            self._kube, self._kubectl_logged_in = kube_login.result()
+            if self._kube is None:
+                missing_tools.append("kubectl")
+            elif not self._kubectl_logged_in:
                 missing_tools.append("connection")
         return missing_tools
 
-    # Check keytool,kubernetes,java
-    def __is_cmd_present(self, cmd):
-        try:
-            # TODO: Add windows support if where is missing
-            if platform.system() == 'Windows':
-                subprocess.check_output("where " + cmd, stderr=subprocess.PIPE, shell=True)
-            else:
-                subprocess.check_output("which " + cmd, stderr=subprocess.PIPE, shell=True)
-            return True
-        except subprocess.CalledProcessError as error:
-            self._logger.info(
-                f"{cmd} is not found on this machine, please install the necessary dependencies. Error: {error}")
-            return False
+    def __connect_kube(self):
+        kube = create_kube_client(self._logger, self._kubectl_present)
+        if kube is None:
+            return None, False
+        return kube, self.__is_kubectl_logged_in(kube)
 
     def __check_java(self):
         if not self._java_present:
             raise typer.Exit(code=1)
 
-    def __check_java_version(self):
-        try:
-            java_version_output = subprocess.check_output(['java', '-version'], stderr=subprocess.STDOUT, text=True)
-            version_match = re.search(r'"(\d+\.\d+\.\d+)', java_version_output)
-            java_version = version_match.group(1) if version_match else "Unknown"
-            if java_version != 'Unknown':
-                if self.deploy_prop["FNCM_Version"] == "5.5.8":
-                    if int(java_version.split(".")[1]) != 8:
-                        return False
-                if self.deploy_prop["FNCM_Version"] == "5.5.11":
-                    if int(java_version.split(".")[0]) != 11:
-                        return False
-
-                if self.deploy_prop["FNCM_Version"] == "5.5.12":
-                    if int(java_version.split(".")[0]) != 17:
-                        return False
-            return True
-        except subprocess.CalledProcessError as e:
-            # If 'java -version' returns a non-zero exit code, print the error
+    # java_version is the version printed by "java -version", None if java could not be started
+    def __check_java_version(self, java_version):
+        if java_version is None:
             return False
-            #raise typer.Exit(code=1)
-    def __check_keytool(self):
-        if not self._keytool_present:
-            raise typer.Exit(code=1)
+        if java_version != 'Unknown':
+            if self.deploy_prop["FNCM_Version"] == "5.5.8":
+                if int(java_version.split(".")[1]) != 8:
+                    return False
+            if self.deploy_prop["FNCM_Version"] == "5.5.11":
+                if int(java_version.split(".")[0]) != 11:
+                    return False
+
+            if self.deploy_prop["FNCM_Version"] == "5.5.12":
+                if int(java_version.split(".")[0]) != 17:
+                    return False
+        return True
 
     def __check_kubectl(self):
-        if not self._kubectl_present:
+        if self._kube is None:
             raise typer.Exit(code=1)
 
     # Checks whether or not we are properly logged into a Kubernetes/OCP cluster
     # 'kubectl config current-context' is not sufficient it will show most recent cluster
     # but we cannot apply yaml which is needed to test storage classes
-    # (!!!) DOES NOT WORK WHEN INSIDE OPERATOR POD
-    def __is_kubectl_logged_in(self):
-        try:
-            subprocess.check_output("kubectl get pods", shell=True, stderr=subprocess.PIPE, stdin=subprocess.DEVNULL,
-                                    universal_newlines=True)
+    # Inside the operator pod the service account of the pod is used
+    def __is_kubectl_logged_in(self, kube):
+        if kube.is_logged_in():
             return True
-        except subprocess.CalledProcessError as error:
-            self._logger.info("Kubectl is not logged into any cluster and " \
-                              + f"will cause errors when checking storage classes; error")
-            return False
+        self._logger.info("Kubectl is not logged into any cluster and " \
+                          + f"will cause errors when checking storage classes; error")
+        return False
+
+    # Stops long running helpers started during validation
+    def close(self):
+        self._result_cache.save()
+        self._ldap_pool.close()
+        if self._ldap_index is not None:
+            self._ldap_index.close()
+        with self._idp_lock:
+            for session in self._idp_sessions.values():
+                session.close()
+            self._idp_sessions = {}
+        if self._kube is not None:
+            self._kube.close()
+        with self._connection_daemon_lock:
+            if self._connection_daemon:
+                self._connection_daemon.stop()
+            self._connection_daemon = None
 
     def cleanup_tmp(self):
+        self._truststore_cache.evict_stale()
         if os.path.exists(self._TMP_DIR):
             shutil.rmtree(self._TMP_DIR)
 
@@ -263,7 +427,57 @@ class Validate:
         os.mkdir(directory)
         return directory
 
-    def validate_all_db(self, task3, progress):
+    # Returns the CheckResult of a check, created when the check starts
+    def __check_result(self, check_type, target) -> CheckResult:
+        with self._check_results_lock:
+            if (check_type, target) not in self.check_results:
+                self.check_results[(check_type, target)] = CheckResult(check_type, target)
+            return self.check_results[(check_type, target)]
+
+    # Copies the TLS details, reachability error and latency samples of an endpoint into a check result
+    def __add_endpoint_details(self, result, server, port, *latency_keys):
+        with self._check_results_lock:
+            endpoint = dict(self._endpoint_results.get(f"{server}:{port}", {}))
+        result.tls_protocol = endpoint.get("tls_protocol")
+        result.tls_cipher = endpoint.get("tls_cipher")
+        if endpoint.get("error") and not result.error:
+            result.error = endpoint["error"]
+        if endpoint.get("phases_ms"):
+            result.details["phases_ms"] = endpoint["phases_ms"]
+        if endpoint.get("tls_resumption"):
+            result.details["tls_resumption"] = endpoint["tls_resumption"]
+        with self._latency_lock:
+            for latency_key in (f"{server}:{port}",) + latency_keys:
+                result.latency.update(self.latency_results.get(latency_key, {}))
+
+    # Results of all checks that ran, in the order they were started
+    def report_results(self) -> list:
+        with self._check_results_lock:
+            return list(self.check_results.values())
+
+    # Returns the datasource labels that need to be validated for the selected components
+    def get_db_labels(self) -> list:
+        db_labels = []
+        if not hasattr(self, "_db_prop"):
+            return db_labels
+        if self._deploy_prop["FNCM_Version"] == "5.5.8":
+            db_labels.append("GCD")
+            db_labels.extend(self._db_prop["_os_ids"])
+            db_labels.append("ICN")
+        else:
+            if "CPE" in self._deploy_prop.keys():
+                if self._deploy_prop["CPE"]:
+                    db_labels.append("GCD")
+                    db_labels.extend(self._db_prop["_os_ids"])
+
+            if "BAN" in self._deploy_prop.keys():
+                if self._deploy_prop["BAN"]:
+                    db_labels.append("ICN")
+        return db_labels
+
+    def log_db_notices(self, progress):
+        if self._quiet:
+            return
         db_type = self._db_prop['DATABASE_TYPE']
         if db_type == "postgresql":
             max_transactions = Panel.fit(Text(
@@ -280,38 +494,210 @@ class Validate:
             progress.log(xa_enabled)
             progress.log()
 
-        if self._deploy_prop["FNCM_Version"] == "5.5.8":
-            # Check for reachability and authentication of DB Server
-            progress.log(Panel.fit(Text("Validating GCD Database Connection", style="bold cyan")))
+    def validate_db_connection(self, db_label, task3, progress):
+        # Check for reachability and authentication of DB Server
+        if not self._quiet:
+            progress.log(Panel.fit(Text(f"Validating {db_label} Database Connection", style="bold cyan")))
             progress.log()
-            self.validate_db("GCD", task3, progress)
 
-            for os_id in self._db_prop["_os_ids"]:
-                progress.log(Panel.fit(Text(f"Validating {os_id} Database Connection", style="bold cyan")))
-                progress.log()
-                self.validate_db(os_id, task3, progress)
+        result = self.__check_result("database", db_label)
+        cache_key = self.__db_cache_key(db_label)
+        if self.__use_cached_result(cache_key, db_label, task3, progress):
+            result.cached = True
+            return result.finish(True)
+
+        validated = self.validate_db(db_label, task3, progress)
+        # A datasource with an unreachable standby is checked again on the next run
+        if validated and "warning" not in result.details:
+            self._result_cache.put(cache_key, {"passed": True})
+        db_servername, db_port = self.__db_endpoint(db_label)
+        self.__add_endpoint_details(result, db_servername, db_port, db_label)
+        return result.finish(validated)
+
+    # Certificates used by a datasource or LDAP connection, empty if SSL is not enabled
+    def __ssl_cert_files(self, label, ssl_enabled) -> list:
+        if not ssl_enabled:
+            return []
+        return collect_visible_files_recursive(os.path.join(os.getcwd(), "propertyFile", "ssl-certs", label.lower()))
+
+    def __db_cache_key(self, db_label):
+        ssl_enabled = self._db_prop['DATABASE_SSL_ENABLE']
+        return ResultCache.fingerprint("db", db_label, self._db_prop['DATABASE_TYPE'], ssl_enabled,
+                                       self._db_prop.get('SSL_MODE', ''), self._db_prop[db_label],
+                                       self._deploy_prop["FNCM_Version"], self.fips_enabled,
+                                       files=self.__ssl_cert_files(db_label, ssl_enabled))
+
+    def __ldap_cache_key(self, ldap_id):
+        return ResultCache.fingerprint("ldap", ldap_id, self._ldap_prop[ldap_id],
+                                       files=self.__ssl_cert_files(ldap_id, self._ldap_prop[ldap_id]["LDAP_SSL_ENABLED"]))
+
+    # Marks a check as passed when an unexpired passed result is in the result cache
+    def __use_cached_result(self, cache_key, label, task, progress) -> bool:
+        result, age = self._result_cache.get(cache_key)
+        if not result or not result.get("passed"):
+            return False
+
+        self._logger.info(f"Using cached validation result for {label}")
+        progress.log(Text(f"\nNo changes for \"{label}\" since it passed {int(age // 60)} minute(s) ago, "
+                          f"skipping check, PASSED!\n", style="bold green"))
+        self.is_validated[label] = True
+        progress.advance(task)
+        return True
 
-            progress.log(Panel.fit(Text("Validating ICN Database Connection", style="bold cyan")))
+    # Runs a reachability probe once per endpoint, every other check against the endpoint reuses its result
+    def __shared_probe(self, probe_key, label, probe, progress) -> bool:
+        with self._probe_lock:
+            shared = self._probe_results.get(probe_key)
+            if shared is None:
+                shared = (label, Future())
+                self._probe_results[probe_key] = shared
+                owner = True
+            else:
+                owner = False
+
+        first_label, future = shared
+        if owner:
+            connected = False
+            try:
+                connected = probe()
+            finally:
+                future.set_result(connected)
+            return connected
+
+        connected = future.result()
+        server, port = probe_key[0], probe_key[1]
+        status = "succeeded" if connected else "failed"
+        progress.log(Text(f"Reachability to \"{server}:{port}\" already checked for {first_label}, {status}!\n",
+                          style="bold green" if connected else "bold red"))
+        return connected
+
+    # Looks up every hostname of the property files in parallel before the other checks run. The reachability
+    # sweep and the probes connect to these addresses instead of resolving the hostname again.
+    # Lookups slower than the slow DNS threshold are reported as a DNS problem, not as a slow server.
+    @traced("validate")
+    def resolve_hostnames(self, progress) -> dict:
+        endpoints = collect_endpoints(getattr(self, "_db_prop", None), getattr(self, "_ldap_prop", None),
+                                      getattr(self, "_idp_prop", None))
+        hosts = [endpoint.host for endpoint in endpoints]
+        if not self._quiet:
+            progress.log(Panel.fit(Text(f"DNS resolution of {len(set(hosts))} hostnames", style="bold cyan")))
+        resolutions = self._dns.resolve_all(hosts, timeout=self._connect_timeout)
+
+        for host, resolution in resolutions.items():
+            result = self.__check_result("dns", host)
+            result.latency = {"lookup_ms": resolution.duration_ms}
+            result.details["addresses"] = resolution.ip_addresses
+            result.details["used_by"] = [label for endpoint in endpoints if endpoint.host == host
+                                         for label in endpoint.used_by]
+            if resolution.slow:
+                result.details["warning"] = f"Slow DNS lookup: {resolution.duration_ms:.2f}ms " \
+                                            f"(threshold {self._slow_dns_ms}ms)"
+            if len(resolution.ip_addresses) > 1:
+                result.details["multiple_addresses"] = True
+            result.finish(resolution.error is None, resolution.error)
+
+        if not self._quiet:
+            progress.log(dns_table(resolutions, self._slow_dns_ms))
+        for host, resolution in resolutions.items():
+            if resolution.error:
+                continue
+            if resolution.slow:
+                progress.log(Text(f"DNS lookup of \"{host}\" took {resolution.duration_ms:.2f}ms, more than "
+                                  f"{self._slow_dns_ms}ms. Slow connections to this host may be caused by DNS, "
+                                  f"not by the server.", style="bold yellow"))
+            if len(resolution.ip_addresses) > 1:
+                progress.log(Text(f"\"{host}\" resolves to {len(resolution.ip_addresses)} addresses "
+                                  f"({', '.join(resolution.ip_addresses)}), checks connect to the first one "
+                                  f"that answers.", style="bold yellow"))
+        progress.log()
+        return resolutions
+
+    # Probes every server and port of the property files at once before the other checks run.
+    # Checks against a server found down fail right away instead of waiting for the connect timeout again.
+    @traced("validate")
+    def sweep_reachability(self, progress, concurrency=DEFAULT_SWEEP_CONCURRENCY, budget=DEFAULT_SWEEP_BUDGET) -> dict:
+        endpoints = collect_endpoints(getattr(self, "_db_prop", None), getattr(self, "_ldap_prop", None),
+                                      getattr(self, "_idp_prop", None))
+        if not self._quiet:
+            progress.log(Panel.fit(Text(f"Reachability sweep of {len(endpoints)} endpoints", style="bold cyan")))
+        self._sweep_results = sweep(endpoints, concurrency=concurrency, timeout=self._connect_timeout, budget=budget,
+                                    dns=self._dns)
+
+        for key, swept in self._sweep_results.items():
+            result = self.__check_result("reachability", key)
+            result.latency = {"dns_ms": swept.dns_ms, "connect_ms": swept.connect_ms}
+            result.details["used_by"] = list(swept.endpoint.used_by)
+            # Endpoints left unprobed by the budget are checked again later, they do not fail the sweep
+            result.finish(swept.reachable is not False, swept.error)
+        if not self._quiet:
+            progress.log(sweep_table(self._sweep_results))
             progress.log()
-            self.validate_db("ICN", task3, progress)
-        else:
-            if "CPE" in self._deploy_prop.keys():
-                if self._deploy_prop["CPE"]:
-                    # Check for reachability and authentication of DB Server
-                    progress.log(Panel.fit(Text("Validating GCD Database Connection", style="bold cyan")))
-                    progress.log()
-                    self.validate_db("GCD", task3, progress)
+        return self._sweep_results
 
-                    for os_id in self._db_prop["_os_ids"]:
-                        progress.log(Panel.fit(Text(f"Validating {os_id} Database Connection", style="bold cyan")))
-                        progress.log()
-                        self.validate_db(os_id, task3, progress)
+    def validate_all_db(self, task3, progress):
+        self.log_db_notices(progress)
+        for db_label in self.get_db_labels():
+            self.validate_db_connection(db_label, task3, progress)
+
+    # Adds a check for every datasource to the scheduler, returns the names of the scheduled checks
+    def schedule_all_db(self, scheduler, task3, progress) -> list:
+        self.log_db_notices(progress)
+        return [scheduler.add(f"db:{db_label}", self.validate_db_connection, db_label, task3)
+                for db_label in self.get_db_labels()]
+
+    # Measures how throughput scales with the number of connections for every datasource that passed validation.
+    # Datasources are benchmarked one after the other so they do not compete for the database server.
+    # Returns the recommended pool sizes per datasource label.
+    @traced("validate")
+    def benchmark_all_db(self, progress, max_connections=32, duration=5) -> dict:
+        recommendations = {}
+        db_labels = [db_label for db_label in self.get_db_labels() if self.is_validated.get(db_label)]
+
+        daemon = self.__get_connection_daemon() if db_labels else None
+        if db_labels and not daemon:
+            progress.log(Text("The database benchmark needs the connection daemon, "
+                              "which could not be started with the installed Java.\n", style="bold red"))
+            db_labels = []
+
+        task = progress.add_task("[blue]Benchmark Database", total=len(db_labels))
+        for db_label in db_labels:
+            if not self._quiet:
+                progress.log(Panel.fit(Text(f"Benchmarking {db_label} Datasource", style="bold cyan")))
+                progress.log()
 
-            if "BAN" in self._deploy_prop.keys():
-                if self._deploy_prop["BAN"]:
-                    progress.log(Panel.fit(Text("Validating ICN Database Connection", style="bold cyan")))
-                    progress.log()
-                    self.validate_db("ICN", task3, progress)
+            _, connection_request = self.__build_db_connection(db_label)
+            levels = []
+            for concurrency in db_benchmark.concurrency_levels(max_connections):
+                result = daemon.benchmark(query=db_benchmark.BENCHMARK_QUERIES[self._jdbc_type],
+                                          concurrency=concurrency, duration_ms=duration * 1000,
+                                          timeout=self._DB_CONNECTION_TIMEOUT + duration, **connection_request)
+                if not result.connected:
+                    self._logger.info(result.message)
+                    progress.log(Text(f"Benchmark with {concurrency} connections failed, "
+                                      f"stopping the benchmark for {db_label}:", style="bold red"))
+                    progress.log(Syntax(result.message, "java", theme="ansi_dark"))
+                    break
+                levels.append(db_benchmark.BenchmarkLevel.from_result(concurrency, result.values))
+
+            recommendation = db_benchmark.recommend_pool(levels)
+            self.benchmark_results[db_label] = {"levels": [level.to_dict() for level in levels],
+                                                "recommendation": recommendation.to_dict() if recommendation else {}}
+            if not self._quiet:
+                progress.log(db_benchmark.benchmark_table(db_label, levels, recommendation))
+                progress.log()
+
+            if recommendation:
+                recommendations[db_label] = recommendation
+                if recommendation.saturated:
+                    message = f"Throughput stops scaling after {recommendation.max_pool} connections."
+                else:
+                    message = f"Throughput was still scaling at {recommendation.max_pool} connections, " \
+                              f"rerun with more connections to find the limit."
+                progress.log(Text(f"{message}\nRecommended connection pool for {db_label}: "
+                                  f"min {recommendation.min_pool}, max {recommendation.max_pool}\n",
+                                  style="bold green"))
+            progress.advance(task)
+        return recommendations
 
     def parse_shell_command (self, parameter):
         # Create a function to escape any single quotes in the password
@@ -322,49 +708,33 @@ class Validate:
 
         return parameter
 
-    def validate_db(self, db_label, task3, progress):
+    # Returns the database server name and port of a datasource, the first address for Oracle RAC
+    def __db_endpoint(self, db_label):
+        _, db_servername, db_port = self.__db_addresses(db_label)[0]
+        return db_servername, db_port
+
+    # Returns (role, server name, port) of every server of a datasource: primary and HADR standby servers,
+    # or every address of an Oracle JDBC URL
+    def __db_addresses(self, db_label) -> list:
+        return [(role, remove_protocol(host), port)
+                for role, host, port in datasource_addresses(self._db_prop['DATABASE_TYPE'], self._db_prop[db_label])]
+
+    # Builds the command line for the connection JAR and the matching request for the connection daemon
+    def __build_db_connection(self, db_label):
         db_name = self._db_prop[db_label]['DATABASE_NAME']
         db_user = self._db_prop[db_label]['DATABASE_USERNAME']
         db_pwd = self._db_prop[db_label]['DATABASE_PASSWORD']
-        db_type = self._db_prop['DATABASE_TYPE']
+        db_type = self._jdbc_type
         ssl_enabled = self._db_prop['DATABASE_SSL_ENABLE']
-
-        if db_type == "oracle":
-            servername_regex = re.compile("(?<=HOST=)[\s]*[^)\s]*")
-            db_servername = servername_regex.search(self._db_prop[db_label]['ORACLE_JDBC_URL']).group()
-            db_servername = remove_protocol(db_servername)
-            port_regex = re.compile("(?<=PORT=)[\s]*[^)\s]*")
-            db_port = port_regex.search(self._db_prop[db_label]['ORACLE_JDBC_URL']).group()
-        else:
-            db_servername = remove_protocol(self._db_prop[db_label]['DATABASE_SERVERNAME'])
-            db_port = self._db_prop[db_label]['DATABASE_PORT']
-            
+        db_servername, db_port = self.__db_endpoint(db_label)
 
         # Escape any single quotes in the password & username
+        # the connection daemon takes the values as they are, only the jar command line needs them escaped.
+        # The daemon gives up on the connection after the same connect timeout as the reachability probes.
+        connection_request = {"user": db_user, "password": db_pwd, "login_timeout": self._connect_timeout}
         db_pwd = self.parse_shell_command(db_pwd)
         db_user = self.parse_shell_command(db_user)
 
-        connected = False
-        # Validates DB server and checks whether postgres pre-SSL packet needs to be sent
-        if db_type == 'postgresql':
-            connected = self.validate_server(progress=progress, server=db_servername, port=db_port, ssl_enabled=ssl_enabled,
-                                         display_rtt=False, pg=True)
-        else:
-            connected = self.validate_server(progress=progress, server=db_servername, port=db_port, ssl_enabled=ssl_enabled,
-                                         display_rtt=False)
-
-        if not connected:
-            self.is_validated[db_label] = connected
-            progress.advance(task3)
-            return connected
-
-        connected_str = Text("\nChecked DB connection for " \
-                             + f"\"{db_name}\" " \
-                             + f"on database server \"{db_servername}\", PASSED!\n", style="bold green")
-        not_connected_str = Text(f"\nUnable to connect to database \"{db_name}\" " \
-                                 + f"on database server \"{db_servername}\", " \
-                                 + "please check database toml file again.\n", style="bold red")
-
         jar_cmd = ''
         class_path_delim_char = ''
         if platform.system() == 'Windows':
@@ -386,24 +756,21 @@ class Validate:
                           + f"-p {db_port} -db '{db_name}' " \
                           + f"-u '{db_user}' -pwd '{db_pwd}' " \
                           + f"-ssl -ca \"{cert}\""
+                connection_request.update(driver=self._JDBC_DRIVERS[db_type],
+                                          url=f"jdbc:db2://{db_servername}:{db_port}/{db_name}",
+                                          properties={"sslConnection": "true",
+                                                      "sslVersion": "TLSv1.2",
+                                                      "sslCertLocation": cert})
             elif db_type == "oracle":
                 cert = self.__get_file_from_folder(file_dir=cert_dir,
                                                    extensions=[".crt", ".cer", ".pem", ".cert"])
-                truststore_folder = os.path.join(self._TMP_DIR,
-                                                 "TRUSTSTORE_" + self._db_prop[db_label]["DATABASE_NAME"])
-                self.__recreate_folder(truststore_folder)
-                # Create DB .der file
-                der_path = self.__crt_to_der_x509(input_cert_path=cert,
-                                                  output_path=os.path.join(truststore_folder, f"{db_type}-db-cert.der"))
-                # Create truststore
+                # Create truststore, datasources using the same CA share it
                 truststore_pwd = "changeit"
                 truststore_type = "PKCS12"
-                truststore_path = self.__create_tmp_truststore(der_path=der_path,
-                                                               output_path=os.path.join(truststore_folder,
-                                                                                        f"{db_type}-db-truststore.p12"),
-                                                               alias=f"cp4ba{db_type.upper()}Certs",
-                                                               storetype="PKCS12",
-                                                               truststore_pwd=truststore_pwd)
+                truststore_path = self.__get_truststore(cert_path=cert,
+                                                        alias=f"cp4ba{db_type.upper()}Certs",
+                                                        storetype=truststore_type,
+                                                        truststore_pwd=truststore_pwd)
                 jar_cmd = "java " + f"-D\"semeru.fips={self.fips_enabled}\" -D\"user.language=en\" -D\"user.country=US\" -cp " \
                           + f"\"{self._DB_JDBC_PATH}{class_path_delim_char}" \
                           + f"{self._DB_CONNECTION_JAR_PATH}\" " \
@@ -411,24 +778,22 @@ class Validate:
                           + f"-u '{db_user}' -pwd '{db_pwd}' " \
                           + f"-ssl -trustorefile \"{truststore_path}\" -trustoretype \"{truststore_type}\" " \
                           + f"-trustorePwd \"{truststore_pwd}\""
+                connection_request.update(driver=self._JDBC_DRIVERS[db_type],
+                                          url=self._db_prop[db_label]['ORACLE_JDBC_URL'],
+                                          properties={"javax.net.ssl.trustStore": truststore_path,
+                                                      "javax.net.ssl.trustStoreType": truststore_type,
+                                                      "javax.net.ssl.trustStorePassword": truststore_pwd,
+                                                      "oracle.net.ssl_server_dn_match": "false"})
             elif db_type == "sqlserver":
                 cert = self.__get_file_from_folder(file_dir=cert_dir,
                                                    extensions=[".crt", ".cer", ".pem", ".cert"])
-                truststore_folder = os.path.join(self._TMP_DIR,
-                                                 "TRUSTSTORE_" + self._db_prop[db_label]["DATABASE_NAME"])
-                self.__recreate_folder(truststore_folder)
-                # Create DB .der file
-                der_path = self.__crt_to_der_x509(input_cert_path=cert,
-                                                  output_path=os.path.join(truststore_folder, f"{db_type}-db-cert.der"))
-                # Create truststore
+                # Create truststore, datasources using the same CA share it
                 truststore_pwd = "changeit"
                 truststore_type = "PKCS12"
-                truststore_path = self.__create_tmp_truststore(der_path=der_path,
-                                                               output_path=os.path.join(truststore_folder,
-                                                                                        f"{db_type}-db-truststore.p12"),
-                                                               alias=f"cp4ba{db_type.upper()}Certs",
-                                                               storetype="PKCS12",
-                                                               truststore_pwd=truststore_pwd)
+                truststore_path = self.__get_truststore(cert_path=cert,
+                                                        alias=f"cp4ba{db_type.upper()}Certs",
+                                                        storetype=truststore_type,
+                                                        truststore_pwd=truststore_pwd)
                 SSL_CONNECTION_STR = "encrypt=true;trustServerCertificate=true;" \
                                      + f"trustStore=\"{truststore_path}\";" \
                                      + f"trustStorePassword={truststore_pwd}"
@@ -437,9 +802,16 @@ class Validate:
                           + f"{self._DB_CONNECTION_JAR_PATH}\" " \
                           + f"SQLConnection -h '{db_servername}' -p {db_port} -d '{db_name}' " \
                           + f"-u '{db_user}' -pwd '{db_pwd}' -ssl \"{SSL_CONNECTION_STR}\""
+                connection_request.update(driver=self._JDBC_DRIVERS[db_type],
+                                          url=f"jdbc:sqlserver://{db_servername}:{db_port};database={db_name};",
+                                          properties={"encrypt": "true",
+                                                      "trustServerCertificate": "true",
+                                                      "trustStore": truststore_path,
+                                                      "trustStorePassword": truststore_pwd})
             elif db_type == "postgresql":
                 ca_key_crt_extensions = [".crt", ".cer", ".pem", ".cert", ".key", ".arm"]
                 auth_str = ""
+                ssl_properties = {"sslmode": self._db_prop['SSL_MODE']}
 
                 # CLIENT AUTH which uses clientkey and clientcert
                 if len(self.__files_in_dir(os.path.join(cert_dir, "clientcert"), ca_key_crt_extensions)) != 0:
@@ -454,17 +826,20 @@ class Validate:
                                                        output_path=os.path.join(der_folder, f"{db_type}-db-cert.der"))
 
                     auth_str = f"-clientkey \"{der_path}\" -clientcert \"{client_crt}\""
+                    ssl_properties.update(sslkey=der_path, sslcert=client_crt)
                     # NON-require modes always need serverca
                     if self._db_prop['SSL_MODE'].lower() != 'require':
                         server_ca = self.__get_file_from_folder(file_dir=os.path.join(cert_dir, "serverca"),
                                                                 extensions=ca_key_crt_extensions)
                         auth_str = f"-ca \"{server_ca}\" " + auth_str
+                        ssl_properties["sslrootcert"] = server_ca
 
                 # SERVER AUTH which uses serverca only
                 else:
                     server_ca = self.__get_file_from_folder(file_dir=os.path.join(cert_dir, "serverca"),
                                                             extensions=ca_key_crt_extensions)
                     auth_str = f"-ca \"{server_ca}\""
+                    ssl_properties["sslrootcert"] = server_ca
 
                 jar_cmd = "java " + f"-D\"semeru.fips={self.fips_enabled}\" -D\"user.language=en\" -D\"user.country=US\" -D\"com.ibm.jsse2.overrideDefaultTLS=true\" " \
                           f"-cp \"{self._DB_JDBC_PATH}{class_path_delim_char}" \
@@ -472,45 +847,188 @@ class Validate:
                           f"PostgresConnection -h '{db_servername}' -p {db_port} -db '{db_name}' " \
                           f"-u '{db_user}' -pwd '{db_pwd}' -sslmode {self._db_prop['SSL_MODE']} " \
                           f"{auth_str}"
+                connection_request.update(driver=self._JDBC_DRIVERS[db_type],
+                                          url=f"jdbc:postgresql://{db_servername}:{db_port}/{db_name}",
+                                          properties=ssl_properties)
         else:
             if db_type == "db2":
                 jar_cmd = "java " + f"-D\"semeru.fips={self.fips_enabled}\" -D\"user.language=en\" -D\"user.country=US\" " \
                           + f"-cp \"{self._DB_JDBC_PATH}{class_path_delim_char}" \
                           + f"{self._DB_CONNECTION_JAR_PATH}\" DB2Connection " \
                           + f"-h '{db_servername}' -p {db_port} -db '{db_name}' -u '{db_user}' -pwd '{db_pwd}'"
+                connection_request.update(driver=self._JDBC_DRIVERS[db_type],
+                                          url=f"jdbc:db2://{db_servername}:{db_port}/{db_name}")
             elif db_type == "oracle":
                 jar_cmd = "java " + f"-D\"semeru.fips={self.fips_enabled}\" -D\"user.language=en\" -D\"user.country=US\" " \
                           + f"-cp \"{self._DB_JDBC_PATH}{class_path_delim_char}" \
                           + f"{self._DB_CONNECTION_JAR_PATH}\" OracleConnection " \
                           + f"-url {self._db_prop[db_label]['ORACLE_JDBC_URL']} -u '{db_user}' -pwd '{db_pwd}'"
+                connection_request.update(driver=self._JDBC_DRIVERS[db_type],
+                                          url=self._db_prop[db_label]['ORACLE_JDBC_URL'])
             elif db_type == "sqlserver":
                 jar_cmd = "java " + f"-D\"semeru.fips={self.fips_enabled}\" -D\"user.language=en\" -D\"user.country=US\" " \
                           + f"-cp \"{self._DB_JDBC_PATH}{class_path_delim_char}" \
                           + f"{self._DB_CONNECTION_JAR_PATH}\" SQLConnection " \
                           + f"-h '{db_servername}' -p {db_port} -d '{db_name}' -u '{db_user}' -pwd '{db_pwd}' -ssl 'encrypt=false'"
+                connection_request.update(driver=self._JDBC_DRIVERS[db_type],
+                                          url=f"jdbc:sqlserver://{db_servername}:{db_port};database={db_name};",
+                                          properties={"encrypt": "false"})
             elif db_type == "postgresql":
                 jar_cmd = "java " + f"-D\"semeru.fips={self.fips_enabled}\" -D\"user.language=en\" -D\"user.country=US\" -Dcom.ibm.jsse2.overrideDefaultTLS=true " \
                           + f"-cp \"{self._DB_JDBC_PATH}{class_path_delim_char}" \
                           + f"{self._DB_CONNECTION_JAR_PATH}\" PostgresConnection " \
                           + f"-h '{db_servername}' -p {db_port} -db '{db_name}' -u '{db_user}' -pwd '{db_pwd}' -sslmode disable"
+                connection_request.update(driver=self._JDBC_DRIVERS[db_type],
+                                          url=f"jdbc:postgresql://{db_servername}:{db_port}/{db_name}",
+                                          properties={"sslmode": "disable"})
+
+        return jar_cmd, connection_request
 
-        db_is_connected = self.__check_connection_with_jar(jar_cmd, progress)
+    @traced("validate", arg_names=["db_label"])
+    def validate_db(self, db_label, task3, progress):
+        db_name = self._db_prop[db_label]['DATABASE_NAME']
+        db_type = self._db_prop['DATABASE_TYPE']
+        ssl_enabled = self._db_prop['DATABASE_SSL_ENABLE']
+        db_servername, db_port = self.__db_endpoint(db_label)
+
+        # Validates DB server and checks whether postgres pre-SSL packet needs to be sent
+        # Primary, standby and RAC servers are probed concurrently, a failover only works if all are reachable.
+        # Each server of a HADR or RAC datasource gets its own result, so a lost standby does not fail the datasource.
+        db_addresses = self.__db_addresses(db_label)
+        with ThreadPoolExecutor(max_workers=len(db_addresses), thread_name_prefix="db-probe") as executor:
+            probes = [(role, server, port,
+                       executor.submit(self.__probe_db_server, db_label, server, port, ssl_enabled, db_type, progress))
+                      for role, server, port in db_addresses]
+        reachable = {role: future.result() for role, _, _, future in probes}
+        unreachable = [f"{role} {server}:{port}" for role, server, port, _ in probes if not reachable[role]]
+        if len(db_addresses) > 1:
+            self.__check_result("database", db_label).details["servers"] = [
+                {"role": role, "endpoint": f"{server}:{port}", "reachable": reachable[role]}
+                for role, server, port, _ in probes]
+            for role, server, port, _ in probes:
+                result = self.__check_result("database_server", f"{db_label} {role}")
+                result.details["endpoint"] = f"{server}:{port}"
+                result.finish(reachable[role], None if reachable[role] else f"{server}:{port} is not reachable")
+
+        if len(unreachable) == len(db_addresses):
+            self.is_validated[db_label] = False
+            progress.advance(task3)
+            return False
+
+        connected_str = Text("\nChecked DB connection for " \
+                             + f"\"{db_name}\" " \
+                             + f"on database server \"{db_servername}\", PASSED!\n", style="bold green")
+        not_connected_str = Text(f"\nUnable to connect to database \"{db_name}\" " \
+                                 + f"on database server \"{db_servername}\", " \
+                                 + "please check database toml file again.\n", style="bold red")
+
+        jar_cmd, connection_request = self.__build_db_connection(db_label)
+        db_is_connected, roundtriptime = self.__check_connection(jar_cmd, connection_request, progress)
         if db_is_connected:
             self._logger.info(f"Successfully connected to {db_label} database!")
 
             progress.log(connected_str)
             progress.log()
 
-            self.output_latency(self.roundtriptime, progress, "DB")
+            latency = self.__sample_db_latency(db_label, roundtriptime, connection_request)
+            self.output_latency(latency if len(latency) > 1 else roundtriptime, progress, "DB")
+            if len(db_addresses) > 1:
+                self.__check_failover(db_label, connection_request, roundtriptime, progress)
 
         else:
             self._logger.info(f"Failed to connect to {db_label} database!")
+            self.__check_result("database", db_label).error = not_connected_str.plain.strip()
             progress.log(not_connected_str)
             progress.log()
+        if db_is_connected and unreachable:
+            message = f"{db_label} connected, but these servers are not reachable: {', '.join(unreachable)}. " \
+                      f"Connections cannot fail over to them."
+            self._logger.info(message)
+            self.__check_result("database", db_label).details["warning"] = message
+            progress.log(Text(f"\n{message}\n", style="bold yellow"))
         self.is_validated[db_label] = db_is_connected
         progress.advance(task3)
         return db_is_connected
 
+    # Probes one server of a datasource, datasources on the same server, port and SSL settings share a single probe
+    def __probe_db_server(self, db_label, server, port, ssl_enabled, db_type, progress) -> bool:
+        cert_files = self.__ssl_cert_files(db_label, ssl_enabled)
+        probe_key = (server, str(port), ssl_enabled, db_type == 'postgresql', ResultCache.fingerprint(files=cert_files))
+        return self.__shared_probe(probe_key, db_label,
+                                   lambda: self.validate_server(progress=progress, server=server, port=port,
+                                                                ssl_enabled=ssl_enabled, display_rtt=False,
+                                                                pg=db_type == 'postgresql'),
+                                   progress)
+
+    # Connects through the driver with a server that refuses connections in front of the configured ones:
+    # Db2 client reroute for HADR, connect-time failover for Oracle RAC. The connect time shows how long the
+    # datasource pool needs to get a connection after losing a node. Needs the connection daemon, the JARs
+    # cannot take the driver properties.
+    def __check_failover(self, db_label, connection_request, roundtriptime, progress):
+        daemon = self.__get_connection_daemon()
+        failover_request = self.__build_failover_request(db_label, connection_request, self.__closed_port())
+        if not daemon or not failover_request:
+            return
+
+        result = daemon.check_connection(timeout=self._DB_CONNECTION_TIMEOUT, **failover_request)
+        failover = {"connected": result.connected, "connect_ms": result.rtt_ms if result.connected else None,
+                    "error": None if result.connected else result.message}
+        self.__check_result("database", db_label).details["failover"] = failover
+        if result.connected:
+            with self._latency_lock:
+                self.latency_results.setdefault(db_label, {})["failover_connect"] = \
+                    LatencyStats.from_ms([result.rtt_ms]).to_dict()
+            progress.log(Text(f"Failover connection for {db_label} took {result.rtt_ms:.2f}ms "
+                              f"(direct connection {roundtriptime:.2f}ms).\n"
+                              f"The failed server refused the connection right away, a server that does not answer "
+                              f"adds the connect timeout of the driver.\n", style="bold green"))
+        else:
+            self._logger.info(f"Failover connection for {db_label} failed: {result.message}")
+            progress.log(Text(f"Failover connection for {db_label} failed, connections may not be rerouted "
+                              f"when a server is lost:", style="bold yellow"))
+            progress.log(Syntax(result.message, "java", theme="ansi_dark"))
+            progress.log()
+
+    # A local port nothing listens on, connections to it are refused like those to a lost node
+    @staticmethod
+    def __closed_port() -> int:
+        sock = socket()
+        try:
+            sock.bind(("127.0.0.1", 0))
+            return sock.getsockname()[1]
+        finally:
+            sock.close()
+
+    # Connection request that first tries 127.0.0.1 on the closed port, None if the database type has no failover
+    def __build_failover_request(self, db_label, connection_request, closed_port):
+        db_type = str(self._db_prop['DATABASE_TYPE']).lower()
+        failover_request = dict(connection_request)
+        properties = dict(connection_request.get("properties") or {})
+        if db_type == "db2hadr":
+            servers = [("127.0.0.1", str(closed_port))] + [(server, str(port))
+                                                           for _, server, port in self.__db_addresses(db_label)]
+            properties.update(clientRerouteAlternateServerName=",".join(server for server, _ in servers),
+                              clientRerouteAlternatePortNumber=",".join(port for _, port in servers),
+                              enableClientAffinitiesList="1",
+                              maxRetriesForClientReroute="1",
+                              retryIntervalForClientReroute="0")
+            failover_request["url"] = f"jdbc:db2://127.0.0.1:{closed_port}/{self._db_prop[db_label]['DATABASE_NAME']}"
+        elif db_type == "oracle":
+            jdbc_url = connection_request["url"]
+            first_address = _ORACLE_ADDRESS.search(jdbc_url)
+            if not first_address:
+                return None
+            dead_address = re.sub(r"(HOST\s*=\s*)[^)\s]+", r"\g<1>127.0.0.1", first_address.group(),
+                                  flags=re.IGNORECASE)
+            dead_address = re.sub(r"(PORT\s*=\s*)\d+", rf"\g<1>{closed_port}", dead_address, flags=re.IGNORECASE)
+            jdbc_url = jdbc_url[:first_address.start()] + dead_address + jdbc_url[first_address.start():]
+            # The refused address has to be tried first
+            failover_request["url"] = _ORACLE_LOAD_BALANCE.sub(r"\g<1>off", jdbc_url)
+        else:
+            return None
+        failover_request["properties"] = properties
+        return failover_request
+
     # Returns the first file found in a directory
     # that has one of the extensions provided.
     def __get_file_from_folder(self, file_dir, extensions: list):
@@ -536,33 +1054,12 @@ class Validate:
 
     def __create_tmp_folder(self):
         try:
-            if not os.path.exists(self._TMP_DIR):
-                os.makedirs(self._TMP_DIR)
+            os.makedirs(self._TMP_DIR, exist_ok=True)
         except Exception as e:
             self._logger.exception(
                 f"Exception from validate.py script in {inspect.currentframe().f_code.co_name} function -  {str(e)}")
         return self._TMP_DIR
 
-    # Converts a .cert file to .der in x509 format
-    def __crt_to_der_x509(self, input_cert_path, output_path):
-        try:
-            # Remove previous temp files
-            if os.path.exists(output_path):
-                os.remove(output_path)
-
-            # Create LDAP .der file
-            with open(input_cert_path, 'rb') as cert_file:
-                cert_file = cert_file.read()
-            cert_der = x509.load_pem_x509_certificate(cert_file, default_backend())
-            with open(output_path, 'wb') as file:
-                file.write(cert_der.public_bytes(serialization.Encoding.PEM))
-
-        except Exception as e:
-            self._logger.exception(
-                f"Exception from validate.py script in {inspect.currentframe().f_code.co_name} function -  {str(e)}")
-
-        return output_path
-
     # Converts .key files to .der in PKCS8 format
     def __key_to_der_PKCS8(self, input_key_path, output_path):
         try:
@@ -593,162 +1090,477 @@ class Validate:
 
         return output_path
 
-    # der_path is the path to the input .der file needed to create this temp trust store
-    # !!truststore_pwd will be defaulted to "changeit"!!
-    def __create_tmp_truststore(self, der_path, output_path, alias, storetype, truststore_pwd="changeit"):
-        self.__check_keytool()
-        if os.path.exists(output_path):
-            os.remove(output_path)
-
-        # Create keystore with the .der file
+    # Returns a PKCS12 truststore for the certificate, built in-process and cached by certificate content
+    def __get_truststore(self, cert_path, alias, storetype="PKCS12", truststore_pwd="changeit"):
         try:
-            keystore_cmd = f"keytool -import -alias {alias} -keystore \"{output_path}\" -file \"{der_path}\" " \
-                           + f"-storepass {truststore_pwd} -storetype {storetype} -noprompt"
-            subprocess.run(keystore_cmd, shell=True, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            return self._truststore_cache.get(cert_path, alias, storetype, truststore_pwd)
         except Exception as e:
             self._logger.exception(
                 f"Exception creating key store file -  {str(e)}")
+        return ""
 
-        return output_path
+    # Check Reachability and Authentication of a single LDAP Server
+    @traced("validate", arg_names=["ldap_id"])
+    def validate_ldap(self, ldap_id, task1, progress):
+        ldap_host = remove_protocol(self._ldap_prop[ldap_id]["LDAP_SERVER"])
+        ldap_port = self._ldap_prop[ldap_id]["LDAP_PORT"]
+        ssl_enabled = self._ldap_prop[ldap_id]["LDAP_SSL_ENABLED"]
+
+        if not self._quiet:
+            progress.log(Panel.fit(Text(f"LDAP Server Validation: {ldap_id}", style="bold cyan")))
+            progress.log()
+
+        result = self.__check_result("ldap", ldap_id)
+        cache_key = self.__ldap_cache_key(ldap_id)
+        if self.__use_cached_result(cache_key, ldap_id, task1, progress):
+            result.cached = True
+            return result.finish(True)
+
+        validated = False
+        authenticated = False
+        check_list = []
+        if ssl_enabled:
+            self.__create_tmp_folder()
+            crt_path = self.__get_file_from_folder(
+                os.path.join(os.getcwd(), "propertyFile", "ssl-certs", ldap_id.lower()),
+                [".crt", ".cer", ".pem", ".cert", ".key", ".arm"])
+
+            validated = self.validate_server(progress=progress, server=ldap_host,
+                                             port=ldap_port, ssl_enabled=ssl_enabled,
+                                             cert_path=crt_path, display_rtt=True, ldap=True)
+            check_list.append(validated)
+
+            if validated:
+                authenticated = self.authenticate_ldap(ldap_id, progress, True, cert_path=crt_path)
+                check_list.append(authenticated)
+        else:
+
+            validated = self.validate_server(progress=progress, server=ldap_host,
+                                             port=ldap_port, ldap=True)
+            check_list.append(validated)
+
+            if validated:
+                authenticated = self.authenticate_ldap(ldap_id, progress)
+                check_list.append(authenticated)
+
+        self.is_validated[ldap_id] = all(check_list)
+        if self.is_validated[ldap_id]:
+            self._result_cache.put(cache_key, {"passed": True})
+        elif validated and not authenticated:
+            result.error = f"Unable to authenticate with Bind DN \"{self._ldap_prop[ldap_id]['LDAP_BIND_DN']}\""
+        self.__add_endpoint_details(result, ldap_host, ldap_port)
+
+        progress.advance(task1)
+        return result.finish(self.is_validated[ldap_id])
 
     # Check every and validate all LDAP found in property file.
     def validate_all_ldap(self, task1, progress):
-
-        # Check Reachability and Authentication of LDAP Server
         ldap_validated_list = []
         for ldap_id in self._ldap_prop["_ldap_ids"]:
+            ldap_validated_list.append(self.validate_ldap(ldap_id, task1, progress))
+        return all(ldap_validated_list)
+
+    # Adds a check for every LDAP to the scheduler, returns the names of the scheduled checks
+    def schedule_all_ldap(self, scheduler, task1) -> list:
+        return [scheduler.add(f"ldap:{ldap_id}", self.validate_ldap, ldap_id, task1)
+                for ldap_id in self._ldap_prop["_ldap_ids"]]
 
-            ldap_host = remove_protocol(self._ldap_prop[ldap_id]["LDAP_SERVER"])
-            ldap_port = self._ldap_prop[ldap_id]["LDAP_PORT"]
+    # Create a function to check and validate all users and groups in LDAP
+    def validate_ldap_users_groups(self, task2, progress):
+        searched = [self.search_ldap_users_groups(ldap_id, progress) for ldap_id in self._ldap_prop["_ldap_ids"]]
+        if not all(searched):
+            return False
+        return self.report_ldap_users_groups(task2, progress)
+
+    # Adds a user and group search for every LDAP to the scheduler, each one runs once its LDAP passed.
+    # Returns the names of the scheduled searches, report_ldap_users_groups needs to run after all of them.
+    def schedule_ldap_searches(self, scheduler, ldap_checks) -> list:
+        return [scheduler.add(f"ldap_search:{ldap_id}", self.search_ldap_users_groups, ldap_id, requires=[ldap_check])
+                for ldap_id, ldap_check in zip(self._ldap_prop["_ldap_ids"], ldap_checks)]
+
+    # Searches all users and groups in a single LDAP.
+    # The names found are kept per ldap_id and only merged into the result dictionaries by report_ldap_users_groups.
+    @traced("validate", arg_names=["ldap_id"])
+    def search_ldap_users_groups(self, ldap_id, progress):
+        try:
             ssl_enabled = self._ldap_prop[ldap_id]["LDAP_SSL_ENABLED"]
+            cert_path = ""
+            server = self._ldap_prop[ldap_id]["LDAP_SERVER"]
 
-            progress.log(Panel.fit(Text(f"LDAP Server Validation: {ldap_id}", style="bold cyan")))
+            progress.log(Text(f"Searching LDAP: \"{server}\""))
             progress.log()
 
-            validated = False
-            authenticated = False
-            check_list = []
             if ssl_enabled:
                 self.__create_tmp_folder()
-                crt_path = self.__get_file_from_folder(
+                cert_path = self.__get_file_from_folder(
                     os.path.join(os.getcwd(), "propertyFile", "ssl-certs", ldap_id.lower()),
                     [".crt", ".cer", ".pem", ".cert", ".key", ".arm"])
 
-                validated = self.validate_server(progress=progress, server=ldap_host,
-                                                 port=ldap_port, ssl_enabled=ssl_enabled,
-                                                 cert_path=crt_path, display_rtt=True)
-                check_list.append(validated)
-
-                if validated:
-                    authenticated = self.authenticate_ldap(ldap_id, progress, True, cert_path=crt_path)
-                    check_list.append(authenticated)
-            else:
+            users_found = self.ldap_user_search(ldap_id, progress, ssl_enabled, cert_path)
+            groups_found = self.ldap_group_search(ldap_id, progress, ssl_enabled, cert_path)
+            with self._ldap_search_lock:
+                self._ldap_search_results[ldap_id] = (users_found, groups_found)
+            return True
 
-                validated = self.validate_server(progress=progress, server=ldap_host,
-                                                 port=ldap_port)
-                check_list.append(validated)
+        except Exception as e:
+            self._logger.exception(
+                f"Exception from search_ldap_users_groups function -  {str(e)}")
+            return False
 
-                if validated:
-                    authenticated = self.authenticate_ldap(ldap_id, progress)
-                    check_list.append(authenticated)
+    # Merges the names found in every LDAP, in the order of the property file, and shows which are missing or duplicated
+    def report_ldap_users_groups(self, task2, progress):
+        try:
+            if not self._quiet:
+                progress.log(Panel.fit(Text("LDAP Users and Groups Validation Check", style="bold cyan")))
+                progress.log()
 
-            self.is_validated[ldap_id] = all(check_list)
-            ldap_validated_list.append(all(check_list))
+            with self._ldap_search_lock:
+                for ldap_id in self._ldap_prop["_ldap_ids"]:
+                    users_found, groups_found = self._ldap_search_results.pop(ldap_id, (set(), set()))
+                    for names_dict, found in ((self._users_dict, users_found), (self._groups_dict, groups_found)):
+                        for name in found:
+                            names_dict[name]["count"] += 1
+                            names_dict[name]["ldap_id"].append(ldap_id)
+
+            result = self.__check_result("ldap_users_groups", ", ".join(self._ldap_prop["_ldap_ids"]))
+            for kind, names_dict in (("users", self._users_dict), ("groups", self._groups_dict)):
+                result.details[f"{kind}_missing"] = sorted(name for name, value in names_dict.items()
+                                                           if value["count"] == 0)
+                result.details[f"{kind}_duplicated"] = sorted(name for name, value in names_dict.items()
+                                                              if value["count"] > 1)
+            problems = [f"{kind.replace('_', ' ')}: {', '.join(names)}" for kind, names in result.details.items() if names]
+            result.finish(not problems, "; ".join(problems))
+            if self._ldap_index_refreshes:
+                result.details["ldap_index"] = {f"{ldap_id} {kind}": refresh
+                                                for (ldap_id, kind), refresh in self._ldap_index_refreshes.items()}
 
-            progress.advance(task1)
-        return all(ldap_validated_list)
+            result_panel = ldap_search_results(self._users_dict, self._groups_dict)
 
-    # Create a function to check and validate all users and groups in LDAP
-    def validate_ldap_users_groups(self, task2, progress):
-        try:
-            progress.log(Panel.fit(Text("LDAP Users and Groups Validation Check", style="bold cyan")))
+            progress.log(result_panel)
             progress.log()
 
-            # validate the bind dn is present in the ldap
-            for ldap_id in self._ldap_prop["_ldap_ids"]:
-                ssl_enabled = self._ldap_prop[ldap_id]["LDAP_SSL_ENABLED"]
-                cert_path = ""
-                server = self._ldap_prop[ldap_id]["LDAP_SERVER"]
+            progress.advance(task2)
+            return True
+
+        except Exception as e:
+            self._logger.exception(
+                f"Exception from validate_ldap_users_groups function -  {str(e)}")
+            return False
 
-                progress.log(Text(f"Searching LDAP: \"{server}\""))
+    # Admin roles whose users have to be effective members of a group of the same role.
+    # Returns {role: names}, the names mix users and groups like the property files.
+    def get_admin_roles(self) -> dict:
+        roles = {}
+        user_group_prop = getattr(self, "_user_group_prop", {})
+        if "CONTENT_INITIALIZATION_ENABLED" in user_group_prop.keys():
+            if user_group_prop["CONTENT_INITIALIZATION_ENABLED"]:
+                for os_id in self._db_prop["_os_ids"]:
+                    roles[f"{os_id} admins"] = list(user_group_prop[os_id]["CPE_OBJ_STORE_OS_ADMIN_USER_GROUPS"])
+
+        if self.component_prop_present:
+            if "PERMISSIONS" in self._component_prop.keys():
+                roles["Task Manager admins"] = list(self._component_prop["PERMISSIONS"]["TASK_ADMIN_USER_NAMES"]) + \
+                                               list(self._component_prop["PERMISSIONS"]["TASK_ADMIN_GROUP_NAMES"])
+        return roles
+
+    # Adds a group walk for every LDAP to the scheduler, each one runs once the users and groups were reported.
+    # Returns the names of the scheduled walks, report_group_walks needs to run after all of them.
+    def schedule_group_walks(self, scheduler, users_groups_check) -> list:
+        return [scheduler.add(f"ldap_group_walk:{ldap_id}", self.walk_ldap_groups, ldap_id,
+                              requires=[users_groups_check])
+                for ldap_id in self._ldap_prop["_ldap_ids"]]
+
+    # Expands the nested membership of every group found in a single LDAP and checks which admin users
+    # are effective members of the groups of their role. Active Directory answers the membership itself
+    # with LDAP_MATCHING_RULE_IN_CHAIN, the other servers with the users met during the walk.
+    @traced("validate", arg_names=["ldap_id"])
+    def walk_ldap_groups(self, ldap_id, progress):
+        try:
+            ldap = self._ldap_prop[ldap_id]
+            groups = sorted(name for name, value in self._groups_dict.items() if ldap_id in value["ldap_id"])
+            users = {name for name, value in self._users_dict.items() if ldap_id in value["ldap_id"]}
+            roles = {role: ([name for name in names if name in users], [name for name in names if name in groups])
+                     for role, names in self.get_admin_roles().items()}
+            admin_users = sorted({user for role_users, _ in roles.values() for user in role_users})
+            walks = {}
+            memberships = {}
+
+            if groups:
+                progress.log(Text(f"Expanding nested groups of LDAP: \"{ldap['LDAP_SERVER']}\""))
                 progress.log()
 
+                base_dn = ldap["LDAP_BASE_DN"]
+                group_base_dn = ldap.get("LDAP_GROUP_BASE_DN") or base_dn
+                active_directory = ldap.get("LDAP_TYPE") == AD_LDAP_TYPE
+                ssl_enabled = ldap["LDAP_SSL_ENABLED"]
+                cert_path = ""
                 if ssl_enabled:
                     self.__create_tmp_folder()
                     cert_path = self.__get_file_from_folder(
                         os.path.join(os.getcwd(), "propertyFile", "ssl-certs", ldap_id.lower()),
                         [".crt", ".cer", ".pem", ".cert", ".key", ".arm"])
 
-                self.ldap_user_search(ldap_id, progress, ssl_enabled, cert_path)
-                self.ldap_group_search(ldap_id, progress, ssl_enabled, cert_path)
+                # Usually reuses the connection bound by the user and group search
+                with self._ldap_pool.lock(ldap_id):
+                    authenticated, connect = self.get_ldap_connection(ldap_id, progress, ssl_enabled, cert_path)
+                    if not authenticated:
+                        return False
 
-            result_panel = ldap_search_results(self._users_dict, self._groups_dict)
+                    user_dns = find_dns(connect, base_dn, ldap["LC_USER_FILTER"], admin_users,
+                                        self._ldap_max_outstanding)
+                    group_dns = find_dns(connect, group_base_dn, ldap["LC_GROUP_FILTER"], groups,
+                                         self._ldap_max_outstanding)
+                    walker = GroupWalker(connect, ldap["LC_GROUP_FILTER"],
+                                         membership_attributes(ldap.get("LDAP_GROUP_MEMBERSHIP_ID_MAP"),
+                                                               ldap["LC_GROUP_FILTER"]),
+                                         ranged=active_directory, max_outstanding=self._ldap_max_outstanding)
+                    targets = {dn.lower(): name for name, dn in user_dns.items()}
+
+                    for group in groups:
+                        if group not in group_dns:
+                            walks[group] = GroupWalk(group, None)
+                            walks[group].error = "Group entry not found"
+                            continue
+                        try:
+                            walks[group] = walker.walk(group, group_dns[group], targets)
+                        except Exception as e:
+                            self._logger.info(f"Unable to expand group {group} of {ldap_id} --- {str(e)}")
+                            walks[group] = GroupWalk(group, group_dns[group])
+                            walks[group].error = str(e)
+
+                    for role, (role_users, role_groups) in roles.items():
+                        if not role_users or not role_groups:
+                            continue
+                        memberships[role] = {user: {} for user in role_users}
+                        for group in role_groups:
+                            if walks[group].error:
+                                continue
+                            if active_directory:
+                                members = in_chain_members(connect, base_dn, ldap["LC_USER_FILTER"], group_dns[group],
+                                                           role_users, self._ldap_max_outstanding)
+                            else:
+                                members = set(walks[group].found) & set(role_users)
+                            for user in members:
+                                memberships[role][user][group] = walks[group].found.get(user)
+
+            with self._check_results_lock:
+                self._group_walks[ldap_id] = (walks, memberships)
+            return True
 
-            progress.log(result_panel)
-            progress.log()
+        except Exception as e:
+            self._logger.exception(
+                f"Exception from walk_ldap_groups function -  {str(e)}")
+            return False
 
-            progress.advance(task2)
+    # Shows the depth, fan-out and resolution time of every group and the admin users that are not
+    # effective members of any group of their role
+    def report_group_walks(self, task, progress):
+        try:
+            if not self._quiet:
+                progress.log(Panel.fit(Text("LDAP Group Nesting and Admin Membership Check", style="bold cyan")))
+                progress.log()
+
+            walks = {}
+            memberships = {}
+            with self._check_results_lock:
+                for ldap_id in self._ldap_prop["_ldap_ids"]:
+                    ldap_walks, ldap_memberships = self._group_walks.get(ldap_id, ({}, {}))
+                    walks.update({(ldap_id, group): walk for group, walk in ldap_walks.items()})
+                    for role, users in ldap_memberships.items():
+                        memberships.setdefault(role, {}).update(users)
+
+            result = self.__check_result("ldap_group_nesting", ", ".join(self._ldap_prop["_ldap_ids"]))
+            result.details["groups"] = {f"{ldap_id} {group}": walk.to_dict() for (ldap_id, group), walk in walks.items()}
+            result.details["memberships"] = memberships
+            too_deep = sorted(group for (_, group), walk in walks.items()
+                              if walk.truncated or walk.depth > self._max_group_depth)
+            not_walked = sorted(group for (_, group), walk in walks.items() if walk.error)
+            not_members = sorted(f"{user} ({role})" for role, users in memberships.items()
+                                 for user, groups in users.items() if not groups)
+            problems = [f"{kind}: {', '.join(names)}" for kind, names in
+                        ((f"nested deeper than {self._max_group_depth} levels", too_deep),
+                         ("groups not expanded", not_walked),
+                         ("admin users not in an admin group", not_members)) if names]
+            result.finish(not problems, "; ".join(problems))
+
+            if walks and not self._quiet:
+                progress.log(group_walk_table(walks, self._max_group_depth))
+                progress.log()
+            if memberships and not self._quiet:
+                progress.log(membership_table(memberships))
+                progress.log()
+            if too_deep:
+                progress.log(Text(f"Deeply nested groups slow down every login to the Content Platform Engine. "
+                                  f"Consider flattening: {', '.join(too_deep)}", style="bold yellow"))
+                progress.log()
+
+            progress.advance(task)
+            return True
 
         except Exception as e:
             self._logger.exception(
-                f"Exception from validate_ldap_users_groups function -  {str(e)}")
-
-    def validate_scim(self, task, progress, idp_id="IDP"):
+                f"Exception from report_group_walks function -  {str(e)}")
+            return False
 
-        progress.log(Panel.fit(Text(f"Validating IDP Token: \"{idp_id}\"", style="bold cyan")))
+    # Returns the pooled session of an IDP or SCIM id, created on first use
+    def __idp_session(self, key) -> requests.Session:
+        with self._idp_lock:
+            if key not in self._idp_sessions:
+                self._idp_sessions[key] = idp_benchmark.create_session(pool_size=self._idp_concurrency)
+            return self._idp_sessions[key]
+
+    def __idp_timeout(self) -> tuple:
+        return self._connect_timeout, self._IDP_READ_TIMEOUT
+
+    # Base URL of the SCIM endpoint, e.g. https://scim.example.com:443/scim/v2
+    def __scim_url(self, scim_id) -> str:
+        scim = self._scim_prop[scim_id]
+        scheme = "https" if scim["SCIM_SSL_ENABLED"] else "http"
+        context_path = "/" + str(scim.get("SCIM_CONTEXT_PATH", "")).strip("/")
+        return f"{scheme}://{remove_protocol(scim['SCIM_SERVER'])}:{scim['SCIM_PORT']}{context_path}".rstrip("/")
+
+    # Gets a token from the token endpoint of an IDP with its client id and secret
+    @traced("validate", arg_names=["idp_id"])
+    def validate_idp(self, idp_id, task, progress):
+        if not self._quiet:
+            progress.log(Panel.fit(Text(f"Validating IDP Token: \"{idp_id}\"", style="bold cyan")))
+
+        result = self.__check_result("idp", idp_id)
         token_endpoint = self._idp_prop[idp_id]["TOKEN_ENDPOINT"]
-        client_id = self._idp_prop[idp_id]["CLIENT_ID"]
-        client_secret = self._idp_prop[idp_id]["CLIENT_SECRET"]
-
         received_token = False
 
         # Retrieve token from IDP
         try:
             self._logger.info(f"Retrieving token from {idp_id} IDP...")
             progress.log(f"Retrieving token from {idp_id} IDP...")
-
-            url = token_endpoint
-
-            payload = f"grant_type=password&client_id={client_id}&client_secret={client_secret}"
-            headers = {
-                'Content-Type': 'application/x-www-form-urlencoded'
-            }
-
-            response = requests.request("POST", url, headers=headers, data=payload, verify=False, timeout=5)
-
-            response.raise_for_status()
+            start_time = time.perf_counter_ns()
+            token = idp_benchmark.fetch_token(self.__idp_session(idp_id), token_endpoint,
+                                              self._idp_prop[idp_id]["CLIENT_ID"],
+                                              self._idp_prop[idp_id]["CLIENT_SECRET"], self.__idp_timeout())
+            result.latency = {"token_ms": (time.perf_counter_ns() - start_time) / 1000000}
+            with self._idp_lock:
+                self._idp_tokens[idp_id] = token
             received_token = True
-
-        except Exception as e:
-            self._logger.exception(f"Failed to retrieve token from {idp_id} IDP! Error: {str(e)}")
+        except requests.RequestException as e:
+            self._logger.info(f"Failed to retrieve token from {idp_id} IDP! Error: {str(e)}")
+            result.error = f"Unable to retrieve token from {token_endpoint}: {str(e)}"
 
         if received_token:
             self._logger.info(f"Successfully retrieved token from {idp_id} IDP!")
-            token_response = Text(f"\nToken received from \"{idp_id}\" IDP successfully, PASSED!\n", style="bold green")
+            token_response = Text(f"\nToken received from \"{idp_id}\" IDP in {result.latency['token_ms']:.2f}ms, "
+                                  f"PASSED!\n", style="bold green")
         else:
-            self._logger.info(f"Failed to retrieved token from {idp_id} IDP!")
             token_response = Text(f"\nUnable to retrieve token from \"{idp_id}\" IDP, FAILED!\n", style="bold red")
 
         progress.log(token_response)
+        self.is_validated[idp_id] = received_token
         progress.advance(task)
-
-        return received_token
+        return result.finish(received_token)
+
+    # Gets a token for the SCIM client and reads one user and one group through the SCIM API
+    @traced("validate", arg_names=["scim_id"])
+    def validate_scim(self, scim_id, task, progress):
+        if not self._quiet:
+            progress.log(Panel.fit(Text(f"Validating SCIM Server: \"{scim_id}\"", style="bold cyan")))
+
+        result = self.__check_result("scim", scim_id)
+        scim = self._scim_prop[scim_id]
+        session = self.__idp_session(scim_id)
+        step = "token"
+        try:
+            start_time = time.perf_counter_ns()
+            token = idp_benchmark.fetch_token(session, scim["TOKEN_ENDPOINT"], scim["SCIM_CLIENT_ID"],
+                                              scim["SCIM_CLIENT_SECRET"], self.__idp_timeout())
+            result.latency["token_ms"] = (time.perf_counter_ns() - start_time) / 1000000
+            with self._idp_lock:
+                self._idp_tokens[scim_id] = token
+            for step in ["Users", "Groups"]:
+                start_time = time.perf_counter_ns()
+                idp_benchmark.scim_query(session, f"{self.__scim_url(scim_id)}/{step}", token, self.__idp_timeout())
+                result.latency[f"{step.lower()}_ms"] = (time.perf_counter_ns() - start_time) / 1000000
+            passed = True
+        except requests.RequestException as e:
+            self._logger.info(f"SCIM check of {scim_id} failed at {step}: {str(e)}")
+            result.error = f"SCIM {step} request failed: {str(e)}"
+            passed = False
+
+        if passed:
+            timings = ", ".join(f"{key[:-3]} {value:.2f}ms" for key, value in result.latency.items())
+            progress.log(Text(f"\nSCIM server \"{scim_id}\" answered ({timings}), PASSED!\n", style="bold green"))
+        else:
+            progress.log(Text(f"\n{result.error}, FAILED!\n", style="bold red"))
+        self.is_validated[scim_id] = passed
+        progress.advance(task)
+        return result.finish(passed)
+
+    # Adds a check for every IDP and SCIM server to the scheduler, returns the names of the scheduled checks
+    def schedule_all_idp(self, scheduler, task) -> list:
+        checks = []
+        if hasattr(self, "_idp_prop"):
+            checks.extend(scheduler.add(f"idp:{idp_id}", self.validate_idp, idp_id, task)
+                          for idp_id in self._idp_prop["_idp_ids"])
+        if hasattr(self, "_scim_prop"):
+            checks.extend(scheduler.add(f"scim:{scim_id}", self.validate_scim, scim_id, task)
+                          for scim_id in self._scim_prop["_scim_ids"])
+        return checks
+
+    # Runs a short load of token grants against every IDP that passed, and token grants plus /Users and /Groups
+    # queries against every SCIM server that passed. Servers are loaded one after the other.
+    # Returns {IDP or SCIM id: {request: OperationStats}}.
+    @traced("validate")
+    def benchmark_idp(self, progress, duration=idp_benchmark.DEFAULT_IDP_BENCHMARK_DURATION) -> dict:
+        loads = []
+        if hasattr(self, "_idp_prop"):
+            for idp_id in self._idp_prop["_idp_ids"]:
+                idp = self._idp_prop[idp_id]
+                loads.append((idp_id, {"token grant": functools.partial(
+                    idp_benchmark.fetch_token, self.__idp_session(idp_id), idp["TOKEN_ENDPOINT"], idp["CLIENT_ID"],
+                    idp["CLIENT_SECRET"], self.__idp_timeout())}))
+        if hasattr(self, "_scim_prop"):
+            for scim_id in self._scim_prop["_scim_ids"]:
+                scim = self._scim_prop[scim_id]
+                session = self.__idp_session(scim_id)
+                operations = {"token grant": functools.partial(
+                    idp_benchmark.fetch_token, session, scim["TOKEN_ENDPOINT"], scim["SCIM_CLIENT_ID"],
+                    scim["SCIM_CLIENT_SECRET"], self.__idp_timeout())}
+                for resource in ["Users", "Groups"]:
+                    operations[f"/{resource}"] = functools.partial(
+                        idp_benchmark.scim_query, session, f"{self.__scim_url(scim_id)}/{resource}",
+                        self._idp_tokens.get(scim_id), self.__idp_timeout())
+                loads.append((scim_id, operations))
+        loads = [(key, operations) for key, operations in loads if self.is_validated.get(key)]
+
+        results = {}
+        task = progress.add_task("[blue]Benchmark IDP", total=len(loads))
+        for key, operations in loads:
+            if not self._quiet:
+                progress.log(Panel.fit(Text(f"Benchmarking {key} with {self._idp_concurrency} concurrent requests "
+                                            f"for {duration} seconds", style="bold cyan")))
+                progress.log()
+            results[key] = idp_benchmark.run_load(operations, concurrency=self._idp_concurrency, duration=duration)
+            self.idp_benchmark_results[key] = {name: operation.to_dict() for name, operation in results[key].items()}
+            if not self._quiet:
+                progress.log(idp_benchmark.load_table(f"{key} Load", results[key]))
+                progress.log()
+            progress.advance(task)
+        return results
 
     # function to get all users needed to be searched if present in ldap
     def get_users(self):
         users_list = []
+        user_group_prop = getattr(self, "_user_group_prop", {})
 
         # Collect all users defined in user_group property file
-        if "FNCM_LOGIN_USER" in self._user_group_prop.keys():
-            users_list.append(self._user_group_prop["FNCM_LOGIN_USER"])
+        if "FNCM_LOGIN_USER" in user_group_prop.keys():
+            users_list.append(user_group_prop["FNCM_LOGIN_USER"])
 
-        if "ICN_LOGIN_USER" in self._user_group_prop.keys():
-            users_list.append(self._user_group_prop["ICN_LOGIN_USER"])
+        if "ICN_LOGIN_USER" in user_group_prop.keys():
+            users_list.append(user_group_prop["ICN_LOGIN_USER"])
 
-        if "CONTENT_INITIALIZATION_ENABLED" in self._user_group_prop.keys():
-            if self._user_group_prop["CONTENT_INITIALIZATION_ENABLED"]:
+        if "CONTENT_INITIALIZATION_ENABLED" in user_group_prop.keys():
+            if user_group_prop["CONTENT_INITIALIZATION_ENABLED"]:
                 for os_id in self._db_prop["_os_ids"]:
-                    users_list.extend(self._user_group_prop[os_id]["CPE_OBJ_STORE_OS_ADMIN_USER_GROUPS"])
+                    users_list.extend(user_group_prop[os_id]["CPE_OBJ_STORE_OS_ADMIN_USER_GROUPS"])
 
         # Collect all users for ICC for email
         if self.component_prop_present:
@@ -775,12 +1587,13 @@ class Validate:
     # function to get all groups needed to be searched if present in ldap
     def get_groups(self):
         groups_list = []
+        user_group_prop = getattr(self, "_user_group_prop", {})
 
         # Collect all groups defined in user_group property file
-        if "CONTENT_INITIALIZATION_ENABLED" in self._user_group_prop.keys():
-            if self._user_group_prop["CONTENT_INITIALIZATION_ENABLED"]:
+        if "CONTENT_INITIALIZATION_ENABLED" in user_group_prop.keys():
+            if user_group_prop["CONTENT_INITIALIZATION_ENABLED"]:
                 for os_id in self._db_prop["_os_ids"]:
-                    groups_list.extend(self._user_group_prop[os_id]["CPE_OBJ_STORE_OS_ADMIN_USER_GROUPS"])
+                    groups_list.extend(user_group_prop[os_id]["CPE_OBJ_STORE_OS_ADMIN_USER_GROUPS"])
 
         if self.component_prop_present:
             if "PERMISSIONS" in self._component_prop.keys():
@@ -816,7 +1629,20 @@ class Validate:
 
         return authenticated
 
+    # Returns the pooled connection for the ldap_id, binding a new one on first use.
+    # Callers must hold self._ldap_pool.lock(ldap_id) while using the connection.
     def get_ldap_connection(self, ldap_id, progress, ssl_enabled=False, cert_path=""):
+        with self._ldap_pool.lock(ldap_id):
+            conn = self._ldap_pool.get(ldap_id)
+            if conn is not None:
+                return True, conn
+
+            authenticated, conn = self.__bind_ldap_connection(ldap_id, progress, ssl_enabled, cert_path)
+            if authenticated:
+                self._ldap_pool.put(ldap_id, conn)
+            return authenticated, conn
+
+    def __bind_ldap_connection(self, ldap_id, progress, ssl_enabled=False, cert_path=""):
 
         server = remove_protocol(self._ldap_prop[ldap_id]["LDAP_SERVER"])
         port = self._ldap_prop[ldap_id]["LDAP_PORT"]
@@ -828,16 +1654,18 @@ class Validate:
 
         if ssl_enabled:
             try:
-                custom_ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
-                custom_ssl_context.load_verify_locations(cafile=cert_path)
+                # The SSL context of the host is shared with the resumption check, a reconnect resumes the session
+                ldap_host = server
                 server = ldap3.Server(server, port=int(port), use_ssl=True, get_info=ldap3.ALL,
-                                      tls=ldap3.Tls(validate=ssl.CERT_NONE, version=ssl.PROTOCOL_SSLv23,
-                                                    ca_certs_file=cert_path))
+                                      connect_timeout=self._connect_timeout,
+                                      tls=self._tls_sessions.ldap_tls(ldap_host, port, cert_path))
                 # Bind and search
-                conn = Connection(server, user=bind_dn, password=bind_dn_password)
+                conn = Connection(server, user=bind_dn, password=bind_dn_password, client_strategy=ldap3.ASYNC,
+                                  receive_timeout=self._LDAP_RECEIVE_TIMEOUT)
                 bind_response = conn.bind()
                 if not bind_response:
                     raise LDAPBindError()
+                self._tls_sessions.store(ldap_host, port, conn.socket, cert_path)
                 authenticated = True
                 return authenticated, conn
             except LDAPBindError as e:
@@ -863,11 +1691,13 @@ class Validate:
             try:
                 connect = f"ldap://{server}:{port}"
 
-                server = Server(connect, get_info=ALL)
+                server = Server(connect, get_info=ALL, connect_timeout=self._connect_timeout)
                 # username and password can be configured during openldap setup
                 conn = Connection(server,
                                   user=bind_dn,
-                                  password=bind_dn_password)
+                                  password=bind_dn_password,
+                                  client_strategy=ldap3.ASYNC,
+                                  receive_timeout=self._LDAP_RECEIVE_TIMEOUT)
                 bind_response = conn.bind()
                 if not bind_response:
                     raise LDAPBindError()
@@ -893,90 +1723,129 @@ class Validate:
                 authenticated = False
                 return authenticated, conn
 
-    # Validates if user is present in the LDAP
-    def ldap_user_search(self, ldap_id, progress, ssl_enabled=False, cert_path=""):
+    # Returns the users that are present in the LDAP
+    def ldap_user_search(self, ldap_id, progress, ssl_enabled=False, cert_path="") -> set:
+        return self.__ldap_name_search(ldap_id, progress, self._ldap_prop[ldap_id]["LC_USER_FILTER"], self._users_dict,
+                                ssl_enabled, cert_path, kind="users")
+
+    # Returns the groups that are present in the LDAP
+    def ldap_group_search(self, ldap_id, progress, ssl_enabled=False, cert_path="") -> set:
+        return self.__ldap_name_search(ldap_id, progress, self._ldap_prop[ldap_id]["LC_GROUP_FILTER"], self._groups_dict,
+                                ssl_enabled, cert_path, kind="groups")
+
+    # Answers the name lookups from the local LDAP index after bringing it up to date.
+    # Users are indexed under LDAP_BASE_DN, groups under LDAP_GROUP_BASE_DN when it is set.
+    # Returns the names found, None when the filter has no naming attribute or the index could not be refreshed.
+    def __ldap_index_search(self, ldap_id, progress, connect, name_filter, names, kind):
+        if not naming_attributes(name_filter):
+            return None
+        ldap = self._ldap_prop[ldap_id]
+        base_dn = (ldap.get("LDAP_GROUP_BASE_DN") or ldap["LDAP_BASE_DN"]) if kind == "groups" else ldap["LDAP_BASE_DN"]
+        fingerprint = ResultCache.fingerprint(remove_protocol(ldap["LDAP_SERVER"]), ldap["LDAP_PORT"], base_dn,
+                                              name_filter)
         try:
-            base_dn = self._ldap_prop[ldap_id]["LDAP_BASE_DN"]
-            user_filter = self._ldap_prop[ldap_id]["LC_USER_FILTER"]
-            user_name = self._ldap_prop[ldap_id]["LDAP_BIND_DN"]
-            password = self._ldap_prop[ldap_id]["LDAP_BIND_DN_PASSWORD"]
-
-            authenticated, connect = self.get_ldap_connection(ldap_id, progress, ssl_enabled, cert_path)
-
-            if authenticated:
-                for user in self._users_dict.keys():
-                    search_filter = user_filter.replace("%v", user)
-                    try:
-                        search_results = connect.search(search_base=base_dn, search_filter=search_filter)
-                    except Exception as e:
-                        self._logger.info(
-                            f"Error found in search function of ldap_search function in validation script --- {str(e)}")
-                        return
-                    if connect.entries:
-                        self._users_dict[user]["count"] += 1
-                        self._users_dict[user]["ldap_id"].append(ldap_id)
-
+            refresh = self._ldap_index.refresh(connect, ldap_id, kind, base_dn, name_filter, fingerprint)
         except Exception as e:
-            self._logger.info(f"Error found in ldap_search function in validation script --- {str(e)}")
+            self._logger.info(f"Unable to refresh the LDAP index of {ldap_id} {kind}, searching the server --- {str(e)}")
+            return None
 
-    # Validates if user is present in the LDAP
-    def ldap_group_search(self, ldap_id, progress, ssl_enabled=False, cert_path=""):
+        if refresh.mode == "dump":
+            message = f"dumped {refresh.entries} entries ({refresh.reason})"
+        elif refresh.mode == "incremental":
+            message = f"refreshed {refresh.entries} entries changed since the last run ({refresh.change_attribute})"
+        else:
+            message = "up to date"
+        progress.log(Text(f"LDAP index of {ldap_id} {kind}: {message} in {refresh.duration_s:.2f}s"))
+        with self._check_results_lock:
+            self._ldap_index_refreshes[(ldap_id, kind)] = refresh.to_dict()
+        return self._ldap_index.lookup(ldap_id, kind, name_filter, names)
+
+    # Looks up all names of names_dict with OR filters of up to ldap_batch_size names,
+    # names that cannot be mapped back from a batched result are searched one by one.
+    # Up to ldap_max_outstanding searches are sent to the server before waiting for the first answer.
+    # Returns the names found.
+    def __ldap_name_search(self, ldap_id, progress, name_filter, names_dict, ssl_enabled=False, cert_path="",
+                           kind="users") -> set:
+        found = set()
         try:
             base_dn = self._ldap_prop[ldap_id]["LDAP_BASE_DN"]
-            group_filter = self._ldap_prop[ldap_id]["LC_GROUP_FILTER"]
 
-            authenticated, connect = self.get_ldap_connection(ldap_id, progress, ssl_enabled, cert_path)
+            with self._ldap_pool.lock(ldap_id):
+                authenticated, connect = self.get_ldap_connection(ldap_id, progress, ssl_enabled, cert_path)
+                if not authenticated:
+                    return found
 
-            if authenticated:
-                for group in self._groups_dict.keys():
-                    search_filter = group_filter.replace("%v", group)
+                if self._ldap_index is not None:
+                    indexed = self.__ldap_index_search(ldap_id, progress, connect, name_filter, names_dict.keys(), kind)
+                    if indexed is not None:
+                        return indexed
+
+                try:
+                    found, unresolved = resolve_names(connect, base_dn, name_filter, names_dict.keys(),
+                                                      self._ldap_batch_size, self._ldap_max_outstanding)
+                except Exception as e:
+                    self._logger.info(f"Batched search failed on {ldap_id}, searching names one by one --- {str(e)}")
+                    found, unresolved = set(), list(names_dict.keys())
+
+                if unresolved:
                     try:
-                        search_results = connect.search(search_base=base_dn, search_filter=search_filter)
+                        found.update(search_names(connect, base_dn, name_filter, unresolved,
+                                                  self._ldap_max_outstanding))
                     except Exception as e:
                         self._logger.info(
                             f"Error found in search function of ldap_search function in validation script --- {str(e)}")
-                        return
-                    if connect.entries:
-                        self._groups_dict[group]["count"] += 1
-                        self._groups_dict[group]["ldap_id"].append(ldap_id)
 
         except Exception as e:
             self._logger.info(f"Error found in ldap_search function in validation script --- {str(e)}")
+        return found
 
     # Function to connect to ldap
-    def connect_to_server(self, host, port, progress, ssl=False, client_cert_file=None, pg = False):
-
-        # If SSL is enabled, create an SSL socket
-        # Create an SSL context
-        if ssl:
-            context = SSL.Context(SSL.SSLv23_METHOD)
-            context.set_cipher_list(self._CIPHERS)
-            context.set_min_proto_version(SSL.TLS1_2_VERSION)
-            if client_cert_file:
-                context.use_certificate_file(client_cert_file)
-
-            # Create an SSL socket
-            sock = socket()
-            conn = SSL.Connection(context, sock)
-        else:
-            conn = socket()
-
+    # When a timings dict is passed, the duration of every phase in CONNECTION_PHASES that was reached is stored
+    # in it in nanoseconds. Each network operation has to finish within the connect timeout.
+    # First byte is only timed for LDAP, whose server answers a root DSE search before any bind.
+    def connect_to_server(self, host, port, progress, ssl=False, client_cert_file=None, pg = False, timings=None,
+                          ldap=False):
+        timings = timings if timings is not None else {}
+        connect_timeout = self._connect_timeout
+        conn = None
         connected = False
+        phase = "dns_ns"
         try:
-            start_time = time.time()
-            conn.connect((host, port))
-            end_time = time.time()
-            
-            if ssl:
+            start_time = time.perf_counter_ns()
+            addresses = self.__resolve(host, port, connect_timeout)
+            timings["dns_ns"] = time.perf_counter_ns() - start_time
+
+            phase = "connect_ns"
+            sock, timings["connect_ns"] = self.__connect_first(addresses, connect_timeout)
+            conn = sock
+
+            if pg and ssl:
                 # Postgres requires protocal negotiation before SSL since everything's on same port
-                # https://www.postgresql.org/docs/current/protocol-flow.html#PROTOCOL-FLOW-SSL
-                if pg:
-                    version_ssl = struct.pack('!I', 1234 << 16 | 5679)
-                    length = struct.pack('!I', 8)
-                    packet = length + version_ssl
-                    sock.sendall(packet)
-                    sock.recv(1)
-                conn.do_handshake()
+                phase = "negotiate_ns"
+                start_time = time.perf_counter_ns()
+                sock.sendall(PG_SSL_REQUEST)
+                answer = sock.recv(1)
+                if answer != b"S":
+                    raise ConnectionError(f"Server does not accept SSL connections (answered {answer!r})")
+                timings["negotiate_ns"] = time.perf_counter_ns() - start_time
+
+            if ssl:
+                # If SSL is enabled, create an SSL socket
+                # Create an SSL context
+                phase = "handshake_ns"
+                conn = SSL.Connection(self.__openssl_context(host, client_cert_file), sock)
+                if not self.__is_ip_address(host):
+                    conn.set_tlsext_host_name(host.encode("idna"))
+                conn.set_connect_state()
+                start_time = time.perf_counter_ns()
+                self.__ssl_io(conn.do_handshake, sock, time.monotonic() + connect_timeout)
+                timings["handshake_ns"] = time.perf_counter_ns() - start_time
+
+            if ldap:
+                phase = "first_byte_ns"
+                start_time = time.perf_counter_ns()
+                self.__first_byte(conn, sock, ssl, time.monotonic() + connect_timeout)
+                timings["first_byte_ns"] = time.perf_counter_ns() - start_time
             connected = True
 
         # Now you can perform LDAP operations using 'conn' if needed
@@ -985,47 +1854,161 @@ class Validate:
                 f"Hostname \"{host}\" is not known.\n"
                 f"Please review the Property Files for all SERVERNAME parameters", style="bold red")
 
+            timings["error"] = message.plain.strip()
+            progress.log(message)
+            progress.log()
+            return conn, 0, connected
+        except (socket_timeout, FutureTimeoutError):
+            message = Text(f"Connection to \"{host}:{port}\" timed out after {connect_timeout} seconds "
+                           f"during {CONNECTION_PHASES[phase]}", style="bold red")
+            timings["error"] = message.plain.strip()
             progress.log(message)
             progress.log()
             return conn, 0, connected
         except Exception as e:
-            if type(e.args) == list:
-                if e.args[0][0][0] == 'SSL routines' and e.args[0][0][2] == 'sslv3 alert handshake failure':
-                    message = Text(
-                        f"SSL protocol used: \"{conn.get_protocol_version_name()}\", is not supported by the server!\n"
-                        f"Please review below list of supported protocols:\n"
-                        f" - \"TLSv1.2\"\n"
-                        f" - \"TLSv1.3\"", style="bold red")
+            if isinstance(e, SSL.Error) and e.args and isinstance(e.args[0], list) and e.args[0] \
+                    and e.args[0][0][2] == 'sslv3 alert handshake failure':
+                message = Text(
+                    f"SSL protocol used: \"{conn.get_protocol_version_name()}\", is not supported by the server!\n"
+                    f"Please review below list of supported protocols:\n"
+                    f" - \"TLSv1.2\"\n"
+                    f" - \"TLSv1.3\"", style="bold red")
             else:
                 message = Text(f"Connection Error: {e}", style="bold red")
 
+            timings["error"] = message.plain.strip()
             progress.log(message)
             progress.log()
             return conn, 0, connected
 
-        # Calculate RTT and format to milliseconds
-        rtt = (end_time - start_time) * 1000
+        # Calculate RTT of the TCP connect and format to milliseconds
+        rtt = timings["connect_ns"] / 1000000
 
         return conn, rtt, connected
 
+    # pyOpenSSL context for the host, created once per host and certificate file
+    def __openssl_context(self, host, client_cert_file=None):
+        with self._openssl_contexts_lock:
+            key = (host, client_cert_file or "")
+            if key not in self._openssl_contexts:
+                context = SSL.Context(SSL.SSLv23_METHOD)
+                context.set_cipher_list(self._CIPHERS)
+                context.set_min_proto_version(SSL.TLS1_2_VERSION)
+                if client_cert_file:
+                    context.use_certificate_file(client_cert_file)
+                self._openssl_contexts[key] = context
+            return self._openssl_contexts[key]
+
+    @staticmethod
+    def __is_ip_address(host) -> bool:
+        try:
+            ipaddress.ip_address(host)
+            return True
+        except ValueError:
+            return False
+
+    # Uses the addresses found by resolve_hostnames, otherwise resolves the host in a separate thread,
+    # getaddrinfo itself cannot be given a timeout
+    def __resolve(self, host, port, connect_timeout) -> list:
+        addresses = self._dns.addresses(str(host).strip(), port)
+        if addresses is not None:
+            return addresses
+        future = Future()
+
+        def lookup():
+            try:
+                future.set_result(getaddrinfo(host, port, type=SOCK_STREAM))
+            except Exception as e:
+                future.set_exception(e)
+
+        threading.Thread(target=lookup, name=f"resolve-{host}", daemon=True).start()
+        return future.result(timeout=connect_timeout)
+
+    # Connects to the resolved addresses in order, returns the connected socket and the TCP connect time
+    @staticmethod
+    def __connect_first(addresses, connect_timeout):
+        error = None
+        for family, sock_type, proto, _, address in addresses:
+            sock = socket(family, sock_type, proto)
+            sock.settimeout(connect_timeout)
+            try:
+                start_time = time.perf_counter_ns()
+                sock.connect(address)
+                return sock, time.perf_counter_ns() - start_time
+            except OSError as e:
+                sock.close()
+                error = e
+        raise error if error else OSError("No address found")
+
+    # Runs an SSL operation on a socket that has a timeout, waiting for the socket whenever OpenSSL needs more data
+    @staticmethod
+    def __ssl_io(operation, sock, deadline):
+        while True:
+            try:
+                return operation()
+            except (SSL.WantReadError, SSL.WantWriteError) as e:
+                remaining = deadline - time.monotonic()
+                want_read = isinstance(e, SSL.WantReadError)
+                ready = select.select([sock] if want_read else [], [] if want_read else [sock], [],
+                                      max(0, remaining))
+                if remaining <= 0 or not any(ready):
+                    raise socket_timeout("timed out")
+
+    # Sends the root DSE search and waits for the first byte of the answer
+    def __first_byte(self, conn, sock, ssl, deadline):
+        if ssl:
+            self.__ssl_io(lambda: conn.sendall(_LDAP_ROOT_DSE_REQUEST), sock, deadline)
+            answer = self.__ssl_io(lambda: conn.recv(1), sock, deadline)
+            self.__ssl_io(lambda: conn.sendall(_LDAP_UNBIND_REQUEST), sock, deadline)
+        else:
+            sock.sendall(_LDAP_ROOT_DSE_REQUEST)
+            answer = sock.recv(1)
+            sock.sendall(_LDAP_UNBIND_REQUEST)
+        if not answer:
+            raise ConnectionError("Connection closed by the server before it answered")
+
     # Validates a single LDAP, defaults to the first one by its id: "LDAP"
-    def validate_server(self, progress, server, port, ssl_enabled=False, cert_path="", display_rtt=True, pg = False):
+    @traced("validate", arg_names=["server", "port"])
+    def validate_server(self, progress, server, port, ssl_enabled=False, cert_path="", display_rtt=True, pg = False,
+                        ldap=False):
         connected = False
 
         progress.log(Text(f"Validating Server \"{server}\" Reachability"))
         progress.log()
 
+        swept = self._sweep_results.get(f"{str(server).strip()}:{str(port).strip()}")
+        if swept is not None and swept.reachable is False:
+            message = Text(f"\nReachability to \"{server}\" failed in the reachability sweep: {swept.error}\n"
+                           f"Please check configuration in Property Files", style="bold red")
+            with self._check_results_lock:
+                self._endpoint_results[f"{server}:{port}"] = {"error": f"Unreachable: {swept.error}"}
+            progress.log(message)
+            progress.log()
+            return False
+
         # Test for SSL connections
         # Return a connection object, RTT and a boolean indicating if the connection was successful
+        timings = {}
         if ssl_enabled:
-            conn_result, rtt, connected = self.connect_to_server(server, int(port), progress, True, cert_path, pg)
+            conn_result, rtt, connected = self.connect_to_server(server, int(port), progress, True, cert_path, pg,
+                                                                 timings=timings, ldap=ldap)
         else:
-            conn_result, rtt, connected = self.connect_to_server(server, int(port), progress)
+            conn_result, rtt, connected = self.connect_to_server(server, int(port), progress, timings=timings,
+                                                                 ldap=ldap)
 
         # Construct the message to be displayed
         # If the SSL connection was successful, display the cipher
         # If connection is successful display the RTT
         # RTT display can be disabled by setting display_rtt to False (RTT for Database is calculated through JDBC driver)
+        endpoint = {"error": timings.get("error"),
+                    "phases_ms": {phase[:-len("_ns")]: timings[phase] / 1000000
+                                  for phase in CONNECTION_PHASES if phase in timings}}
+        if connected and ssl_enabled:
+            endpoint["tls_protocol"] = conn_result.get_protocol_version_name()
+            endpoint["tls_cipher"] = conn_result.get_cipher_name()
+        with self._check_results_lock:
+            self._endpoint_results[f"{server}:{port}"] = endpoint
+
         if connected:
             if ssl_enabled:
                 message = Text(f"\nReachability to \"{server}\" succeeded over SSL!\n", style="bold green")
@@ -1034,15 +2017,21 @@ class Validate:
                 progress.log()
 
                 # If SSL connections was successful, then cipher passed
-                self.output_cipher(conn_result.get_cipher_name(),
-                                   conn_result.get_protocol_version_name(), progress)
+                self.output_cipher(endpoint["tls_cipher"], endpoint["tls_protocol"], progress)
+
+                resumption = self._tls_sessions.measure_resumption(server, int(port), cert_path or None,
+                                                                   self._connect_timeout, pg)
+                endpoint["tls_resumption"] = resumption.to_dict()
+                self.output_resumption(resumption, progress)
             else:
                 message = Text(f"\nReachability to \"{server}\" succeeded!\n", style="bold green")
                 progress.log(message)
                 progress.log()
 
+            self.output_phases(timings, progress)
+            latency = self.__sample_server_latency(server, int(port), timings, ssl_enabled, cert_path, pg, progress)
             if display_rtt:
-                self.output_latency(rtt, progress, "LDAP")
+                self.output_latency(latency if len(latency) > 1 else rtt, progress, "LDAP")
         else:
             message = Text(f"\nReachability to \"{server}\" failed!\n"
                            f"Please check configuration in Property Files", style="bold red")
@@ -1062,10 +2051,48 @@ class Validate:
         progress.log(message)
         progress.log()
 
+    # Output whether the server resumes TLS sessions and how much it saves
+    @staticmethod
+    def output_resumption(resumption, progress):
+        if resumption.error:
+            progress.log(Text(f"TLS session resumption could not be checked: {resumption.error}\n", style="bold yellow"))
+        elif resumption.supported:
+            saved = 100 - resumption.resumed_ms * 100 / resumption.full_ms if resumption.full_ms else 0
+            progress.log(Text("TLS session resumption is supported: full handshake {:.2f}ms, resumed handshake "
+                              "{:.2f}ms ({:.0f}% faster)\n".format(resumption.full_ms, resumption.resumed_ms, saved),
+                              style="bold green"))
+        else:
+            progress.log(Text("TLS session resumption is not supported by the server, every reconnect of a "
+                              "connection pool needs a full handshake ({:.2f}ms)\n".format(resumption.full_ms),
+                              style="bold yellow"))
+
+    # Output the duration of every connection phase and which one took the longest
+    @staticmethod
+    def output_phases(timings, progress):
+        phases = [(CONNECTION_PHASES[phase], timings[phase] / 1000000) for phase in CONNECTION_PHASES
+                  if phase in timings]
+        total = sum(duration for _, duration in phases)
+        if not phases or total <= 0:
+            return
+
+        progress.log(Text("Connection Phases: " + ", ".join("{} {:.2f}ms".format(name, duration)
+                                                             for name, duration in phases)))
+        name, duration = max(phases, key=lambda item: item[1])
+        progress.log(Text("Slowest Phase: {} ({:.0f}% of {:.2f}ms)".format(name, duration * 100 / total, total),
+                          style="bold"))
+        progress.log()
+
     # Output latency for the supplied connection
     @staticmethod
+    # rtt is either a single round trip time in milliseconds or LatencyStats, whose p95 is checked
     def output_latency(rtt, progress, type="LDAP"):
 
+        label = "Detected Connection Latency"
+        if isinstance(rtt, LatencyStats):
+            progress.log(Text(f"Connection Latency: {rtt.summary()}"))
+            label = "Detected Connection Latency (p95)"
+            rtt = rtt.p95
+
         if type == "LDAP":
             max_time = 300
             min_time = 100
@@ -1076,20 +2103,99 @@ class Validate:
         if rtt < min_time:
             message = f"Acceptable Latency Range: 0ms - {min_time}ms"
             style = "bold green"
-        elif min_time < rtt < max_time:
+        elif min_time <= rtt < max_time:
             message = f"Performance Degradation Latency Range: {min_time}ms - {max_time}ms"
             style = "bold yellow"
         else:
             message = f"Potential Failure Latency Range: > {max_time}ms"
             style = "bold red"
 
-        progress.log(Text("Detected Connection Latency: {:.2f}ms ".format(rtt), style=style))
+        progress.log(Text("{}: {:.2f}ms ".format(label, rtt), style=style))
         progress.log(Text(message, style=style))
         progress.log()
 
+    # Times additional connections to the server when more than one latency sample is requested.
+    # The samples are kept in latency_results, the TCP connect statistics are returned.
+    def __sample_server_latency(self, server, port, timings, ssl_enabled, cert_path, pg, progress) -> LatencyStats:
+        connect_samples = [timings["connect_ns"]]
+        handshake_samples = [timings["handshake_ns"]] if "handshake_ns" in timings else []
+
+        for _ in range(self._latency_samples - 1):
+            sample = {}
+            conn, _, connected = self.connect_to_server(server, port, progress, ssl_enabled, cert_path, pg,
+                                                        timings=sample)
+            try:
+                conn.close()
+            except Exception:
+                pass
+            if connected:
+                connect_samples.append(sample["connect_ns"])
+                if "handshake_ns" in sample:
+                    handshake_samples.append(sample["handshake_ns"])
+
+        connect_latency = LatencyStats(connect_samples)
+        result = {"tcp_connect": connect_latency.to_dict()}
+        if handshake_samples:
+            handshake_latency = LatencyStats(handshake_samples)
+            result["tls_handshake"] = handshake_latency.to_dict()
+            if len(handshake_latency) > 1:
+                progress.log(Text(f"TLS Handshake Latency: {handshake_latency.summary()}"))
+        with self._latency_lock:
+            self.latency_results[f"{server}:{port}"] = result
+        return connect_latency
+
+    # Times additional JDBC connections through the connection daemon when more than one latency sample is requested
+    def __sample_db_latency(self, db_label, roundtriptime, connection_request) -> LatencyStats:
+        samples = [roundtriptime]
+        daemon = self.__get_connection_daemon() if self._latency_samples > 1 else None
+        if daemon:
+            for _ in range(self._latency_samples - 1):
+                result = daemon.check_connection(timeout=self._DB_CONNECTION_TIMEOUT, **connection_request)
+                if result.connected:
+                    samples.append(result.rtt_ms)
+
+        latency = LatencyStats.from_ms(samples)
+        with self._latency_lock:
+            self.latency_results[db_label] = {"jdbc_connect": latency.to_dict()}
+        return latency
+
+    # Returns the shared connection daemon, starting it on first use.
+    # Returns None when the daemon cannot be started in this environment.
+    def __get_connection_daemon(self):
+        with self._connection_daemon_lock:
+            if self._connection_daemon is None:
+                java_options = [f"-Dsemeru.fips={self.fips_enabled}", "-Duser.language=en", "-Duser.country=US"]
+                if self._db_prop["DATABASE_TYPE"] == "postgresql":
+                    java_options.append("-Dcom.ibm.jsse2.overrideDefaultTLS=true")
+                daemon = ConnectionDaemon(self._logger, class_path=[self._DB_JDBC_PATH],
+                                          build_dir=os.path.join(self.__create_tmp_folder(), "daemon"),
+                                          java_options=java_options)
+                self._connection_daemon = daemon if daemon.start() else False
+            return self._connection_daemon if self._connection_daemon else None
+
+    # Test DB connection through the connection daemon, falls back to one JVM per check with the JAR
+    # Returns whether the connection succeeded and the round trip time in milliseconds
+    def __check_connection(self, jar_cmd, connection_request, progress):
+        self.__check_java()
+        daemon = self.__get_connection_daemon()
+        if not daemon:
+            return self.__check_connection_with_jar(jar_cmd, progress)
+
+        result = daemon.check_connection(timeout=self._DB_CONNECTION_TIMEOUT, **connection_request)
+        if result.connected:
+            self.roundtriptime = result.rtt_ms
+            return True, result.rtt_ms
+
+        self._logger.info(result.message)
+        progress.log()
+        progress.log((Syntax(result.message, "java", theme="ansi_dark")))
+        return False, 0
+
     # Use JAR to test DB connection
+    # Returns whether the connection succeeded and the round trip time reported by the JAR
     def __check_connection_with_jar(self, jar_cmd, progress):
         self.__check_java()
+        roundtriptime = 0
         try:
             if platform.system() == 'Windows':
                 output = subprocess.check_output(["powershell.exe", jar_cmd], shell=True, stderr=subprocess.PIPE, universal_newlines=True)
@@ -1098,175 +2204,322 @@ class Validate:
             round_trip_statement = output.split("Round Trip time:")[1]
             match = re.search(r'([\d.]+)', round_trip_statement)
             if match:
-                self.roundtriptime = float(match.group(1))
+                roundtriptime = float(match.group(1))
+                self.roundtriptime = roundtriptime
 
-            return True
+            return True, roundtriptime
         except subprocess.CalledProcessError as error:
             self._logger.info(error.stderr)
             progress.log()
             progress.log((Syntax(str(error.stderr), "java", theme="ansi_dark")))
-            return False
+            return False, roundtriptime
+
+    # Endpoints of every datasource and LDAP as (target, server, port, ssl_enabled, cert_path, pg, ldap),
+    # datasources sharing a server and port are listed once
+    def monitor_endpoints(self) -> list:
+        endpoints = {}
+        if hasattr(self, "_db_prop"):
+            ssl_enabled = self._db_prop['DATABASE_SSL_ENABLE']
+            for db_label in self.get_db_labels():
+                for role, db_servername, db_port in self.__db_addresses(db_label):
+                    label = db_label if role == "primary" else f"{db_label} {role}"
+                    endpoints.setdefault((db_servername, str(db_port)),
+                                         (label, db_servername, int(db_port), ssl_enabled, "",
+                                          self._db_prop['DATABASE_TYPE'] == 'postgresql', False))
+        if hasattr(self, "_ldap_prop"):
+            for ldap_id in self._ldap_prop["_ldap_ids"]:
+                ldap_host = remove_protocol(self._ldap_prop[ldap_id]["LDAP_SERVER"])
+                ldap_port = self._ldap_prop[ldap_id]["LDAP_PORT"]
+                ssl_enabled = self._ldap_prop[ldap_id]["LDAP_SSL_ENABLED"]
+                cert_path = self.__get_file_from_folder(
+                    os.path.join(os.getcwd(), "propertyFile", "ssl-certs", ldap_id.lower()),
+                    [".crt", ".cer", ".pem", ".cert", ".key", ".arm"]) if ssl_enabled else ""
+                endpoints.setdefault((ldap_host, str(ldap_port)),
+                                     (ldap_id, ldap_host, int(ldap_port), ssl_enabled, cert_path, False, True))
+        return list(endpoints.values())
+
+    # Reachability probe without console output, used by the monitor.
+    # Returns the timings of connect_to_server plus the TLS protocol, cipher and certificate expiry (epoch seconds).
+    def probe_server(self, server, port, ssl_enabled=False, cert_path="", pg=False, ldap=False) -> dict:
+        timings = {}
+        conn, _, connected = self.connect_to_server(server, int(port), NullProgress(), ssl_enabled,
+                                                    cert_path if ssl_enabled else None, pg, timings=timings,
+                                                    ldap=ldap)
+        try:
+            if connected and ssl_enabled:
+                timings["tls_protocol"] = conn.get_protocol_version_name()
+                timings["tls_cipher"] = conn.get_cipher_name()
+                certificate = conn.get_peer_certificate()
+                if certificate is not None and certificate.get_notAfter():
+                    not_after = time.strptime(certificate.get_notAfter().decode("ascii"), "%Y%m%d%H%M%SZ")
+                    timings["cert_not_after"] = calendar.timegm(not_after)
+        finally:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        timings["connected"] = connected
+        return timings
+
+    # JDBC connection probe through the connection daemon, used by the monitor.
+    # Returns the ConnectionResult, None when the daemon cannot run here so no JVM is started per probe.
+    def probe_db(self, db_label):
+        daemon = self.__get_connection_daemon()
+        if not daemon:
+            return None
+        _, connection_request = self.__build_db_connection(db_label)
+        return daemon.check_connection(timeout=self._DB_CONNECTION_TIMEOUT, **connection_request)
+
+    # Rebinds the pooled LDAP connection and reads the base DN, used by the monitor.
+    # A new connection is only bound when there is no usable pooled one.
+    # Returns {"bind_ns", "search_ns"} for the steps that succeeded and "error" when one failed.
+    def probe_ldap(self, ldap_id) -> dict:
+        ssl_enabled = self._ldap_prop[ldap_id]["LDAP_SSL_ENABLED"]
+        cert_path = ""
+        if ssl_enabled:
+            cert_path = self.__get_file_from_folder(
+                os.path.join(os.getcwd(), "propertyFile", "ssl-certs", ldap_id.lower()),
+                [".crt", ".cer", ".pem", ".cert", ".key", ".arm"])
+
+        timings = {}
+        with self._ldap_pool.lock(ldap_id):
+            conn = self._ldap_pool.get(ldap_id)
+            start_time = time.perf_counter_ns()
+            try:
+                if conn is None:
+                    authenticated, conn = self.get_ldap_connection(ldap_id, NullProgress(), ssl_enabled, cert_path)
+                elif not conn.rebind():
+                    raise LDAPBindError()
+                else:
+                    authenticated = True
+            except Exception as e:
+                self._logger.info(f"LDAP bind probe failed for {ldap_id}: {str(e)}")
+                authenticated = False
+            if not authenticated:
+                self._ldap_pool.put(ldap_id, None)
+                timings["error"] = f"Unable to bind with \"{self._ldap_prop[ldap_id]['LDAP_BIND_DN']}\""
+                return timings
+            timings["bind_ns"] = time.perf_counter_ns() - start_time
+
+            start_time = time.perf_counter_ns()
+            try:
+                if read_entry(conn, self._ldap_prop[ldap_id]["LDAP_BASE_DN"]):
+                    timings["search_ns"] = time.perf_counter_ns() - start_time
+                else:
+                    timings["error"] = f"Base DN \"{self._ldap_prop[ldap_id]['LDAP_BASE_DN']}\" not found"
+            except Exception as e:
+                self._ldap_pool.put(ldap_id, None)
+                timings["error"] = f"LDAP search failed: {str(e)}"
+        return timings
 
     def get_unique_storageclass(self) -> set:
         sc_set = {self._deploy_prop["SLOW_FILE_STORAGE_CLASSNAME"], self._deploy_prop["MEDIUM_FILE_STORAGE_CLASSNAME"],
                   self._deploy_prop["FAST_FILE_STORAGE_CLASSNAME"]}
         return sc_set
 
+    def validate_storage_class(self, storage_class, task2, progress):
+        return self.validate_storage_classes([storage_class], task2, progress)
+
     def validate_all_storage_classes(self, task2, progress):
         # Uses a set to skip checked the same storage class twice
-        sc_set = self.get_unique_storageclass()
-
-        for storage_class in sc_set:
-            progress.log(Panel.fit(Text(f"Validating storage class: {storage_class}", style="bold cyan")))
-            self.validate_sample_sc(storage_class, "ReadWriteMany", "fncm-test-pvc", task2, progress)
-
-    def __check_pvc_liveliness(self, sample_pvc_name, task2, progress):  # Create new temp yaml sample
-        # 30 attempts, 10 seconds each; total ~300 seconds / 5 mins
-        TIMEOUT_ATTEMPTS = 30
-        SLEEP_TIMER = 10
-
-        if platform.system() == 'Windows':
-            kubectl_cmd = f"kubectl get pvc | findstr {sample_pvc_name} | findstr \"Bound\""
-        else:
-            kubectl_cmd = f"kubectl get pvc | grep {sample_pvc_name}| grep -q -m 1 \"Bound\""
-        
-        for i in range(TIMEOUT_ATTEMPTS):
-            progress.log(f"\nChecking for {sample_pvc_name} liveness - Attempt {i + 1}/{TIMEOUT_ATTEMPTS}\n")
-            validated = True
-            try:
-                subprocess.check_output(kubectl_cmd, shell=True, stderr=subprocess.PIPE, universal_newlines=True)
-            except subprocess.CalledProcessError as error:
-                # If cannot find pvc in bound PVC grep, validation is not complete
-                # and will keep waiting
-                if "returned non-zero exit status 1" in str(error):
-                    validated = False
-                    progress.log(Text(f"\n\"{sample_pvc_name}\" not yet found, waiting {SLEEP_TIMER} seconds to retry"))
-                    time.sleep(SLEEP_TIMER)
-                else:
-                    self._logger.exception(error)
+        return self.validate_storage_classes(sorted(self.get_unique_storageclass()), task2, progress)
+
+    # Adds the storage class check to the scheduler, returns the names of the scheduled checks
+    def schedule_all_storage_classes(self, scheduler, task2) -> list:
+        return [scheduler.add("storage_classes", self.validate_all_storage_classes, task2)]
+
+    # Creates a sample PVC for every storage class at once and follows all of them through one watch,
+    # each storage class passes as soon as its PVC is bound
+    @traced("validate", arg_names=["sc_names"])
+    def validate_storage_classes(self, sc_names, task2, progress):
+        # 300 seconds / 5 mins for all PVCs together
+        PVC_TIMEOUT = 300
+
+        results = {}
+        for sc_name in sc_names:
+            results[sc_name] = self.__check_result("storage_class", sc_name)
+            if not self._quiet:
+                progress.log(Panel.fit(Text(f"Validating storage class: {sc_name}", style="bold cyan")))
+
+        existing_classes = self.__get_storage_classes(progress)
+        sample_pvcs = {}
+        for sc_name in sc_names:
+            if existing_classes is not None:
+                if sc_name in existing_classes:
                     progress.log()
-                    progress.log(f"Error occurred while when checking \"{sample_pvc_name}\" liveness")
+                    progress.log(Text(f"Verification for Storage Class: \"{sc_name}\" PASSED!\n", style="bold green"))
+                else:
+                    self._logger.info(f"Failed to find storage class: \"{sc_name}\"!\n")
                     progress.log()
-                    progress.log(Syntax(str(error.stderr), "bash", theme="ansi_dark"))
-            if validated:
+                    progress.log(Text(f"Failed to find storage class: \"{sc_name}\"!\n", style="bold red"))
+                    self.is_validated[sc_name] = False
+                    results[sc_name].finish(False, f"Failed to find storage class: \"{sc_name}\"")
+                    progress.advance(task2)
+                    continue
+            # Unique names so that the sample PVCs do not clash with each other or with leftovers of earlier runs
+            sample_pvcs[f"fncm-test-pvc-{sc_name}"[:244] + "-" + uuid.uuid4().hex[:8]] = sc_name
+
+        if not sample_pvcs:
+            return all(self.is_validated.get(sc_name, False) for sc_name in sc_names)
+
+        watch = PvcWatch(self._logger, self._kube)
+        watch.start()
+        try:
+            sc_template = string.Template((open(self._STORAGE_CLASS_TEMPLATE_YAML, encoding='UTF-8')).read())
+            manifest = "\n".join(sc_template.safe_substitute(sc_name=sc_name,
+                                                              sc_mode="ReadWriteMany",
+                                                              sample_pvc_name=sample_pvc_name)
+                                 for sample_pvc_name, sc_name in sample_pvcs.items())
+            self.kube_apply_manifest(manifest)
+            for sample_pvc_name, sc_name in sample_pvcs.items():
+                progress.log()
+                progress.log(f"Sample PVC \"{sample_pvc_name}\" created with storage class: {sc_name}")
+
+            def pvc_bound(sample_pvc_name):
+                results[sample_pvcs[sample_pvc_name]].finish(True)
                 progress.log()
                 progress.log(Text(f"Verification for PVC: \"{sample_pvc_name}\" PASSED!\n", style="bold green"))
                 progress.advance(task2)
-                return True
-        # Passed 60 seconds and all attempts, still cannot find PVC
-        self._logger.info(f"Failed to allocate the persistent volumes using PVC: \"{sample_pvc_name}\"!")
-        progress.log()
-        progress.log(Text(f"Failed to allocate PVC: \"{sample_pvc_name}\"!", style="bold red"))
-        progress.advance(task2)
-        return False
 
-    # Creates a storage class yaml to apply
-    def validate_sample_sc(self, sc_name, sc_mode, sample_pvc_name, task2, progress):
-        # check if storage class is present
-        kubectl_cmd = f"kubectl get storageclasses -o custom-columns=:metadata.name"
-        validated = True
-        try:
-            output = subprocess.check_output(kubectl_cmd, shell=True, stderr=subprocess.PIPE, universal_newlines=True)
-            storage_classes = output.strip().split('\n')
-            if sc_name in storage_classes:
-                validated = True
-            else:
-                validated = False
-
-            if validated:
+            progress.log(f"\nWaiting up to {PVC_TIMEOUT} seconds for the sample PVCs to be bound\n")
+            bound = watch.wait_for_bound(list(sample_pvcs.keys()), time.monotonic() + PVC_TIMEOUT, pvc_bound)
+        finally:
+            watch.stop()
+            self.kube_delete_pvcs(list(sample_pvcs.keys()))
+
+        for sample_pvc_name, sc_name in sample_pvcs.items():
+            self.is_validated[sc_name] = bound[sample_pvc_name]
+            if not bound[sample_pvc_name]:
+                # Passed the deadline and still not bound
+                self._logger.info(f"Failed to allocate the persistent volumes using PVC: \"{sample_pvc_name}\"!")
                 progress.log()
-                progress.log(Text(f"Verification for Storage Class: \"{sc_name}\" PASSED!\n", style="bold green"))
-            if not validated:
-                self._logger.info(f"Failed to find storage class: \"{sc_name}\"!\n")
-                progress.log()
-                progress.log(Text(f"Failed to find storage class: \"{sc_name}\"!\n", style="bold red"))
-                self.is_validated[sc_name] = False
+                progress.log(Text(f"Failed to allocate PVC: \"{sample_pvc_name}\"!", style="bold red"))
+                results[sc_name].finish(False, f"Failed to allocate PVC: \"{sample_pvc_name}\" "
+                                               f"within {PVC_TIMEOUT} seconds")
                 progress.advance(task2)
-                return self.is_validated[sc_name]
 
-        except subprocess.CalledProcessError as error:
+        return all(self.is_validated.get(sc_name, False) for sc_name in sc_names)
+
+    # Returns the names of the storage classes in the cluster, None if they could not be listed
+    def __get_storage_classes(self, progress):
+        self.__check_kubectl()
+        try:
+            return self._kube.list_names("storage.k8s.io/v1", "StorageClass")
+        except KubeError as error:
             self._logger.info(error)
             progress.log()
-            progress.log(f"Error occurred while validating \"{sc_name}\"\n"
-                         f"Sample PVC will still be created, without storage class check!", style="bold yellow")
-            validated = False
-
-        # remove existing temp file if previously not removed
-        sample_yaml_path = os.path.join(self.__create_tmp_folder(), sc_name + ".yaml")
-
-        if os.path.exists(sample_yaml_path):
-            self._logger.info("Temporary yaml file exists and will be removed before a new file is created")
-            os.remove(sample_yaml_path)
-
-        # Writing storage class vars to sample file
-        sc_template = string.Template((open(self._STORAGE_CLASS_TEMPLATE_YAML, encoding='UTF-8')).read())
-        finished_output = sc_template.safe_substitute(sc_name=sc_name,
-                                                      sc_mode=sc_mode,
-                                                      sample_pvc_name=sample_pvc_name)
-        with open(sample_yaml_path, "w", encoding='UTF-8') as output:
-            output.write(finished_output)
-
-        self.kubectl_apply(sample_yaml_path)
-        progress.log()
-        progress.log(f"Sample PVC created with storage class: {sc_name}")
-        self.is_validated[sc_name] = self.__check_pvc_liveliness(sample_pvc_name, task2, progress)
-        self.kubectl_delete(sample_yaml_path)
-
-        os.remove(sample_yaml_path)
+            progress.log(f"Error occurred while listing storage classes\n"
+                         f"Sample PVCs will still be created, without storage class check!", style="bold yellow")
+            return None
 
-        return self.is_validated[sc_name]
-
-    def kubectl_apply(self, yaml_path):
+    # Applies the yaml passed in without writing it to a file
+    def kube_apply_manifest(self, manifest):
         self.__check_kubectl()
-        kubectl_cmd = "kubectl apply -f \"" + yaml_path + "\""
         response = None
         try:
-            response = subprocess.check_output(kubectl_cmd, shell=True, stderr=subprocess.PIPE, universal_newlines=True)
-        except subprocess.CalledProcessError as error:
-            if "metadata.resourceVersion" in str(error.stderr):
-                kubectl_cmd = "kubectl replace -f \"" + yaml_path + "\""
-                response = subprocess.check_output(kubectl_cmd, shell=True, stderr=subprocess.PIPE,
-                                                   universal_newlines=True)
-            else:
-                self._logger.exception(
-                    f"Exception applying '{yaml_path}' -  {str(error.stderr)}")
+            response = self._kube.apply_manifest(manifest)
+        except KubeError as error:
+            self._logger.exception(
+                f"Exception applying manifest -  {str(error)}")
         return response
 
-    def kubectl_delete(self, yaml_path):
+    def kube_delete_pvcs(self, pvc_names):
         self.__check_kubectl()
-        kubectl_cmd = "kubectl delete -f \"" + yaml_path + "\""
         response = None
         try:
-            response = subprocess.check_output(kubectl_cmd, shell=True, stderr=subprocess.PIPE, universal_newlines=True)
-        except subprocess.CalledProcessError as error:
+            response = self._kube.delete("v1", "PersistentVolumeClaim", pvc_names)
+        except KubeError as error:
             self._logger.exception(
-                f"Exception deleting '{yaml_path}' -  {str(error.stderr)}")
+                f"Exception deleting PVCs {', '.join(pvc_names)} -  {str(error)}")
         return response
 
-    # Looks for yaml files in the folder path and applies it with kubectl, will not look int subfolders.
-    def auto_apply_all_in_folder(self, folder_path):
+    # Applies every document of the yaml files in one bulk apply, returns an ApplyResult per object.
+    # Objects whose content hash matches the live object are skipped.
+    @traced("validate")
+    def kube_apply_all(self, yaml_paths) -> list:
+        self.__check_kubectl()
+        documents = []
+        for yaml_path in yaml_paths:
+            try:
+                with open(yaml_path, encoding="UTF-8") as yaml_file:
+                    documents.extend(document for document in yaml.safe_load_all(yaml_file) if document)
+            except (OSError, yaml.YAMLError) as error:
+                self._logger.exception(
+                    f"Exception reading '{yaml_path}' -  {str(error)}")
+        if not documents:
+            return []
+
+        results = apply_changed(self._kube, documents)
+        for result in results:
+            if not result.applied:
+                self._logger.info(f"Exception applying {result.reference} -  {result.message}")
+        return results
+
+    # Looks for yaml files in the folder paths, will not look int subfolders.
+    def __yaml_files(self, folder_paths) -> list:
         yaml_ext = [".yaml", ".yml"]
-        files = self.__files_in_dir(folder_path, yaml_ext)
-        if len(files) == 0:
-            self._logger.info(f"No files with extension:{str(yaml_ext)} found in {folder_path}!")
-
-        for f in files:
-            response = self.kubectl_apply(os.path.join(folder_path, f))
-            print(Panel.fit(Text(response.strip(), style="bold cyan")))
+        yaml_paths = []
+        for folder_path in folder_paths:
+            files = self.__files_in_dir(folder_path, yaml_ext)
+            if len(files) == 0:
+                self._logger.info(f"No files with extension:{str(yaml_ext)} found in {folder_path}!")
+            yaml_paths.extend(os.path.join(folder_path, f) for f in files)
+        return yaml_paths
+
+    def __print_apply_results(self, results) -> bool:
+        if results and self._quiet:
+            for result in results:
+                if result.applied:
+                    self._logger.info(f"{result.reference} {result.action}")
+                else:
+                    self._logger.info(f"{result.reference} failed: {result.message}")
+        elif results:
+            output = Text()
+            for result in results:
+                if result.action == "skipped":
+                    continue
+                if result.applied:
+                    output.append(f"{result.reference} {result.action}\n", style="bold cyan")
+                else:
+                    output.append(f"{result.reference} failed: {result.message}\n", style="bold red")
+            counts = {action: len([result for result in results if result.action == action])
+                      for action in ["created", "updated", "skipped", "failed"]}
+            output.append(", ".join(f"{count} {action}" for action, count in counts.items()),
+                          style="bold red" if counts["failed"] else "bold green")
+            print(Panel.fit(output))
+        return all(result.applied for result in results)
+
+    # Looks for yaml files in the folder path and applies them together, will not look int subfolders.
+    def auto_apply_all_in_folder(self, folder_path):
+        return self.__print_apply_results(self.kube_apply_all(self.__yaml_files([folder_path])))
 
     def auto_apply_secrets_ssl(self):
-        self.auto_apply_all_in_folder(folder_path=os.path.join(os.getcwd(), "generatedFiles", "secrets"))
         # only if ssl secrets folder is present will they be applied
         # Build path where secrets are generated
         secret_directories = [os.path.join(os.getcwd(), "generatedFiles", "ssl"),
                               os.path.join(os.getcwd(), "generatedFiles", "ssl", "trusted-certs")]
 
-        for folder_path in secret_directories:
-            if os.path.exists(folder_path):
-                self.auto_apply_all_in_folder(folder_path=folder_path)
+        folder_paths = [os.path.join(os.getcwd(), "generatedFiles", "secrets")]
+        folder_paths.extend(folder_path for folder_path in secret_directories if os.path.exists(folder_path))
+        return self.__print_apply_results(self.kube_apply_all(self.__yaml_files(folder_paths)))
 
     def auto_apply_cr(self):
         # Applying FNCM CR
-        response = self.kubectl_apply(os.path.join(os.getcwd(), "generatedFiles", "ibm_fncm_cr_production.yaml"))
-        print(Panel.fit(Text(response.strip(), style="bold cyan")))
-        return True
+        return self.__print_apply_results(
+            self.kube_apply_all([os.path.join(os.getcwd(), "generatedFiles", "ibm_fncm_cr_production.yaml")]))
+
+    # Follows the operator reconciling the applied CR, returns the ReconcileTimings or None if the CR cannot be read
+    @traced("validate")
+    def wait_for_reconcile(self, progress, timeout=DEFAULT_WAIT_TIMEOUT):
+        self.__check_kubectl()
+        cr_path = os.path.join(os.getcwd(), "generatedFiles", "ibm_fncm_cr_production.yaml")
+        try:
+            with open(cr_path, encoding="UTF-8") as cr_file:
+                cr_document = next(document for document in yaml.safe_load_all(cr_file) if document)
+        except (OSError, yaml.YAMLError, StopIteration) as error:
+            self._logger.exception(
+                f"Exception reading '{cr_path}' -  {str(error)}")
+            return None
+
+        watcher = ReconcileWatcher(self._logger, self._kube, cr_document)
+        return watcher.wait(progress, timeout=timeout)
@@ -55,6 +55,21 @@ from helper_scripts.utilities.utilites import zip_folder, \
     clear, check_ssl_folders, check_icc_masterkey, check_trusted_certs, check_dbname, check_keystore_password_length, \
     collect_visible_files, check_db_password_length , check_db_ssl_mode
 from helper_scripts.validate import validate as v
+from helper_scripts.validate.validate import DEFAULT_CONNECT_TIMEOUT
+from helper_scripts.validate.reachability_sweep import DEFAULT_SWEEP_CONCURRENCY, DEFAULT_SWEEP_BUDGET
+from helper_scripts.validate.dns_resolver import DEFAULT_SLOW_DNS_MS
+from helper_scripts.validate.idp_benchmark import DEFAULT_IDP_BENCHMARK_CONCURRENCY, DEFAULT_IDP_BENCHMARK_DURATION
+from helper_scripts.validate.ldap_index import DEFAULT_INDEX_MAX_AGE
+from helper_scripts.validate.group_walker import DEFAULT_MAX_GROUP_DEPTH
+from helper_scripts.validate.scheduler import CheckScheduler, NullProgress, DEFAULT_WORKERS
+from helper_scripts.validate.db_benchmark import save_pool_recommendations, load_pool_recommendations, \
+    POOL_RECOMMENDATIONS_FILE
+from helper_scripts.validate.ldap_search import DEFAULT_BATCH_SIZE, DEFAULT_MAX_OUTSTANDING
+from helper_scripts.validate.reconcile_watch import reconcile_timing_table, DEFAULT_WAIT_TIMEOUT
+from helper_scripts.validate.report import write_report, REPORT_FORMATS
+from helper_scripts.validate.monitor import MetricsRegistry, MetricsServer, PrerequisitesMonitor, \
+    DEFAULT_INTERVAL, DEFAULT_JITTER, DEFAULT_METRICS_HOST, DEFAULT_METRICS_PORT
+from helper_scripts.utilities.tracing import tracer, span
 
 __version__ = "2.4.9"
 
@@ -75,12 +90,16 @@ def version_callback(value: bool):
 
 
 @app.callback()
-def main(version: Optional[bool] = typer.Option(None, "--version", help="Show version and exit.",
+def main(ctx: typer.Context,
+         version: Optional[bool] = typer.Option(None, "--version", help="Show version and exit.",
                                                 callback=version_callback, is_eager=True),
          silent: bool = typer.Option(False, help="Enable Silent Install (no prompts).",
                                      rich_help_panel="Customization and Utils"),
          verbose: bool = typer.Option(False, help="Enable verbose logging.",
-                                      rich_help_panel="Customization and Utils")):
+                                      rich_help_panel="Customization and Utils"),
+         trace: bool = typer.Option(False, help="Write the timings of every phase and check to prerequisites_trace.json "
+                                                "(Chrome trace event format).",
+                                    rich_help_panel="Customization and Utils")):
     """
     FileNet Content Manager Deployment Prerequisites CLI.
     """
@@ -95,6 +114,19 @@ def main(version: Optional[bool] = typer.Option(None, "--version", help="Show ve
     if silent:
         state["silent"] = True
 
+    if trace:
+        tracer.enable()
+        command_span = span(ctx.invoked_subcommand, "command")
+        command_span.__enter__()
+        ctx.call_on_close(lambda: write_trace(command_span))
+
+
+# Ends the span of the subcommand and writes the trace file, also when the subcommand exits early
+def write_trace(command_span):
+    command_span.__exit__(None, None, None)
+    trace_file = tracer.write()
+    state["logger"].info(f"Trace written to {trace_file}")
+
 
 def setup_logger(file_log_level, verbose=False):
     # Create a logger object
@@ -346,7 +378,10 @@ def gather(
 
 
 @app.command()
-def generate():
+def generate(
+        apply_pool_recommendations: bool = typer.Option(False,
+                                                        help="Add the connection pool sizes recommended by \"validate --benchmark-db\" to the CR"),
+):
     """
     Generate the prerequisites for FileNet Content Manager Deployment.
     """
@@ -578,6 +613,7 @@ def generate():
                         customcomponent_properties=customcomponent_prop_dict,
                         idp_properties=idp_prop_dict,
                         scim_properties=scim_prop_dict,
+                        db_pool_recommendations=load_pool_recommendations() if apply_pool_recommendations else None,
                         logger=state["logger"])
 
         cr.generate_cr()
@@ -587,44 +623,93 @@ def generate():
     print(layout)
 
 
+def report_callback(value: Optional[str]):
+    if value is not None and value not in REPORT_FORMATS:
+        raise typer.BadParameter(f"Report format must be one of: {', '.join(REPORT_FORMATS)}")
+    return value
+
+
 @app.command()
 def validate(
         apply: bool = typer.Option(False, help="Apply all generated artifacts to the cluster"),
+        workers: int = typer.Option(DEFAULT_WORKERS, min=1,
+                                    help="Maximum number of validation checks to run concurrently"),
+        cache_ttl: int = typer.Option(0, min=0,
+                                      help="Reuse passed database and LDAP checks from earlier runs for this many seconds (0 disables the cache)"),
+        latency_samples: int = typer.Option(1, min=1,
+                                            help="Number of connections timed per server and database, latency thresholds are checked against the 95th percentile"),
+        connect_timeout: int = typer.Option(DEFAULT_CONNECT_TIMEOUT, min=1,
+                                            help="Seconds allowed for each step of a connection (DNS lookup, TCP connect, TLS handshake, first answer)"),
+        slow_dns_ms: int = typer.Option(DEFAULT_SLOW_DNS_MS, min=1,
+                                        help="Milliseconds above which a hostname lookup is reported as slow DNS"),
+        sweep: bool = typer.Option(True, help="Probe every server of the property files at once before the checks, checks skip servers found down"),
+        sweep_concurrency: int = typer.Option(DEFAULT_SWEEP_CONCURRENCY, min=1,
+                                              help="Number of servers probed at the same time by the reachability sweep"),
+        sweep_budget: int = typer.Option(DEFAULT_SWEEP_BUDGET, min=1,
+                                         help="Seconds the whole reachability sweep may take"),
+        ldap_batch_size: int = typer.Option(DEFAULT_BATCH_SIZE, min=1,
+                                            help="Number of users or groups looked up with a single LDAP search"),
+        ldap_max_outstanding: int = typer.Option(DEFAULT_MAX_OUTSTANDING, min=1,
+                                                 help="Number of searches sent to one LDAP server before waiting for an answer"),
+        ldap_index: bool = typer.Option(False, help="Check users and groups against a local index of each LDAP, dumped once and then only refreshed with the entries changed since"),
+        ldap_index_max_age: int = typer.Option(DEFAULT_INDEX_MAX_AGE, min=1,
+                                               help="Seconds after which the LDAP index is dumped again instead of refreshed"),
+        walk_groups: bool = typer.Option(True, help="Expand the nested membership of every group found and check that the admin users are effective members of an admin group"),
+        max_group_depth: int = typer.Option(DEFAULT_MAX_GROUP_DEPTH, min=0,
+                                            help="Number of nesting levels below a group above which the group fails the nesting check"),
+        benchmark_db: bool = typer.Option(False, help="Benchmark every database that passed validation and recommend connection pool sizes"),
+        benchmark_max_connections: int = typer.Option(32, min=1,
+                                                      help="Highest number of concurrent connections used by the database benchmark"),
+        benchmark_duration: int = typer.Option(5, min=1,
+                                               help="Seconds the benchmark query runs for each number of connections"),
+        benchmark_idp: bool = typer.Option(False, help="Run a short load of token grants and SCIM /Users and /Groups queries against every IDP and SCIM server that passed validation"),
+        idp_benchmark_concurrency: int = typer.Option(DEFAULT_IDP_BENCHMARK_CONCURRENCY, min=1,
+                                                      help="Number of concurrent requests of the IDP benchmark, also the connection pool size per IDP"),
+        idp_benchmark_duration: int = typer.Option(DEFAULT_IDP_BENCHMARK_DURATION, min=1,
+                                                   help="Seconds the IDP benchmark runs against each IDP and SCIM server"),
+        wait: bool = typer.Option(False, help="After applying the CR, follow the operator until the deployment is ready and report the timings"),
+        wait_timeout: int = typer.Option(DEFAULT_WAIT_TIMEOUT, min=1,
+                                         help="Seconds to wait for the operator to finish reconciling the CR"),
+        report: Optional[str] = typer.Option(None, callback=report_callback,
+                                             help="Write a machine-readable report of every check: json or junit"),
+        report_file: Optional[str] = typer.Option(None, help="File the report is written to, defaults to prerequisites_report.json or .xml"),
+        quiet: bool = typer.Option(False, help="Do not render panels or progress bars and do not prompt, for headless runs with --report"),
 ):
     """
     Validate the prerequisites for FileNet Content Manager Deployment.
     """
 
-    clear(console)
-    print()
-    print(Panel.fit("Version: {version}\n"
-                    "Mode: Validate".format(version=__version__),
-                    title="FileNet Content Manager Deployment Prerequisites CLI", border_style="green"))
-    print()
-    hint_panel = Panel.fit(
-        "- Run the validation from the FNCM Standalone Operator \n"
-        "- All tools and libraries are installed \n"
-        "- Validation from within the your cluster can test private connections \n"
-        "- See the below command to copy the folder and run the validation.",
-        title="Hint"
-    )
-
-    command_panel = (Panel.fit(
-        Syntax("cd ..\n"
-               "export OPERATOR=$(kubectl get pods | grep operator | awk '{print $1}')\n"
-               "kubectl cp prerequisites $OPERATOR:/opt/ansible\n"
-               "kubectl exec -it $OPERATOR -- bash\n"
-               "cd /opt/ansible\n"
-               "python3 prerequisites.py validate",
-               "bash", theme="ansi_dark"
-               ),
-        title="Command"
-    ))
-
-    operator_panel = Panel(Columns([hint_panel, command_panel], align="center", equal=True),
-                           title="FNCM Standalone Operator", border_style="cyan")
-    print(operator_panel)
-    print()
+    if not quiet:
+        clear(console)
+        print()
+        print(Panel.fit("Version: {version}\n"
+                        "Mode: Validate".format(version=__version__),
+                        title="FileNet Content Manager Deployment Prerequisites CLI", border_style="green"))
+        print()
+        hint_panel = Panel.fit(
+            "- Run the validation from the FNCM Standalone Operator \n"
+            "- All tools and libraries are installed \n"
+            "- Validation from within the your cluster can test private connections \n"
+            "- See the below command to copy the folder and run the validation.",
+            title="Hint"
+        )
+
+        command_panel = (Panel.fit(
+            Syntax("cd ..\n"
+                   "export OPERATOR=$(kubectl get pods | grep operator | awk '{print $1}')\n"
+                   "kubectl cp prerequisites $OPERATOR:/opt/ansible\n"
+                   "kubectl exec -it $OPERATOR -- bash\n"
+                   "cd /opt/ansible\n"
+                   "python3 prerequisites.py validate",
+                   "bash", theme="ansi_dark"
+                   ),
+            title="Command"
+        ))
+
+        operator_panel = Panel(Columns([hint_panel, command_panel], align="center", equal=True),
+                               title="FNCM Standalone Operator", border_style="cyan")
+        print(operator_panel)
+        print()
 
     # Loading property folder locations
     prop_folder = os.path.join(os.getcwd(), "propertyFile")
@@ -640,6 +725,7 @@ def validate(
     db_prop_file = os.path.join(prop_folder, "fncm_db_server.toml")
     ldap_prop_file = os.path.join(prop_folder, "fncm_ldap_server.toml")
     idp_prop_file = os.path.join(prop_folder, "fncm_identity_provider.toml")
+    scim_prop_file = os.path.join(prop_folder, "fncm_scim_server.toml")
     usergroup_prop_file = os.path.join(prop_folder, "fncm_user_group.toml")
     deployment_prop_file = os.path.join(prop_folder, "fncm_deployment.toml")
     ingress_prop_file = os.path.join(prop_folder, "fncm_ingress.toml")
@@ -649,6 +735,7 @@ def validate(
     db_prop = None
     ldap_prop = None
     idp_prop = None
+    scim_prop = None
     usergroup_prop = None
     deployment_prop = None
     ingress_prop = None
@@ -664,6 +751,9 @@ def validate(
         if os.path.exists(idp_prop_file):
             idp_prop = ReadPropIdp(os.path.join(prop_folder, "fncm_identity_provider.toml"), state["logger"])
 
+        if os.path.exists(scim_prop_file):
+            scim_prop = ReadPropSCIM(os.path.join(prop_folder, "fncm_scim_server.toml"), state["logger"])
+
         if os.path.exists(usergroup_prop_file):
             usergroup_prop = ReadPropUsergroup(os.path.join(prop_folder, "fncm_user_group.toml"), state["logger"])
 
@@ -693,6 +783,11 @@ def validate(
         else:
             idp_prop_dict = {}
 
+        if scim_prop:
+            scim_prop_dict = scim_prop.to_dict()
+        else:
+            scim_prop_dict = {}
+
         if usergroup_prop:
             usergroup_prop_dict = usergroup_prop.to_dict()
         else:
@@ -731,7 +826,18 @@ def validate(
                          deploy_prop=deployment_prop_dict,
                          idp_prop=idp_prop_dict,
                          component_prop=customcomponent_prop_dict,
-                         user_group_prop=usergroup_prop_dict)
+                         user_group_prop=usergroup_prop_dict,
+                         scim_prop=scim_prop_dict,
+                         cache_ttl=cache_ttl,
+                         latency_samples=latency_samples,
+                         connect_timeout=connect_timeout,
+                         slow_dns_ms=slow_dns_ms,
+                         ldap_batch_size=ldap_batch_size,
+                         ldap_max_outstanding=ldap_max_outstanding,
+                         ldap_index_max_age=ldap_index_max_age if ldap_index else None,
+                         max_group_depth=max_group_depth,
+                         idp_concurrency=idp_benchmark_concurrency,
+                         quiet=quiet)
 
     db_number = 0
     if deployment_prop_dict["FNCM_Version"] == "5.5.8":
@@ -766,70 +872,181 @@ def validate(
         print(layout)
         exit(1)
     else:
-        # TODO: Add SCIM + IDP Validation
-        with Progress(
-                SpinnerColumn(),
-                TextColumn("[progress.description]{task.description}"),
-                BarColumn(),
-                TaskProgressColumn(),
-                MofNCompleteColumn(),
-                TimeElapsedColumn(),
-                console=console,
-                transient=False,
-        ) as progress:
+        # Quiet runs skip rendering entirely, the checks still fill the same results for the report
+        progress_display = NullProgress() if quiet else Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            TaskProgressColumn(),
+            MofNCompleteColumn(),
+            TimeElapsedColumn(),
+            console=console,
+            transient=False,
+        )
+        with progress_display as progress:
 
             task3 = progress.add_task("[green]Validate Storage Class", total=storageclass_number)
             if db_number > 0:
                 task4 = progress.add_task("[yellow]Validate Database", total=db_number)
             if ldap_prop:
                 task1 = progress.add_task("[cyan]Validate LDAP", total=ldap_prop_dict["ldap_number"])
-            # if idp_prop:
-            #     task4 = progress.add_task("[blue]Validate IDP", total=idp_prop_dict["idp_number"])
+            idp_number = idp_prop_dict.get("idp_number", 0) + scim_prop_dict.get("scim_number", 0)
+            if idp_number > 0:
+                task5 = progress.add_task("[blue]Validate IDP", total=idp_number)
 
-            while not progress.finished:
-                if deployment_prop_dict["FNCM_Version"] == "5.5.12" and deployment_prop_dict["FIPS_SUPPORT"]:
-                    progress.log(Panel.fit(Text("Validating all connections with FIPS protocol.\n"
+            if deployment_prop_dict["FNCM_Version"] == "5.5.12" and deployment_prop_dict["FIPS_SUPPORT"] and not quiet:
+                progress.log(Panel.fit(Text("Validating all connections with FIPS protocol.\n"
                                             "These tests will only pass on FIPS enabled platforms.", style="bold purple")))
-                vobject.validate_all_storage_classes(task3, progress)
-                if db_number > 0:
-                    vobject.validate_all_db(task4, progress)
-                if ldap_prop:
-                    ldaps_validated = vobject.validate_all_ldap(task1, progress)
-                    if ldaps_validated:
-                        task2 = progress.add_task("[purple]Validate LDAP Users and Groups", total=1)
-                        vobject.validate_ldap_users_groups(task2, progress)
-                # if idp_prop:
-                #     vobject.validate_scim(task4, progress)
-        vobject.cleanup_tmp()
 
-        if all(vobject.is_validated.values()):
-            print()
-            print(Panel.fit(Text("All prerequisites are validated", style="bold green")))
+            with span("dns resolution", "phase"):
+                vobject.resolve_hostnames(progress)
+
+            if sweep:
+                with span("reachability sweep", "phase"):
+                    vobject.sweep_reachability(progress, concurrency=sweep_concurrency, budget=sweep_budget)
+
+            # Independent checks run concurrently, users and groups are only searched once every LDAP bind passed
+            scheduler = CheckScheduler(progress, max_workers=workers, logger=state["logger"])
+            vobject.schedule_all_storage_classes(scheduler, task3)
+            if db_number > 0:
+                vobject.schedule_all_db(scheduler, task4, progress)
+            if ldap_prop:
+                ldap_checks = vobject.schedule_all_ldap(scheduler, task1)
+                ldap_searches = vobject.schedule_ldap_searches(scheduler, ldap_checks)
+
+                def validate_users_groups(progress):
+                    task2 = progress.add_task("[purple]Validate LDAP Users and Groups", total=1)
+                    return vobject.report_ldap_users_groups(task2, progress)
+
+                scheduler.add("ldap_users_groups", validate_users_groups, requires=ldap_searches)
+                if walk_groups:
+                    group_walks = vobject.schedule_group_walks(scheduler, "ldap_users_groups")
+
+                    def validate_group_nesting(progress):
+                        task6 = progress.add_task("[purple]Validate LDAP Group Nesting", total=1)
+                        return vobject.report_group_walks(task6, progress)
+
+                    scheduler.add("ldap_group_nesting", validate_group_nesting, requires=group_walks)
+            if idp_number > 0:
+                vobject.schedule_all_idp(scheduler, task5)
+            with span("validation checks", "phase"):
+                scheduler.run()
+
+            if benchmark_db and db_number > 0:
+                recommendations = vobject.benchmark_all_db(progress, max_connections=benchmark_max_connections,
+                                                           duration=benchmark_duration)
+                if recommendations:
+                    save_pool_recommendations(recommendations)
+                    progress.log(Text(f"Connection pool recommendations saved to {POOL_RECOMMENDATIONS_FILE}\n"
+                                      f"Run \"prerequisites.py generate --apply-pool-recommendations\" "
+                                      f"to add them to the CR.", style="bold green"))
+
+            if benchmark_idp and idp_number > 0:
+                vobject.benchmark_idp(progress, duration=idp_benchmark_duration)
+
+        applied_cr = False
+        if not quiet:
             print()
-            if apply:
-                vobject.auto_apply_secrets_ssl()
-                vobject.auto_apply_cr()
+            if all(vobject.is_validated.values()):
+                print(Panel.fit(Text("All prerequisites are validated", style="bold green")))
             else:
-                apply_ssls_secrets = Confirm.ask("Do you want to apply the SSL & Secrets?")
-                if apply_ssls_secrets:
-                    vobject.auto_apply_secrets_ssl()
-                apply_cr = Confirm.ask("Do you want to apply the CR?")
-                if apply_cr:
-                    vobject.auto_apply_cr()
-        else:
-            print()
-            print(Panel.fit(Text("All prerequisites checks have not passed!", style="bold red")))
+                print(Panel.fit(Text("All prerequisites checks have not passed!", style="bold red")))
             print()
-            if apply:
+        if apply:
+            vobject.auto_apply_secrets_ssl()
+            applied_cr = vobject.auto_apply_cr()
+        elif not quiet:
+            apply_ssls_secrets = Confirm.ask("Do you want to apply the SSL & Secrets?")
+            if apply_ssls_secrets:
                 vobject.auto_apply_secrets_ssl()
-                vobject.auto_apply_cr()
-            else:
-                apply_ssls_secrets = Confirm.ask("Do you want to apply the SSL & Secrets?")
-                if apply_ssls_secrets:
-                    vobject.auto_apply_secrets_ssl()
-                apply_cr = Confirm.ask("Do you want to apply the CR?")
-                if apply_cr:
-                    vobject.auto_apply_cr()
+            apply_cr = Confirm.ask("Do you want to apply the CR?")
+            if apply_cr:
+                applied_cr = vobject.auto_apply_cr()
+
+        if wait and applied_cr:
+            progress_display = NullProgress() if quiet else Progress(
+                SpinnerColumn(),
+                TextColumn("[progress.description]{task.description}"),
+                BarColumn(),
+                MofNCompleteColumn(),
+                TimeElapsedColumn(),
+                console=console,
+                transient=False,
+            )
+            with progress_display as progress:
+                timings = vobject.wait_for_reconcile(progress, timeout=wait_timeout)
+            if timings and not quiet:
+                print(reconcile_timing_table(timings))
+                if not timings.completed:
+                    print(Panel.fit(Text(f"The CR was not reconciled within {wait_timeout} seconds", style="bold red")))
+
+        if report:
+            report_path = write_report(report, vobject.report_results(), report_file,
+                                       extra={"latency": vobject.latency_results,
+                                              "benchmark": vobject.benchmark_results,
+                                              "idp_benchmark": vobject.idp_benchmark_results})
+            state["logger"].info(f"Validation report written to {report_path}")
+
+        vobject.close()
+        vobject.cleanup_tmp()
+
+
+@app.command()
+def monitor(
+        interval: int = typer.Option(DEFAULT_INTERVAL, min=1, help="Seconds between two rounds of checks"),
+        jitter: float = typer.Option(DEFAULT_JITTER, min=0, max=1,
+                                     help="Share of the interval by which each round is randomly moved"),
+        host: str = typer.Option(DEFAULT_METRICS_HOST, help="Address the /metrics endpoint listens on"),
+        port: int = typer.Option(DEFAULT_METRICS_PORT, min=1, max=65535, help="Port of the /metrics endpoint"),
+        workers: int = typer.Option(DEFAULT_WORKERS, min=1,
+                                    help="Maximum number of checks to run concurrently"),
+        connect_timeout: int = typer.Option(DEFAULT_CONNECT_TIMEOUT, min=1,
+                                            help="Seconds allowed for each step of a connection (DNS lookup, TCP connect, TLS handshake, first answer)"),
+):
+    """
+    Keep checking the database and LDAP prerequisites and expose the results as Prometheus metrics.
+    """
+    prop_folder = os.path.join(os.getcwd(), "propertyFile")
+    prop_files = {"db_prop": ("fncm_db_server.toml", ReadPropDb),
+                  "ldap_prop": ("fncm_ldap_server.toml", ReadPropLdap),
+                  "deploy_prop": ("fncm_deployment.toml", ReadPropDeployment),
+                  "user_group_prop": ("fncm_user_group.toml", ReadPropUsergroup),
+                  "component_prop": ("fncm_components_options.toml", ReadPropCustomComponent)}
+    props = {}
+    try:
+        for key, (file_name, read_prop) in prop_files.items():
+            prop_file = os.path.join(prop_folder, file_name)
+            props[key] = read_prop(prop_file, state["logger"]).to_dict() if os.path.exists(prop_file) else {}
+    except Exception:
+        state["logger"].exception(
+            f"Exception when reading Property Files\n"
+            f"Please Review your Property files for missing quotes and formatting.\n\n")
+        exit(1)
+
+    # The monitor only exports metrics, nothing is rendered
+    vobject = v.Validate(state["logger"], connect_timeout=connect_timeout, quiet=True, **props)
+    registry = MetricsRegistry()
+    monitor_loop = PrerequisitesMonitor(state["logger"], vobject, registry, interval=interval, jitter=jitter,
+                                        workers=workers)
+    try:
+        server = MetricsServer(registry, host=host, port=port)
+    except OSError as e:
+        state["logger"].exception(f"Unable to serve metrics on {host}:{port}: {str(e)}")
+        vobject.close()
+        exit(1)
+
+    server.start()
+    print(Panel.fit(f"Checking every {interval} seconds, metrics at {server.address}\n"
+                    f"Press Ctrl+C to stop.",
+                    title="FileNet Content Manager Deployment Prerequisites Monitor", border_style="green"))
+    try:
+        monitor_loop.run()
+    except KeyboardInterrupt:
+        monitor_loop.stop()
+    finally:
+        server.stop()
+        vobject.close()
+        vobject.cleanup_tmp()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,27 @@
+###############################################################################
+#
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp. 2023. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+###############################################################################
+
+import logging
+import os
+import sys
+
+import pytest
+
+# The helper scripts resolve their templates, jars and caches from the working directory,
+# which has to be set before they are imported
+PREREQUISITES_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(PREREQUISITES_DIR)
+sys.path.insert(0, PREREQUISITES_DIR)
+
+
+@pytest.fixture
+def logger():
+    return logging.getLogger("prerequisites-tests")
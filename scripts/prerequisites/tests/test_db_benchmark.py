@@ -0,0 +1,111 @@
+###############################################################################
+#
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp. 2023. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+###############################################################################
+
+import io
+
+import pytest
+from ruamel.yaml import YAML, CommentedMap
+
+from helper_scripts.generate.generate_cr import GenerateCR
+from helper_scripts.validate.db_benchmark import BenchmarkLevel, PoolRecommendation, concurrency_levels, \
+    recommend_pool, save_pool_recommendations, load_pool_recommendations
+
+
+# Levels of a benchmark that ran for one second each, throughput given in queries per second
+def _levels(*throughputs):
+    concurrency = 1
+    levels = []
+    for throughput in throughputs:
+        levels.append(BenchmarkLevel(concurrency=concurrency, connect_ms=10.0, queries=throughput,
+                                     duration_ms=1000.0, query_p50_ms=1.0, query_p95_ms=2.0, query_p99_ms=3.0))
+        concurrency *= 2
+    return levels
+
+
+@pytest.mark.parametrize("max_connections, expected", [
+    (1, [1]),
+    (2, [1, 2]),
+    (8, [1, 2, 4, 8]),
+    (12, [1, 2, 4, 8, 12]),
+    (33, [1, 2, 4, 8, 16, 32, 33]),
+])
+def test_levels_double_up_to_max_connections(max_connections, expected):
+    assert concurrency_levels(max_connections) == expected
+
+
+def _recommend(levels):
+    recommendation = recommend_pool(levels)
+    return recommendation.min_pool, recommendation.max_pool, recommendation.saturated
+
+
+def test_recommendation_stops_at_the_throughput_plateau():
+    # 4 -> 8 connections adds 3%, the half of the peak (155/s) is reached with 2 connections
+    assert _recommend(_levels(120, 200, 300, 310, 320)) == (2, 4, True)
+
+
+def test_recommendation_while_throughput_still_scales():
+    assert _recommend(_levels(100, 200, 400)) == (2, 4, False)
+
+
+def test_recommendation_when_high_levels_fail():
+    # Throughput collapses under errors at 4 connections
+    assert _recommend(_levels(100, 190, 20)) == (1, 2, True)
+    # A failing level stops the benchmark, only the levels that passed are left
+    assert _recommend(_levels(100, 190)) == (1, 2, False)
+
+
+def test_recommendation_with_max_connections_not_a_power_of_two():
+    levels = _levels(100, 200, 400, 800)
+    levels.append(BenchmarkLevel(concurrency=12, connect_ms=10.0, queries=1200, duration_ms=1000.0,
+                                 query_p50_ms=1.0, query_p95_ms=2.0, query_p99_ms=3.0))
+    assert [level.concurrency for level in levels] == concurrency_levels(12)
+    assert _recommend(levels) == (8, 12, False)
+
+    levels[-1].queries = 820
+    assert _recommend(levels) == (8, 8, True)
+
+
+def test_min_pool_never_exceeds_max_pool():
+    # The peak comes after the plateau, half of it is only reached past the recommended maximum
+    assert _recommend(_levels(100, 105, 400)) == (1, 1, True)
+
+
+def test_no_recommendation_without_levels():
+    assert recommend_pool([]) is None
+
+
+def test_throughput_of_an_empty_level():
+    level = BenchmarkLevel.from_result(4, {"queries": "0", "duration_ms": "0"})
+    assert (level.throughput, level.connections_per_second) == (0.0, 0.0)
+
+
+def test_recommendations_reach_the_generated_cr(tmp_path, monkeypatch):
+    recommendations_file = str(tmp_path / "fncm_db_pool_recommendations.toml")
+    save_pool_recommendations({"GCD": PoolRecommendation(min_pool=2, max_pool=12, saturated=True),
+                               "OS1": PoolRecommendation(min_pool=1, max_pool=4, saturated=False)},
+                              recommendations_file)
+    recommendations = load_pool_recommendations(recommendations_file)
+    assert recommendations == {"GCD": {"min_pool": 2, "max_pool": 12}, "OS1": {"min_pool": 1, "max_pool": 4}}
+    assert load_pool_recommendations(str(tmp_path / "missing.toml")) == {}
+
+    # The generator removes a previously generated CR from the working directory
+    monkeypatch.chdir(tmp_path)
+    generator = GenerateCR(deployment_properties={"FNCM_Version": "5.5.12"},
+                           db_pool_recommendations=recommendations)
+    datasource, not_benchmarked = CommentedMap(database_name="GCDDB"), CommentedMap(database_name="ICNDB")
+    generator.populate_connection_manager(datasource, "GCD")
+    generator.populate_connection_manager(not_benchmarked, "ICN")
+
+    output = io.StringIO()
+    YAML().dump({"dc_gcd_datasource": datasource, "dc_icn_datasource": not_benchmarked}, output)
+    assert YAML().load(output.getvalue()) == {
+        "dc_gcd_datasource": {"database_name": "GCDDB", "connection_manager": {"min_pool": 2, "max_pool": 12}},
+        "dc_icn_datasource": {"database_name": "ICNDB"}}
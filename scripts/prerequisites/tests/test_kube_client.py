@@ -0,0 +1,197 @@
+###############################################################################
+#
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp. 2023. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+###############################################################################
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+
+from helper_scripts.validate import kube_client
+from helper_scripts.validate.kube_client import KubeClient, KubeConfig, KubectlBackend, create_kube_client, \
+    FIELD_MANAGER
+
+_DISCOVERY = {"kind": "APIResourceList", "groupVersion": "v1",
+              "resources": [{"name": "secrets", "kind": "Secret", "namespaced": True},
+                            {"name": "pods", "kind": "Pod", "namespaced": True},
+                            {"name": "pods/log", "kind": "Pod", "namespaced": True}]}
+
+_WATCH_EVENTS = [{"type": "MODIFIED", "object": {"metadata": {"name": "existing", "resourceVersion": "11"}}},
+                 {"type": "DELETED", "object": {"metadata": {"name": "existing", "resourceVersion": "12"}}}]
+
+
+# Minimal API server serving secrets in the "fncm" namespace, every request is recorded
+class FakeApiServer:
+    def __init__(self, logged_in=True):
+        self.requests = []
+        self.secrets = {"existing": {"metadata": {"name": "existing", "namespace": "fncm"}}}
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def __send(self, status, body=None):
+                payload = json.dumps(body or {}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def __record(self):
+                url = urlparse(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                fake.requests.append({"method": self.command, "path": url.path, "query": parse_qs(url.query),
+                                      "content_type": self.headers.get("Content-Type"), "body": body})
+                return url.path, parse_qs(url.query)
+
+            def do_GET(self):
+                path, query = self.__record()
+                if path == "/api/v1/namespaces/fncm/pods":
+                    return self.__send(200 if logged_in else 401, {"items": [], "message": "Unauthorized"})
+                if path == "/api/v1":
+                    return self.__send(200, _DISCOVERY)
+                if path == "/api/v1/namespaces/fncm/secrets":
+                    if query.get("watch") == ["true"]:
+                        self.send_response(200)
+                        self.send_header("Content-Type", "application/json")
+                        self.end_headers()
+                        for event in _WATCH_EVENTS:
+                            self.wfile.write(json.dumps(event).encode() + b"\n")
+                            self.wfile.flush()
+                        return
+                    return self.__send(200, {"metadata": {"resourceVersion": "10"},
+                                             "items": list(fake.secrets.values())})
+                if path.startswith("/api/v1/namespaces/fncm/secrets/"):
+                    name = path.rsplit("/", 1)[1]
+                    if name in fake.secrets:
+                        return self.__send(200, fake.secrets[name])
+                return self.__send(404, {"message": "not found"})
+
+            def do_PATCH(self):
+                path, _ = self.__record()
+                name = path.rsplit("/", 1)[1]
+                created = name not in fake.secrets
+                fake.secrets[name] = json.loads(fake.requests[-1]["body"])
+                return self.__send(201 if created else 200, fake.secrets[name])
+
+            def do_DELETE(self):
+                path, _ = self.__record()
+                name = path.rsplit("/", 1)[1]
+                if fake.secrets.pop(name, None) is None:
+                    return self.__send(404, {"message": f"secrets \"{name}\" not found"})
+                return self.__send(200, {"status": "Success"})
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def api_server():
+    with FakeApiServer() as server:
+        yield server
+
+
+@pytest.fixture
+def client(logger, api_server):
+    kube = KubeClient(logger, KubeConfig(server=api_server.url, namespace="fncm", token="token"))
+    yield kube
+    kube.close()
+
+
+def test_apply_is_a_forced_server_side_apply_patch(client, api_server):
+    document = {"apiVersion": "v1", "kind": "Secret",
+                "metadata": {"name": "new-secret", "resourceVersion": "3"}, "stringData": {"key": "value"}}
+
+    assert client.apply(document) == "secret/new-secret created"
+
+    patch = [request for request in api_server.requests if request["method"] == "PATCH"][0]
+    assert patch["path"] == "/api/v1/namespaces/fncm/secrets/new-secret"
+    assert patch["content_type"] == "application/apply-patch+yaml"
+    assert patch["query"] == {"fieldManager": [FIELD_MANAGER], "force": ["true"]}
+    # A stale resourceVersion would make the apply fail its precondition
+    assert "resourceVersion" not in json.loads(patch["body"])["metadata"]
+
+
+def test_apply_of_an_existing_object_is_configured(client):
+    document = {"apiVersion": "v1", "kind": "Secret", "metadata": {"name": "existing"}}
+    assert client.apply(document) == "secret/existing configured"
+
+
+def test_delete_ignores_objects_that_do_not_exist(client, api_server):
+    output = client.delete("v1", "Secret", ["existing", "missing"])
+
+    assert output == "secret \"existing\" deleted"
+    deletes = [request["path"] for request in api_server.requests if request["method"] == "DELETE"]
+    assert deletes == ["/api/v1/namespaces/fncm/secrets/existing", "/api/v1/namespaces/fncm/secrets/missing"]
+
+
+def test_get_returns_a_single_object_or_a_list(client):
+    assert client.get("v1", "Secret", "existing")["metadata"]["name"] == "existing"
+    assert client.list_names("v1", "Secret") == ["existing"]
+    with pytest.raises(kube_client.KubeError):
+        client.get("v1", "Secret", "missing")
+
+
+def test_watch_lists_then_streams_events_from_the_list_version(client, api_server):
+    watch = client.watch("v1", "Secret")
+    events = [(event_type, item["metadata"]["name"]) for event_type, item in watch]
+
+    assert events == [("ADDED", "existing"), ("MODIFIED", "existing"), ("DELETED", "existing")]
+    stream = [request for request in api_server.requests if request["query"].get("watch") == ["true"]][0]
+    assert stream["query"]["resourceVersion"] == ["10"]
+    assert watch.closed
+
+
+def test_create_kube_client_uses_the_api_server_when_reachable(logger, api_server, monkeypatch):
+    monkeypatch.setattr(kube_client, "load_kubeconfig",
+                        lambda _: KubeConfig(server=api_server.url, namespace="fncm", token="token"))
+
+    kube = create_kube_client(logger, kubectl_present=True)
+    try:
+        assert isinstance(kube, KubeClient)
+    finally:
+        kube.close()
+
+
+def test_create_kube_client_falls_back_to_kubectl(logger, monkeypatch):
+    with FakeApiServer(logged_in=False) as api_server:
+        monkeypatch.setattr(kube_client, "load_kubeconfig",
+                            lambda _: KubeConfig(server=api_server.url, namespace="fncm", token="token"))
+        monkeypatch.setattr(KubectlBackend, "is_logged_in", lambda self: True)
+        assert isinstance(create_kube_client(logger, kubectl_present=True), KubectlBackend)
+
+        # Without kubectl the in-process client is kept, so the errors of the API server are reported
+        kube = create_kube_client(logger, kubectl_present=False)
+        assert isinstance(kube, KubeClient)
+        kube.close()
+
+
+def test_create_kube_client_without_kubeconfig(logger, monkeypatch):
+    monkeypatch.setattr(kube_client, "load_kubeconfig", lambda _: None)
+
+    assert isinstance(create_kube_client(logger, kubectl_present=True), KubectlBackend)
+    assert create_kube_client(logger, kubectl_present=False) is None
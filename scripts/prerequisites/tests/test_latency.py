@@ -0,0 +1,72 @@
+###############################################################################
+#
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp. 2023. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+###############################################################################
+
+import pytest
+
+from helper_scripts.validate.latency import percentile, LatencyStats
+
+
+@pytest.mark.parametrize("samples, pct, expected", [
+    ([], 50, 0.0),
+    ([7], 50, 7.0),
+    ([7], 99, 7.0),
+    ([1, 2, 3, 4], 0, 1.0),
+    ([1, 2, 3, 4], 100, 4.0),
+    # Between the closest ranks: rank (4 - 1) * 0.5 = 1.5
+    ([1, 2, 3, 4], 50, 2.5),
+    ([10, 20, 30, 40, 50], 50, 30.0),
+    ([10, 20, 30, 40, 50], 95, 48.0),
+    ([10, 20, 30, 40, 50], 99, 49.6),
+    (list(range(1, 101)), 50, 50.5),
+    (list(range(1, 101)), 95, 95.05),
+    (list(range(1, 101)), 99, 99.01),
+])
+def test_percentile_interpolates_between_ranks(samples, pct, expected):
+    assert percentile(samples, pct) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("samples_ms, expected", [
+    ([], 0.0),
+    ([12.5], 0.0),
+    ([10, 10, 10], 0.0),
+    # |12 - 10| + |11 - 12| + |15 - 11| + |15 - 15| over 4 differences
+    ([10, 12, 11, 15, 15], 1.75),
+    ([1, 3, 1, 3], 2.0),
+])
+def test_jitter_is_the_mean_difference_of_consecutive_samples(samples_ms, expected):
+    assert LatencyStats.from_ms(samples_ms).jitter == pytest.approx(expected)
+
+
+def test_jitter_follows_the_order_the_samples_were_taken():
+    # Same samples, sorted they differ by 1ms each
+    assert LatencyStats.from_ms([1, 4, 2, 5, 3]).jitter == pytest.approx(2.5)
+    assert LatencyStats.from_ms([1, 2, 3, 4, 5]).jitter == pytest.approx(1.0)
+
+
+def test_stats_are_reported_in_milliseconds():
+    stats = LatencyStats([4_000_000, 1_000_000, 3_000_000, 2_000_000])
+
+    assert stats.to_dict() == {"samples": 4,
+                               "min_ms": 1.0,
+                               "p50_ms": pytest.approx(2.5),
+                               "p95_ms": pytest.approx(3.85),
+                               "p99_ms": pytest.approx(3.97),
+                               "jitter_ms": pytest.approx(2.0),
+                               "samples_ms": [4.0, 1.0, 3.0, 2.0]}
+    assert stats.summary() == "min 1.00ms, p50 2.50ms, p95 3.85ms, p99 3.97ms, jitter 2.00ms (4 samples)"
+
+
+def test_empty_and_single_sample_stats():
+    empty = LatencyStats([])
+    assert (len(empty), empty.min, empty.p50, empty.p99, empty.jitter) == (0, 0.0, 0.0, 0.0, 0.0)
+
+    single = LatencyStats.from_ms([12.5])
+    assert (single.min, single.p50, single.p95, single.p99, single.jitter) == (12.5, 12.5, 12.5, 12.5, 0.0)
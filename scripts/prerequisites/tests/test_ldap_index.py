@@ -0,0 +1,106 @@
+###############################################################################
+#
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp. 2023. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+###############################################################################
+
+import sqlite3
+
+import pytest
+from ldap3 import Server, Connection, MOCK_SYNC
+
+from helper_scripts.validate import ldap_index
+from helper_scripts.validate.ldap_index import LdapIndex
+
+BASE_DN = "ou=users,dc=example,dc=com"
+USER_FILTER = "(&(samAccountName=%v)(objectClass=user))"
+FINGERPRINT = "ad.example.com:636"
+
+
+def _add_user(conn, name, usn):
+    conn.strategy.add_entry(f"cn={name},{BASE_DN}", {"cn": name, "samAccountName": name, "objectClass": "user",
+                                                    "uSNChanged": str(usn)})
+
+
+@pytest.fixture
+def conn():
+    connection = Connection(Server("mock"), user="cn=admin,dc=example,dc=com", password="secret",
+                            client_strategy=MOCK_SYNC)
+    connection.strategy.add_entry("cn=admin,dc=example,dc=com", {"userPassword": "secret", "sn": "admin"})
+    _add_user(connection, "alice", 1001)
+    _add_user(connection, "bob", 1002)
+    connection.bind()
+    yield connection
+    connection.unbind()
+
+
+# The domain controller the mock connection reaches, the mock has no root DSE to read it from
+@pytest.fixture
+def controller(monkeypatch):
+    current = {"name": "cn=ntds settings,cn=dc1"}
+    monkeypatch.setattr(ldap_index, "server_identity", lambda _: current["name"])
+    return current
+
+
+@pytest.fixture
+def index(logger, tmp_path):
+    ldap_idx = LdapIndex(logger, index_file=str(tmp_path / "ldap_index.sqlite"))
+    yield ldap_idx
+    ldap_idx.close()
+
+
+def _refresh(index, conn):
+    refresh = index.refresh(conn, "ldap1", "users", BASE_DN, USER_FILTER, FINGERPRINT)
+    return refresh.mode, refresh.entries, refresh.reason
+
+
+def test_refresh_on_the_same_controller_is_incremental(index, conn, controller):
+    assert _refresh(index, conn) == ("dump", 2, "no index yet")
+    _add_user(conn, "carol", 1003)
+
+    assert _refresh(index, conn) == ("incremental", 1, None)
+    assert index.lookup("ldap1", "users", USER_FILTER, ["alice", "Carol", "dave"]) == {"alice", "Carol"}
+
+
+def test_refresh_on_another_controller_dumps_again(index, conn, controller):
+    _refresh(index, conn)
+    # The other controller has its own counter, lower than the high water mark of the first one
+    controller["name"] = "cn=ntds settings,cn=dc2"
+    _add_user(conn, "carol", 17)
+
+    mode, entries, reason = _refresh(index, conn)
+    assert (mode, entries) == ("dump", 3)
+    assert reason == "connected to domain controller cn=ntds settings,cn=dc2 instead of cn=ntds settings,cn=dc1"
+    assert index.lookup("ldap1", "users", USER_FILTER, ["carol"]) == {"carol"}
+    # The next refresh compares with the controller of the last dump
+    assert _refresh(index, conn) == ("incremental", 0, None)
+
+
+def test_refresh_without_a_controller_name_dumps_again(index, conn, controller):
+    controller["name"] = None
+    _refresh(index, conn)
+
+    assert _refresh(index, conn)[0] == "dump"
+
+
+def test_index_written_before_the_controller_was_recorded(logger, tmp_path, conn, controller):
+    index_file = str(tmp_path / "ldap_index.sqlite")
+    with sqlite3.connect(index_file) as db:
+        db.execute("CREATE TABLE snapshots (ldap_id TEXT NOT NULL, kind TEXT NOT NULL, fingerprint TEXT NOT NULL, "
+                   "dumped_at REAL NOT NULL, refreshed_at REAL NOT NULL, change_attribute TEXT, high_water TEXT, "
+                   "PRIMARY KEY (ldap_id, kind))")
+        db.execute("INSERT INTO snapshots VALUES ('ldap1', 'users', ?, strftime('%s', 'now'), "
+                   "strftime('%s', 'now'), 'uSNChanged', '1002')", (FINGERPRINT,))
+    db.close()
+
+    index = LdapIndex(logger, index_file=index_file)
+    try:
+        assert _refresh(index, conn)[0] == "dump"
+        assert _refresh(index, conn)[0] == "incremental"
+    finally:
+        index.close()
@@ -0,0 +1,41 @@
+###############################################################################
+#
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp. 2023. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+###############################################################################
+
+import pytest
+from ldap3 import Server, Connection, MOCK_SYNC
+
+from helper_scripts.validate.ldap_search import search_names, find_dns
+
+BASE_DN = "ou=users,dc=example,dc=com"
+USER_FILTER = "(&(cn=%v)(objectClass=person))"
+
+
+@pytest.fixture
+def conn():
+    connection = Connection(Server("mock"), user="cn=admin,dc=example,dc=com", password="secret",
+                            client_strategy=MOCK_SYNC)
+    connection.strategy.add_entry("cn=admin,dc=example,dc=com", {"userPassword": "secret", "sn": "admin"})
+    for name in ["alice", "Smith (Admin)"]:
+        connection.strategy.add_entry(f"cn={name},{BASE_DN}", {"cn": name, "objectClass": "person"})
+    connection.bind()
+    yield connection
+    connection.unbind()
+
+
+def test_search_names_escapes_filter_characters(conn):
+    # Unescaped, "*" would match every user and the parentheses would break the filter
+    assert search_names(conn, BASE_DN, USER_FILTER, ["alice", "Smith (Admin)", "*", "bob"]) == \
+           {"alice", "Smith (Admin)"}
+
+
+def test_find_dns_is_keyed_by_the_raw_name(conn):
+    assert find_dns(conn, BASE_DN, USER_FILTER, ["Smith (Admin)", "*"]) == \
+           {"Smith (Admin)": f"cn=Smith (Admin),{BASE_DN}"}
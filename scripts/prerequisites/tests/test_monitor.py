@@ -0,0 +1,53 @@
+###############################################################################
+#
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp. 2023. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+###############################################################################
+
+import socket
+
+import pytest
+
+from helper_scripts.validate import validate as v
+from helper_scripts.validate.monitor import MetricsRegistry, PrerequisitesMonitor
+
+
+@pytest.fixture
+def closed_port():
+    # A port nothing listens on, connections to it are refused right away
+    probe = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    return port
+
+
+# Same property files as "prerequisites.py monitor" on a deployment without database and user group files
+def test_monitor_runs_one_cycle_without_db_and_user_group_files(logger, closed_port):
+    ldap_prop = {"_ldap_ids": ["LDAP"],
+                 "ldap_number": 1,
+                 "LDAP": {"LDAP_SERVER": "127.0.0.1",
+                          "LDAP_PORT": str(closed_port),
+                          "LDAP_SSL_ENABLED": False,
+                          "LDAP_BASE_DN": "dc=example,dc=com",
+                          "LDAP_BIND_DN": "cn=admin,dc=example,dc=com",
+                          "LDAP_BIND_DN_PASSWORD": "password"}}
+    deploy_prop = {"FNCM_Version": "5.5.12", "FIPS_SUPPORT": False}
+
+    vobject = v.Validate(logger, connect_timeout=1, ldap_prop=ldap_prop, deploy_prop=deploy_prop, quiet=True)
+    try:
+        registry = MetricsRegistry()
+        monitor = PrerequisitesMonitor(logger, vobject, registry, interval=1, jitter=0, workers=2)
+        monitor.run_cycle()
+    finally:
+        vobject.close()
+
+    metrics = registry.render()
+    assert "fncm_prerequisites_cycles_total 1" in metrics
+    assert f'check="tcp_connect",result="failure",target="127.0.0.1:{closed_port}"' in metrics
+    assert 'check="ldap_bind",result="failure",target="LDAP"' in metrics
@@ -0,0 +1,131 @@
+###############################################################################
+#
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp. 2023. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+###############################################################################
+
+import logging
+import time
+
+import pytest
+
+from helper_scripts.validate.scheduler import CheckScheduler, NullProgress
+
+
+# Progress that keeps what was logged, in the order it reached the console
+class RecordingProgress(NullProgress):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def log(self, *objects, **kwargs):
+        self.records.extend(objects)
+
+
+# Stub check that records when it ran and returns the given result
+class StubCheck:
+    def __init__(self, result=True, delay=0.0, error=None):
+        self.result = result
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.started = None
+        self.finished = None
+
+    def __call__(self, name, progress):
+        self.calls += 1
+        self.started = time.monotonic()
+        progress.log(f"{name} started")
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        progress.log(f"{name} finished")
+        self.finished = time.monotonic()
+        return self.result
+
+
+def test_check_runs_after_the_check_it_requires(logger):
+    db, ldap, groups = StubCheck(delay=0.05), StubCheck(delay=0.05), StubCheck()
+    scheduler = CheckScheduler(NullProgress(), max_workers=4, logger=logger)
+    scheduler.add("db", db, "db")
+    scheduler.add("ldap", ldap, "ldap")
+    scheduler.add("groups", groups, "groups", requires=["ldap"])
+
+    assert scheduler.run() == {"db": True, "ldap": True, "groups": True}
+    assert groups.started >= ldap.finished
+    # Independent checks run at the same time
+    assert ldap.started < db.finished
+
+
+def test_check_is_skipped_when_a_required_check_fails(logger, caplog):
+    ldap, groups, walk, storage = StubCheck(result=False), StubCheck(), StubCheck(), StubCheck()
+    scheduler = CheckScheduler(NullProgress(), logger=logger)
+    scheduler.add("ldap", ldap, "ldap")
+    scheduler.add("groups", groups, "groups", requires=["ldap"])
+    scheduler.add("walk", walk, "walk", requires=["groups"])
+    scheduler.add("storage", storage, "storage")
+
+    with caplog.at_level(logging.INFO, logger=logger.name):
+        results = scheduler.run()
+
+    # Skipped checks have no result, so the checks requiring them are skipped as well
+    assert results == {"ldap": False, "groups": None, "walk": None, "storage": True}
+    assert groups.calls == 0 and walk.calls == 0
+    assert "Skipping check \"groups\"" in caplog.text
+
+
+def test_exception_is_logged_and_fails_only_its_check(logger, caplog):
+    broken, dependent, other = StubCheck(error=RuntimeError("boom")), StubCheck(), StubCheck()
+    progress = RecordingProgress()
+    scheduler = CheckScheduler(progress, max_workers=2, logger=logger)
+    scheduler.add("broken", broken, "broken")
+    scheduler.add("dependent", dependent, "dependent", requires=["broken"])
+    scheduler.add("other", other, "other")
+
+    with caplog.at_level(logging.ERROR, logger=logger.name):
+        results = scheduler.run()
+
+    assert results == {"broken": False, "dependent": None, "other": True}
+    assert "Exception from check \"broken\" -  boom" in caplog.text
+    # What the check logged before raising is still shown
+    assert "broken started" in progress.records
+
+
+def test_log_output_of_a_check_is_not_interleaved(logger):
+    progress = RecordingProgress()
+    scheduler = CheckScheduler(progress, max_workers=2, logger=logger)
+    scheduler.add("slow", StubCheck(delay=0.05), "slow")
+    scheduler.add("fast", StubCheck(), "fast")
+    scheduler.run()
+
+    assert progress.records == ["fast started", "fast finished", "slow started", "slow finished"]
+
+
+def test_checks_run_with_null_progress(logger):
+    def check(progress):
+        task = progress.add_task("check", total=2)
+        progress.advance(task)
+        progress.update(task, description="done")
+        progress.log("not shown")
+        return task
+
+    with NullProgress() as progress:
+        scheduler = CheckScheduler(progress, logger=logger)
+        scheduler.add("first", check)
+        scheduler.add("second", check, requires=["first"])
+        assert scheduler.run() == {"first": 1, "second": 2}
+
+
+def test_add_rejects_duplicate_and_unknown_checks(logger):
+    scheduler = CheckScheduler(NullProgress(), logger=logger)
+    scheduler.add("ldap", StubCheck(), "ldap")
+
+    with pytest.raises(ValueError):
+        scheduler.add("ldap", StubCheck(), "ldap")
+    with pytest.raises(ValueError):
+        scheduler.add("groups", StubCheck(), "groups", requires=["users"])
@@ -0,0 +1,126 @@
+###############################################################################
+#
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp. 2023. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+###############################################################################
+
+import datetime
+import os
+import time
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.serialization import pkcs12
+from cryptography.x509.oid import NameOID
+
+from helper_scripts.validate import truststore
+from helper_scripts.validate.truststore import build_pkcs12_truststore, TruststoreCache
+
+
+def _certificate(common_name):
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, common_name)])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return (x509.CertificateBuilder()
+            .subject_name(name)
+            .issuer_name(name)
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now)
+            .not_valid_after(now + datetime.timedelta(days=1))
+            .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+            .sign(key, hashes.SHA256()))
+
+
+def _write(path, *certificates, encoding=serialization.Encoding.PEM):
+    with open(path, "wb") as cert_file:
+        cert_file.write(b"".join(certificate.public_bytes(encoding) for certificate in certificates))
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def certificates():
+    return [_certificate("db-ca.example.com"), _certificate("db-intermediate.example.com")]
+
+
+def _load(store_path, password):
+    with open(store_path, "rb") as store_file:
+        return pkcs12.load_pkcs12(store_file.read(), password)
+
+
+def test_truststore_loads_back_with_its_password(tmp_path, certificates):
+    cert_path = _write(tmp_path / "ca.pem", *certificates)
+
+    store_path = build_pkcs12_truststore(cert_path, str(tmp_path / "store.p12"), "DB2", "s3cret")
+    store = _load(store_path, b"s3cret")
+
+    assert store.key is None and store.cert is None
+    assert [entry.certificate for entry in store.additional_certs] == certificates
+    assert [entry.friendly_name for entry in store.additional_certs] == [b"db2", b"db2-1"]
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_truststore_mac_rejects_a_wrong_password(tmp_path, certificates):
+    cert_path = _write(tmp_path / "ca.der", certificates[0], encoding=serialization.Encoding.DER)
+    store_path = build_pkcs12_truststore(cert_path, str(tmp_path / "store.p12"), "oracle")
+
+    assert [entry.certificate for entry in _load(store_path, b"changeit").additional_certs] == certificates[:1]
+    with pytest.raises(ValueError):
+        _load(store_path, b"wrong")
+
+
+@pytest.mark.parametrize("password", ["", "pässwörd-with-a-long-tail-" * 4])
+def test_truststore_passwords_outside_the_default(tmp_path, certificates, password):
+    cert_path = _write(tmp_path / "ca.pem", certificates[0])
+    store_path = build_pkcs12_truststore(cert_path, str(tmp_path / "store.p12"), "ldap", password)
+
+    assert len(_load(store_path, password.encode("utf-8")).additional_certs) == 1
+
+
+def test_cache_reuses_the_truststore_of_the_same_certificate(logger, tmp_path, certificates, monkeypatch):
+    builds = []
+    build = truststore.build_pkcs12_truststore
+    monkeypatch.setattr(truststore, "build_pkcs12_truststore",
+                        lambda *args: builds.append(args[0]) or build(*args))
+    cache = TruststoreCache(logger, cache_dir=str(tmp_path / "cache"))
+    first = _write(tmp_path / "first.pem", certificates[0])
+    # Another datasource signed by the same CA, in a file of its own
+    same = _write(tmp_path / "same.pem", certificates[0])
+    other = _write(tmp_path / "other.pem", certificates[1])
+
+    store_path = cache.get(first, "db2")
+    assert cache.get(same, "oracle") == store_path
+    assert builds == [first]
+
+    # A different certificate or password is a miss
+    assert cache.get(other, "db2") != store_path
+    assert cache.get(first, "db2", truststore_pwd="s3cret") != store_path
+    assert builds == [first, other, first]
+    assert len(os.listdir(tmp_path / "cache")) == 3
+    assert [entry.certificate for entry in _load(store_path, b"changeit").additional_certs] == certificates[:1]
+
+    with pytest.raises(ValueError):
+        cache.get(first, "db2", storetype="JKS")
+
+
+def test_cache_evicts_truststores_not_used_recently(logger, tmp_path, certificates):
+    cache = TruststoreCache(logger, cache_dir=str(tmp_path / "cache"))
+    stale = cache.get(_write(tmp_path / "stale.pem", certificates[0]), "db2")
+    fresh = cache.get(_write(tmp_path / "fresh.pem", certificates[1]), "db2")
+    old = time.time() - TruststoreCache._MAX_AGE - 60
+    os.utime(stale, (old, old))
+    os.utime(fresh, (old, old))
+    # A cache hit marks the truststore as used
+    cache.get(_write(tmp_path / "again.pem", certificates[1]), "db2")
+
+    cache.evict_stale()
+
+    assert not os.path.exists(stale)
+    assert os.path.exists(fresh)
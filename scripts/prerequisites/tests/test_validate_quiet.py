@@ -0,0 +1,82 @@
+###############################################################################
+#
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp. 2023. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+###############################################################################
+
+import logging
+
+from helper_scripts.validate import validate as v
+from helper_scripts.validate.kube_client import ApplyResult
+from helper_scripts.validate.scheduler import NullProgress
+
+LDAP_PROP = {"_ldap_ids": ["LDAP"],
+             "ldap_number": 1,
+             "LDAP": {"LDAP_SERVER": "127.0.0.1",
+                      "LDAP_PORT": "389",
+                      "LDAP_SSL_ENABLED": False,
+                      "LDAP_BASE_DN": "dc=example,dc=com",
+                      "LDAP_BIND_DN": "cn=admin,dc=example,dc=com",
+                      "LDAP_BIND_DN_PASSWORD": "password"}}
+DEPLOY_PROP = {"FNCM_Version": "5.5.12", "FIPS_SUPPORT": False}
+
+APPLY_RESULTS = [ApplyResult("secret/ldap-bind-secret", True, "", action="created"),
+                 ApplyResult("secret/ibm-fncm-secret", True, "", action="skipped"),
+                 ApplyResult("fncmcluster/fncmdeploy", False, "forbidden", action="failed")]
+
+
+def _validate(logger, quiet):
+    return v.Validate(logger, connect_timeout=1, ldap_prop=LDAP_PROP, deploy_prop=DEPLOY_PROP, quiet=quiet)
+
+
+def _unexpected(*args, **kwargs):
+    raise AssertionError("renderable built in a quiet run")
+
+
+def test_quiet_run_does_not_build_tables_or_panels(logger, monkeypatch):
+    for renderable in ["Panel", "dns_table", "sweep_table"]:
+        monkeypatch.setattr(v, renderable, _unexpected)
+
+    vobject = _validate(logger, quiet=True)
+    try:
+        vobject.resolve_hostnames(NullProgress())
+        vobject.sweep_reachability(NullProgress())
+    finally:
+        vobject.close()
+
+    # The checks still fill the results of the report
+    assert {(result.check_type, result.target) for result in vobject.report_results()} >= \
+           {("dns", "127.0.0.1"), ("reachability", "127.0.0.1:389")}
+
+
+def test_quiet_apply_logs_each_object_instead_of_a_panel(logger, tmp_path, monkeypatch, capsys, caplog):
+    vobject = _validate(logger, quiet=True)
+    monkeypatch.setattr(vobject, "kube_apply_all", lambda yaml_paths: APPLY_RESULTS)
+    try:
+        with caplog.at_level(logging.INFO, logger=logger.name):
+            assert vobject.auto_apply_all_in_folder(str(tmp_path)) is False
+    finally:
+        vobject.close()
+
+    assert capsys.readouterr().out == ""
+    assert "secret/ldap-bind-secret created" in caplog.text
+    assert "secret/ibm-fncm-secret skipped" in caplog.text
+    assert "fncmcluster/fncmdeploy failed: forbidden" in caplog.text
+
+
+def test_apply_prints_a_panel_when_not_quiet(logger, tmp_path, monkeypatch, capsys):
+    vobject = _validate(logger, quiet=False)
+    monkeypatch.setattr(vobject, "kube_apply_all", lambda yaml_paths: APPLY_RESULTS)
+    try:
+        vobject.auto_apply_all_in_folder(str(tmp_path))
+    finally:
+        vobject.close()
+
+    output = capsys.readouterr().out
+    assert "secret/ldap-bind-secret created" in output
+    assert "1 created, 0 updated, 1 skipped, 1 failed" in output